@@ -1,26 +1,34 @@
+import os
+from functools import partial
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import csv
+from models.chatbot_index import ChatbotIndexLoader
+from models.chatbot_store import open_chatbot_index
 
 router = APIRouter()
 
 # Path to the CSV file
 CSV_FILE_PATH = 'api/endpoints/asistente.csv'
 
-# Load the CSV data into a dictionary
-def load_csv_data(filepath):
-    dataset = {}
+# Compiled store built by scripts/build_chatbot_store.py; used instead of the CSV while it is up to date
+STORE_PATH = os.environ.get('CHATBOT_STORE_PATH', 'models/chatbot.bin')
+
+# Minimum cosine similarity for a fuzzy match to be accepted
+MATCH_THRESHOLD = 0.5
+
+# Build the fuzzy question index from the compiled store, or from the CSV data while there is no store
+# or the CSV was edited after compiling it; edits to either file are picked up without a restart
+def load_chatbot_index(filepath, store_path=STORE_PATH):
+    loader = ChatbotIndexLoader(store_path, threshold=MATCH_THRESHOLD, watch=[filepath],
+                                builder=partial(open_chatbot_index, csv_path=filepath))
     try:
-        with open(filepath, mode='r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                dataset[row['question'].lower()] = row['answer']
+        loader.current()
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="CSV file not found")
-    return dataset
+    return loader
 
 # Load the data from asistente.csv
-chatbot_data = load_csv_data(CSV_FILE_PATH)
+chatbot_loader = load_chatbot_index(CSV_FILE_PATH)
 
 # Define the input model
 class QuestionModel(BaseModel):
@@ -29,10 +37,20 @@ class QuestionModel(BaseModel):
 @router.post("/chatbot/")
 async def get_response(question: QuestionModel):
     """
-    Search for an answer in the local CSV file based on the user's question.
+    Search for the closest question in the local CSV file, tolerating typos, accents and punctuation.
     """
-    question_lower = question.question.lower()
-    if question_lower in chatbot_data:
-        return {"answer": chatbot_data[question_lower]}
+    match = chatbot_loader.current().answer(question.question)
+    if match is not None:
+        return {"answer": match[0]}
     else:
         return {"answer": "Lo siento, no encuentro una respuesta a esta pregunta."}
+
+@router.post("/reload")
+def reload_chatbot():
+    """
+    Rebuild the index from its file; on failure the current index keeps serving.
+    """
+    try:
+        return chatbot_loader.reload()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,22 +1,102 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import os
+import threading
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
-from models.market_analysis import MarketAnalysis
+from starlette.concurrency import run_in_threadpool
+from models.geo import GRID_RESOLUTIONS
+from models.market_analysis import LOCATION_RESOLUTION, MarketAnalysis
+from models.market_charts import CHART_FORMATS, chart_renderer
+from models.market_jobs import analysis_jobs
+from models.sales_aggregates import SalesAggregateStore
 import requests
 
 router = APIRouter()
 
+API_URL = 'http://<django-backend-url>'  # Replace with your actual Django API URL
+
+STATISTICS_KEYS = ('daily_sales', 'hourly_sales', 'location_sales')
+
+# Per-seller aggregates; each analysis only fetches sales newer than the seller's cursor
+SALES_AGGREGATES_PATH = os.environ.get('SALES_AGGREGATES_PATH', 'models/sales_aggregates.sqlite3')
+# Opened on first use, so importing the app does not create the SQLite file
+sales_aggregates = None
+_sales_aggregates_lock = threading.Lock()
+
+def get_sales_aggregates():
+    global sales_aggregates
+    if sales_aggregates is None:
+        with _sales_aggregates_lock:
+            if sales_aggregates is None:
+                sales_aggregates = SalesAggregateStore(SALES_AGGREGATES_PATH)
+    return sales_aggregates
+
 class AnalysisRequest(BaseModel):
     user_id: int
+    # Grid cell size in degrees for location_sales (1, 0.1, 0.01 or 0.001)
+    location_resolution: float = LOCATION_RESOLUTION
+
+def check_resolution(location_resolution):
+    if location_resolution not in GRID_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported location resolution: {location_resolution}. "
+                                                    f"Use one of {list(GRID_RESOLUTIONS)}")
 
 @router.post("/run_analysis")
 def run_analysis(request: AnalysisRequest):
-    api_url = 'http://<django-backend-url>'  # Replace with your actual Django API URL
-    analysis = MarketAnalysis(api_url)
+    check_resolution(request.location_resolution)
+    analysis = MarketAnalysis(API_URL, get_sales_aggregates(), location_resolution=request.location_resolution)
     try:
-        # Run the analysis
-        analysis.run_analysis(request.user_id)
-        return {"message": "Analysis completed successfully"}
+        # Run the analysis; charts are served separately by /charts/{user_id}. Sales without an id
+        # cannot be merged incrementally, so run_analysis recomputes them in full
+        return analysis.run_analysis(request.user_id)
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/jobs", status_code=202)
+def submit_analysis_job(request: AnalysisRequest):
+    check_resolution(request.location_resolution)
+    try:
+        # Runs in the analysis process pool; a seller with a job in flight gets that same job back
+        return analysis_jobs.submit(API_URL, request.user_id, SALES_AGGREGATES_PATH, request.location_resolution)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/jobs/{job_id}")
+def get_analysis_job(job_id: str):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@router.get("/charts/{user_id}")
+async def get_charts(user_id: int, format: str = 'png', location_resolution: float = LOCATION_RESOLUTION):
+    if format not in CHART_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported chart format: {format}")
+    check_resolution(location_resolution)
+    store = get_sales_aggregates()
+    analysis = MarketAnalysis(API_URL, store, location_resolution=location_resolution)
+    try:
+        # Charts show the aggregates as of the seller's last analysis (/run_analysis or /jobs); the store
+        # cursor versions them, so a cached chart is served without fetching sales or reading aggregates
+        result = None
+        version = await run_in_threadpool(store.version, user_id)
+        if version is None:
+            result = await run_in_threadpool(analysis.run_analysis, user_id)
+            version = await run_in_threadpool(store.version, user_id)
+        if version is not None:
+            data_version = '{}-{}-{}'.format(*version, location_resolution)
+        else:
+            # No cursor (no sales, or sales without an id): version the fresh result by its content
+            data_version = result['data_version']
+        image = chart_renderer.cached(user_id, data_version, format)
+        if image is None:
+            if result is None:
+                result = await run_in_threadpool(analysis.stored_analysis, user_id)
+            statistics = {key: result[key] for key in STATISTICS_KEYS}
+            # Rendered in the chart worker pool and cached by (user_id, data_version, format)
+            image = await asyncio.wrap_future(chart_renderer.render(user_id, data_version, statistics, format))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=image, media_type=CHART_FORMATS[format], headers={'ETag': f'"{data_version}"'})
@@ -1,10 +1,19 @@
+import logging
+from typing import List, Optional
+import numpy as np
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from models.pricing import PricingCalculator
+from starlette.concurrency import run_in_threadpool
+from models.config import DJANGO_API_BASE_URL
+from models.cost_cache import product_cost_cache
+from models.price_model import predict_price
+from models.pricing import PricingCalculator, fetch_products_data, suggest_prices
 
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 class PricingRequest(BaseModel):
     product_id: int
 
@@ -12,13 +21,83 @@ class PricingResponse(BaseModel):
     suggested_price: float
     earnings_percentage: float
     message: str
+    model_price: Optional[float] = None
+
+class OfflinePricingRequest(BaseModel):
+    product_id: Optional[int] = None
+    material_cost_per_unit: float
+    quantity_per_unit: float
+    price_per_unit: Optional[float] = None
+    transport_cost: float
+    labor_cost: float
+    material_costs: float
+    other_expenses: float
+    earnings_percentage: Optional[float] = None
+    category: Optional[str] = None
+
+class BulkPricingRequest(BaseModel):
+    product_ids: List[int]
+
+class BulkPricingItem(BaseModel):
+    product_id: int
+    total_cost: float
+    earnings_percentage: float
+    suggested_price: float
+
+class BulkPricingResponse(BaseModel):
+    results: List[BulkPricingItem]
+    missing: List[int]
+
+async def build_pricing_response(calculator, with_model=True):
+    suggested_price, earnings_percentage = calculator.suggest_price()
+    message = calculator.generate_price_suggestion_message(suggested_price, earnings_percentage)
+    model_price = None
+    if with_model:
+        # Las solicitudes concurrentes se agrupan en lotes para el modelo de precios, si hay uno entrenado.
+        # El precio del modelo es opcional; si la predicción falla se responde con el precio por reglas
+        try:
+            model_price = await predict_price(calculator.product_data)
+        except ValueError as e:
+            # Datos del producto que no sirven para el modelo (p. ej. faltan características): una línea basta
+            logger.warning("Sin precio del modelo para el producto %s: %s", calculator.product_id, e)
+        except Exception:
+            logger.exception("Falló la predicción del modelo de precios para el producto %s", calculator.product_id)
+    return PricingResponse(suggested_price=suggested_price, earnings_percentage=earnings_percentage, message=message,
+                           model_price=model_price)
 
 @router.post("/pricing/", response_model=PricingResponse)
-def calculate_pricing(request: PricingRequest):
+async def calculate_pricing(request: PricingRequest):
     try:
-        calculator = PricingCalculator(request.product_id)
-        suggested_price, earnings_percentage = calculator.suggest_price()
-        message = calculator.generate_price_suggestion_message()
-        return PricingResponse(suggested_price=suggested_price, earnings_percentage=earnings_percentage, message=message)
+        calculator = await run_in_threadpool(PricingCalculator, request.product_id)
+        return await build_pricing_response(calculator)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/offline", response_model=PricingResponse)
+async def calculate_offline_pricing(request: OfflinePricingRequest):
+    try:
+        cost_data = request.model_dump(exclude={'product_id'})
+        calculator = PricingCalculator.from_cost_data(cost_data, product_id=request.product_id)
+        # Solo cálculo: sin pasar por el agrupador del modelo, que añade hasta max_wait de espera
+        return await build_pricing_response(calculator, with_model=False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/bulk", response_model=BulkPricingResponse)
+def calculate_bulk_pricing(request: BulkPricingRequest):
+    try:
+        product_ids = list(dict.fromkeys(request.product_ids))
+        products = fetch_products_data(product_ids, DJANGO_API_BASE_URL) if product_ids else []
+        prices = suggest_prices(products) if products else None
+        if prices is not None:
+            # Los productos con costos incompletos tienen precio NaN, que no se puede serializar; van en missing
+            prices = prices[np.isfinite(prices[['total_cost', 'earnings_percentage', 'suggested_price']]).all(axis=1)]
+        found = set() if prices is None else set(prices['product_id'].tolist())
+        results = [] if prices is None else prices.to_dict(orient='records')
+        return BulkPricingResponse(results=results, missing=[pid for pid in product_ids if pid not in found])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cache")
+def cost_cache_stats():
+    return product_cost_cache.stats()
@@ -1,19 +1,99 @@
+import json
+import os
+from itertools import chain
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from models.recommender import Recommender
+from models.ranking import RankingWeights
+from models.recommendation_store import RecommendationStore
+from models.profile_cache import UserProfile, profile_cache
+from models.recommender import AsyncRecommender, Recommender
+from models.config import DJANGO_API_BASE_URL
 
 
 router = APIRouter()
 
+# Recomendaciones precalculadas por scripts/precompute_recommendations.py
+recommendation_store = RecommendationStore(os.environ.get('RECOMMENDATION_STORE_PATH', 'models/recommendations.bin'))
+
 class RecommendationRequest(BaseModel):
     user_id: int
     top_n: int = 5
+    max_distance_km: Optional[float] = None
+    weights: Optional[Dict[str, float]] = None
+
+class LocationModel(BaseModel):
+    latitude: float
+    longitude: float
+
+class UserProfileUpdate(BaseModel):
+    interests: List[str]
+    location: LocationModel
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int]
+    top_n: int = 5
+    max_distance_km: Optional[float] = None
+    weights: Optional[Dict[str, float]] = None
 
 @router.post("/recommendations/")
-def get_recommendations(request: RecommendationRequest):
+async def get_recommendations(request: RecommendationRequest):
     try:
-        recommender = Recommender(django_api_base_url='http://<django-backend-url>')
-        recommendations = recommender.recommend(user_id=request.user_id, top_n=request.top_n)
+        weights = RankingWeights(**request.weights) if request.weights else None
+        recommender = AsyncRecommender(django_api_base_url=DJANGO_API_BASE_URL, ranking_weights=weights)
+        # Las solicitudes con opciones predeterminadas se sirven desde el archivo precalculado si está vigente
+        if request.max_distance_km is None and weights is None:
+            recommendations = await recommender.arecommend_precomputed(request.user_id, recommendation_store,
+                                                                       top_n=request.top_n)
+            if recommendations is not None:
+                return recommendations.to_dict(orient='records')
+        recommendations = await recommender.arecommend(user_id=request.user_id, top_n=request.top_n,
+                                                       max_distance_km=request.max_distance_km)
         return recommendations.to_dict(orient='records')
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+def batch_line(user_id, recommendations):
+    if recommendations is None:
+        return json.dumps({'user_id': user_id, 'error': 'Usuario no encontrado'}) + '\n'
+    return f'{{"user_id": {json.dumps(user_id)}, "recommendations": {recommendations.to_json(orient="records")}}}\n'
+
+def batch_lines(results):
+    try:
+        for result in results:
+            yield batch_line(*result)
+    except Exception as e:
+        # Una vez enviado el encabezado 200 el error se reporta como última línea del flujo
+        yield json.dumps({'error': str(e)}) + '\n'
+
+@router.post("/recommendations/batch")
+def get_batch_recommendations(request: BatchRecommendationRequest):
+    try:
+        weights = RankingWeights(**request.weights) if request.weights else None
+        recommender = Recommender(django_api_base_url=DJANGO_API_BASE_URL, ranking_weights=weights)
+        results = recommender.recommend_many(request.user_ids, top_n=request.top_n,
+                                             max_distance_km=request.max_distance_km)
+        # El primer resultado se calcula antes de responder para reportar errores del backend como 400
+        first = next(results, None)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    lines = () if first is None else batch_lines(chain([first], results))
+    return StreamingResponse(lines, media_type='application/x-ndjson')
+
+@router.delete("/profiles/{user_id}")
+def invalidate_profile(user_id: int):
+    # Llamado por el backend de Django cuando cambia un perfil
+    return {"user_id": user_id, "invalidated": profile_cache.invalidate((DJANGO_API_BASE_URL, user_id))}
+
+@router.put("/profiles/{user_id}")
+def update_profile(user_id: int, profile: UserProfileUpdate):
+    # Escritura directa: el backend envía el perfil actualizado y se reemplaza en la caché
+    location = (profile.location.latitude, profile.location.longitude)
+    profile_cache.put((DJANGO_API_BASE_URL, user_id), UserProfile(user_id, profile.interests, location))
+    return {"user_id": user_id, "updated": True}
+
+@router.get("/profiles/cache")
+def profile_cache_stats():
+    return profile_cache.stats()
@@ -0,0 +1,52 @@
+import time
+import numpy as np
+from models.chatbot_index import ChatbotIndex
+
+WORDS = ['como', 'puedo', 'vender', 'comprar', 'hamaca', 'cafe', 'envio', 'pago', 'tarjeta', 'cuenta', 'perfil',
+         'producto', 'precio', 'devolucion', 'vendedor', 'comprador', 'managua', 'leon', 'granada', 'masaya',
+         'artesania', 'queso', 'cacao', 'miel', 'ropa', 'calzado', 'horario', 'soporte', 'contrasena', 'correo']
+
+
+def synthetic_faq(n, seed=0):
+    """
+    Genera preguntas y respuestas sintéticas combinando palabras del dominio con un identificador.
+
+    :param n: Número de pares pregunta/respuesta
+    :param seed: Semilla aleatoria
+    :return: Tupla (preguntas, respuestas)
+    """
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(WORDS), (n, 5))
+    questions = [f"{' '.join(WORDS[j] for j in row)} {i}?" for i, row in enumerate(picks)]
+    answers = [f"Respuesta {i}" for i in range(n)]
+    return questions, answers
+
+
+def with_typo(text, rng):
+    """
+    Cambia una letra al azar para simular un error de escritura.
+    """
+    position = int(rng.integers(0, len(text) - 2))
+    return text[:position] + 'x' + text[position + 1:]
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    for n in (1_000, 10_000, 100_000):
+        questions, answers = synthetic_faq(n)
+        start = time.perf_counter()
+        index = ChatbotIndex(questions, answers)
+        build_seconds = time.perf_counter() - start
+
+        queries = [with_typo(questions[i], rng) for i in rng.integers(0, n, 1000)]
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        fuzzy_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        start = time.perf_counter()
+        for query in questions[:1000]:
+            index.search(query)
+        exact_ms = (time.perf_counter() - start) / 1000 * 1000
+        print(f"{n:>7} preguntas | construcción: {build_seconds:6.2f}s | índice: {index.nbytes / 1e6:6.1f} MB | "
+              f"búsqueda aproximada: {fuzzy_ms:.3f}ms | exacta: {exact_ms:.4f}ms")
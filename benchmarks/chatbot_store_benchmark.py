@@ -0,0 +1,77 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from chatbot_benchmark import synthetic_faq
+from models.chatbot_store import build_chatbot_store
+
+# Cada variante se mide en un proceso nuevo, como un worker de uvicorn recién iniciado
+LOADERS = {
+    'dict (cargador original)': "from models.chatbot_index import load_questions; index = load_questions({csv!r})",
+    'ChatbotIndex desde CSV': "from models.chatbot_index import ChatbotIndex; index = ChatbotIndex.from_csv({csv!r})",
+    'ChatbotStore mapeado': "from models.chatbot_store import ChatbotStore; index = ChatbotStore({store!r})",
+}
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import numpy, sklearn.feature_extraction.text
+
+def memory():
+    values = {{}}
+    with open('/proc/self/status') as file:
+        for line in file:
+            name, _, rest = line.partition(':')
+            if name in ('VmRSS', 'RssAnon', 'RssFile'):
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+before = memory()
+start = time.perf_counter()
+{load}
+seconds = time.perf_counter() - start
+if hasattr(index, 'answer'):
+    for question in {queries!r}:
+        index.answer(question)
+after = memory()
+print(json.dumps({{'seconds': seconds, 'before': before, 'after': after}}))
+"""
+
+
+def write_csv(path, questions, answers):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, quoting=csv.QUOTE_ALL)
+        writer.writerow(['question', 'answer'])
+        writer.writerows(zip(questions, answers))
+
+
+def measure(load, queries):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = CHILD.format(root=root, load=load, queries=queries)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for n in (10_000, 100_000):
+            questions, answers = synthetic_faq(n)
+            csv_path = os.path.join(directory, 'asistente.csv')
+            store_path = os.path.join(directory, 'chatbot.bin')
+            write_csv(csv_path, questions, answers)
+            start = time.perf_counter()
+            build_chatbot_store(csv_path, store_path)
+            build_seconds = time.perf_counter() - start
+            print(f"{n} preguntas | compilación del almacén: {build_seconds:.1f}s | "
+                  f"archivo: {os.path.getsize(store_path) / 1e6:.1f} MB")
+            queries = [question.replace('a', 'e', 1) for question in questions[:200]]
+            for name, template in LOADERS.items():
+                result = measure(template.format(csv=csv_path, store=store_path), queries)
+                before, after = result['before'], result['after']
+                print(f"  {name:<26} inicio: {result['seconds'] * 1000:9.1f}ms | "
+                      f"RSS: +{after['VmRSS'] - before['VmRSS']:7.1f} MB "
+                      f"(privada +{after['RssAnon'] - before['RssAnon']:7.1f} MB, "
+                      f"compartible +{after['RssFile'] - before['RssFile']:6.1f} MB)")
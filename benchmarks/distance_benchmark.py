@@ -0,0 +1,86 @@
+import time
+import numpy as np
+import pandas as pd
+from geopy.distance import geodesic
+from models.geo import haversine_km
+
+# Ubicación de referencia del comprador (Managua)
+USER_LOCATION = (12.1364, -86.2514)
+
+# A partir de este tamaño el método original se mide sobre una muestra y se extrapola
+MAX_APPLY_ROWS = 100_000
+
+
+def synthetic_products(n, seed=0):
+    """
+    Genera un catálogo sintético con coordenadas dentro de Nicaragua.
+
+    :param n: Número de productos
+    :param seed: Semilla aleatoria
+    :return: DataFrame con columnas 'latitude' y 'longitude'
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'latitude': rng.uniform(10.7, 15.0, n),
+        'longitude': rng.uniform(-87.7, -83.1, n),
+    })
+
+
+def time_apply(products_df):
+    """
+    Mide el cálculo original: un geodesic por fila con DataFrame.apply.
+
+    :param products_df: DataFrame de productos
+    :return: Tupla (segundos, extrapolado)
+    """
+    sample = products_df
+    if len(products_df) > MAX_APPLY_ROWS:
+        sample = products_df.iloc[:MAX_APPLY_ROWS]
+    start = time.perf_counter()
+    sample.apply(lambda row: geodesic(USER_LOCATION, (row['latitude'], row['longitude'])).kilometers, axis=1)
+    elapsed = time.perf_counter() - start
+    return elapsed * len(products_df) / len(sample), len(sample) < len(products_df)
+
+
+def time_haversine(products_df, repeat=3):
+    """
+    Mide el kernel haversine vectorizado (mejor de ``repeat`` ejecuciones).
+
+    :param products_df: DataFrame de productos
+    :param repeat: Número de repeticiones
+    :return: Segundos
+    """
+    latitudes = products_df['latitude'].to_numpy()
+    longitudes = products_df['longitude'].to_numpy()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        haversine_km(USER_LOCATION, latitudes, longitudes)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def max_error_km(products_df, sample_size=1000):
+    """
+    Error máximo de haversine frente a la distancia geodésica exacta sobre una muestra.
+
+    :param products_df: DataFrame de productos
+    :param sample_size: Tamaño de la muestra
+    :return: Error absoluto máximo en kilómetros
+    """
+    sample = products_df.iloc[:sample_size]
+    exact = np.array([geodesic(USER_LOCATION, (lat, lon)).kilometers
+                      for lat, lon in zip(sample['latitude'], sample['longitude'])])
+    approx = haversine_km(USER_LOCATION, sample['latitude'].to_numpy(), sample['longitude'].to_numpy())
+    return float(np.abs(exact - approx).max())
+
+
+if __name__ == "__main__":
+    for n in (1_000, 100_000, 1_000_000):
+        products_df = synthetic_products(n)
+        apply_seconds, extrapolated = time_apply(products_df)
+        haversine_seconds = time_haversine(products_df)
+        note = ' (extrapolado)' if extrapolated else ''
+        print(f"{n:>9} productos | apply+geodesic: {apply_seconds:9.3f}s{note} | "
+              f"haversine: {haversine_seconds * 1000:8.2f}ms | aceleración: {apply_seconds / haversine_seconds:,.0f}x")
+    print(f"Error máximo haversine vs geodesic: {max_error_km(synthetic_products(1000)):.3f} km")
@@ -0,0 +1,27 @@
+import json
+import time
+from market_analysis_benchmark import synthetic_sales
+from models.geo import GRID_RESOLUTIONS
+from models.market_analysis import MarketAnalysis, statistics_to_dict
+
+
+def time_statistics(analysis, df, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        statistics = analysis.generate_statistics(df)
+        best = min(best, time.perf_counter() - start)
+    return best, statistics
+
+
+if __name__ == "__main__":
+    for n in (100_000, 1_000_000):
+        df = MarketAnalysis('http://localhost:8000').process_data(synthetic_sales(n))
+        print(f"{n} ventas")
+        for resolution in (None,) + GRID_RESOLUTIONS:
+            analysis = MarketAnalysis('http://localhost:8000', location_resolution=resolution, max_location_cells=None)
+            seconds, statistics = time_statistics(analysis, df)
+            payload = json.dumps(statistics_to_dict(*statistics))
+            label = 'exacta' if resolution is None else f'{resolution} grados'
+            print(f"  {label:>13} | agrupar: {seconds * 1000:8.1f}ms | celdas: {len(statistics[2]):>8} | "
+                  f"JSON: {len(payload) / 1e6:6.1f} MB")
@@ -0,0 +1,65 @@
+import time
+import numpy as np
+import pandas as pd
+from models.market_analysis import MarketAnalysis
+
+
+def synthetic_sales(n, seed=0):
+    """
+    Genera ventas sintéticas con el formato del endpoint /sales/ del backend.
+
+    :param n: Número de ventas
+    :param seed: Semilla aleatoria
+    :return: DataFrame con date, hour, amount y buyer_location anidado
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2023-01-01', periods=365).strftime('%Y-%m-%d').to_numpy()
+    return pd.DataFrame({
+        'date': days[rng.integers(0, len(days), n)],
+        'hour': [f'{h:02d}:{m:02d}:{s:02d}' for h, m, s in zip(rng.integers(0, 24, n), rng.integers(0, 60, n),
+                                                               rng.integers(0, 60, n))],
+        'amount': rng.uniform(10, 2000, n).round(2),
+        'buyer_location': [{'latitude': float(lat), 'longitude': float(lon)}
+                           for lat, lon in zip(rng.uniform(10.7, 15.0, n), rng.uniform(-87.7, -83.1, n))],
+    })
+
+
+def original_process_data(df):
+    """
+    Implementación anterior de ``MarketAnalysis.process_data``, como referencia.
+    """
+    df['date'] = pd.to_datetime(df['date'])
+    df['hour'] = pd.to_datetime(df['hour'], format='%H:%M:%S').dt.hour
+    df['sales_amount'] = df['amount'].astype(float)
+    df['buyer_latitude'] = df['buyer_location'].apply(lambda loc: loc['latitude'])
+    df['buyer_longitude'] = df['buyer_location'].apply(lambda loc: loc['longitude'])
+    return df
+
+
+def time_best(function, sales, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        df = sales.copy()
+        start = time.perf_counter()
+        function(df)
+        best = min(best, time.perf_counter() - start)
+    return best, df
+
+
+def derived_bytes(df):
+    columns = ['hour', 'sales_amount', 'buyer_latitude', 'buyer_longitude']
+    return int(df[columns].memory_usage(index=False, deep=True).sum())
+
+
+if __name__ == "__main__":
+    analysis = MarketAnalysis('http://localhost:8000')
+    for n in (10_000, 100_000, 500_000):
+        sales = synthetic_sales(n)
+        original_seconds, original_df = time_best(original_process_data, sales)
+        vectorized_seconds, vectorized_df = time_best(analysis.process_data, sales)
+        assert (original_df['hour'].to_numpy() == vectorized_df['hour'].to_numpy()).all()
+        assert np.allclose(original_df['buyer_latitude'], vectorized_df['buyer_latitude'], atol=1e-5)
+        print(f"{n:>7} ventas | original: {original_seconds * 1000:8.1f}ms | vectorizado: "
+              f"{vectorized_seconds * 1000:8.1f}ms | aceleración: {original_seconds / vectorized_seconds:5.1f}x | "
+              f"columnas derivadas: {derived_bytes(original_df) / 1e6:5.1f} MB -> "
+              f"{derived_bytes(vectorized_df) / 1e6:5.1f} MB")
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from models.market_analysis import MarketAnalysis
+from models.platform_analytics import PlatformStatistics, write_platform_statistics
+
+
+def synthetic_chunks(n, sellers, chunksize=1_000_000, seed=0):
+    """
+    Genera bloques de ventas ya procesadas (ver ``process_sales_rows``) de muchos vendedores.
+
+    :param n: Número total de ventas
+    :param sellers: Número de vendedores
+    :param chunksize: Ventas por bloque
+    :param seed: Semilla aleatoria
+    :return: Generador de DataFrames
+    """
+    rng = np.random.default_rng(seed)
+    start_day = np.datetime64('2023-01-01')
+    for offset in range(0, n, chunksize):
+        size = min(chunksize, n - offset)
+        yield pd.DataFrame({
+            'user_id': rng.integers(1, sellers + 1, size),
+            'date': pd.to_datetime(start_day + rng.integers(0, 365, size)),
+            'hour': rng.integers(0, 24, size).astype(np.int8),
+            'sales_amount': rng.uniform(10, 2000, size).round(2),
+            'buyer_latitude': rng.uniform(10.7, 15.0, size).astype(np.float32),
+            'buyer_longitude': rng.uniform(-87.7, -83.1, size).astype(np.float32),
+        })
+
+
+def per_seller_seconds(chunk, sample):
+    """
+    Tiempo de ``generate_statistics`` vendedor por vendedor (sin contar la descarga) para una muestra.
+    """
+    analysis = MarketAnalysis('http://localhost:8000')
+    groups = dict(tuple(chunk.groupby('user_id')))
+    start = time.perf_counter()
+    for user_id in list(groups)[:sample]:
+        analysis.generate_statistics(groups[user_id])
+    return (time.perf_counter() - start) / sample
+
+
+if __name__ == "__main__":
+    n, sellers = 10_000_000, 20_000
+    statistics = PlatformStatistics()
+    seconds = 0.0
+    first_chunk = None
+    for chunk in synthetic_chunks(n, sellers):
+        first_chunk = first_chunk if first_chunk is not None else chunk
+        start = time.perf_counter()
+        statistics.add(chunk)
+        seconds += time.perf_counter() - start
+    start = time.perf_counter()
+    result = statistics.result()
+    seconds += time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'platform.npz')
+        start = time.perf_counter()
+        write_platform_statistics(path, result)
+        write_seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+    # Cada vendedor de la muestra tiene ~1/10 de sus ventas en el primer bloque; se escala por 10
+    per_seller = per_seller_seconds(first_chunk, 200) * 10
+    print(f"{n} ventas, {sellers} vendedores")
+    print(f"  una pasada: {seconds:6.1f}s ({n / seconds / 1e6:.1f} M ventas/s) | escritura: {write_seconds:.1f}s | "
+          f"archivo: {size / 1e6:.1f} MB")
+    print(f"  filas: diario {len(result['daily_user_id'])}, por hora {len(result['hourly_user_id'])}, "
+          f"ubicación {len(result['location_user_id'])}")
+    print(f"  generate_statistics por vendedor (estimado, sin descargas): {per_seller * sellers:6.1f}s")
@@ -0,0 +1,90 @@
+import time
+import numpy as np
+import pandas as pd
+from models.pricing import PricingCalculator, suggest_prices
+from models.pricing_rules import DEFAULT_RULES, PricingRules
+
+# A partir de este tamaño el cálculo por producto se mide sobre una muestra y se extrapola
+MAX_LOOP_ROWS = 50_000
+
+CATEGORY_RULES = {
+    'default': DEFAULT_RULES['default'],
+    'categories': {
+        'artesanias': {'tiers': [{'max_cost': 500, 'percentage': 20}, {'percentage': 30}], 'max_markup': 2000,
+                       'rounding': {'mode': 'up', 'step': 5}},
+        'alimentos': {'max_percentage': 12, 'rounding': {'mode': 'nearest', 'step': 1}},
+        'ropa': {'min_percentage': 18},
+    },
+}
+
+
+def synthetic_costs(n, seed=0):
+    """
+    Genera una tabla sintética de costos de productos.
+
+    :param n: Número de productos
+    :param seed: Semilla aleatoria
+    :return: DataFrame con los campos de costo, 'id' y 'category'
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(n),
+        'material_cost_per_unit': rng.uniform(0.5, 50, n),
+        'quantity_per_unit': rng.integers(1, 40, n),
+        'transport_cost': rng.uniform(0, 200, n),
+        'labor_cost': rng.uniform(0, 400, n),
+        'material_costs': rng.uniform(0, 300, n),
+        'other_expenses': rng.uniform(0, 100, n),
+        'category': rng.choice(['artesanias', 'alimentos', 'ropa', 'otros'], n),
+    })
+
+
+def time_per_product(costs_df):
+    """
+    Mide el cálculo original: un PricingCalculator por producto.
+
+    :param costs_df: DataFrame de costos
+    :return: Tupla (segundos, extrapolado)
+    """
+    sample = costs_df.iloc[:MAX_LOOP_ROWS]
+    records = sample.to_dict(orient='records')
+    start = time.perf_counter()
+    for record in records:
+        PricingCalculator.from_cost_data(record, product_id=record['id']).suggest_price()
+    elapsed = time.perf_counter() - start
+    return elapsed * len(costs_df) / len(sample), len(sample) < len(costs_df)
+
+
+def time_best(function, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    n = 1_000_000
+    costs_df = synthetic_costs(n)
+    rules = PricingRules(CATEGORY_RULES)
+    total_costs = (costs_df['material_cost_per_unit'] * costs_df['quantity_per_unit'] + costs_df['transport_cost']
+                   + costs_df['labor_cost'] + costs_df['material_costs'] + costs_df['other_expenses']).to_numpy()
+    categories = costs_df['category'].to_numpy()
+
+    start = time.perf_counter()
+    PricingRules(CATEGORY_RULES)
+    compile_seconds = time.perf_counter() - start
+    loop_seconds, extrapolated = time_per_product(costs_df)
+    frame_seconds = time_best(lambda: suggest_prices(costs_df))
+    default_seconds = time_best(lambda: PricingRules({'default': CATEGORY_RULES['default']}).evaluate(total_costs))
+    category_seconds = time_best(lambda: rules.evaluate(total_costs, categories))
+
+    note = ' (extrapolado)' if extrapolated else ''
+    print(f"Compilación de reglas: {compile_seconds * 1000:.2f}ms")
+    print(f"{n:>9} productos | por producto: {loop_seconds:8.2f}s{note}")
+    print(f"{n:>9} productos | suggest_prices (DataFrame): {frame_seconds * 1000:8.2f}ms")
+    print(f"{n:>9} productos | reglas por defecto: {default_seconds * 1000:8.2f}ms "
+          f"({n / default_seconds / 1e6:.1f} M productos/s)")
+    print(f"{n:>9} productos | reglas por categoría: {category_seconds * 1000:8.2f}ms "
+          f"({n / category_seconds / 1e6:.1f} M productos/s)")
@@ -3,7 +3,7 @@ from sklearn.model_selection import train_test_split
 import pymysql
 
 class DataSplitter:
-    def __init__(self, db_url, table_name, target_column, test_size=0.2, random_state=42):
+    def __init__(self, db_url, table_name, target_column, test_size=0.2, random_state=42, load=True):
         """
         Initialize the DataSplitter with the data from the database and parameters for splitting.
 
@@ -12,6 +12,8 @@ class DataSplitter:
         :param target_column: Name of the target column for supervised learning
         :param test_size: Proportion of the dataset to include in the test split
         :param random_state: Seed used by the random number generator
+        :param load: Whether to load the whole table now; pass False to only open the connection
+            (e.g. to stream a large table in chunks)
         """
         self.db_url = db_url
         self.table_name = table_name
@@ -19,7 +21,7 @@ class DataSplitter:
         self.test_size = test_size
         self.random_state = random_state
         self.connection = self.create_connection()
-        self.data = self.load_data()
+        self.data = self.load_data() if load else None
 
     def create_connection(self):
         """
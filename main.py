@@ -1,7 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from api.endpoints import market_analysis, pricing, recommender, chatbot
+from models.market_charts import chart_renderer
+from models.market_jobs import analysis_jobs
+from models.price_model import close_price_batcher
+from models.recommender import AsyncRecommender
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await AsyncRecommender.close_client()
+    await close_price_batcher()
+    chart_renderer.shutdown()
+    analysis_jobs.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(market_analysis.router, prefix="/market_analysis", tags=["market_analysis"])
 app.include_router(pricing.router, prefix="/pricing", tags=["pricing"])
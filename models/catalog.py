@@ -0,0 +1,264 @@
+import asyncio
+import threading
+import time
+import weakref
+import pandas as pd
+import requests
+
+# Columnas de texto con pocos valores distintos se guardan como categorías a partir de este tamaño
+CATEGORY_MIN_ROWS = 1000
+CATEGORY_MAX_RATIO = 0.5
+
+
+class Catalog:
+    def __init__(self, frame, version, etag=None, last_modified=None, cursor=None, source=None):
+        """
+        Instantánea inmutable del catálogo de productos compartida por todas las solicitudes.
+
+        :param frame: DataFrame con los productos (no debe modificarse en sitio)
+        :param version: Número de versión, aumenta cada vez que cambia el contenido
+        :param etag: ETag devuelto por el backend
+        :param last_modified: Encabezado Last-Modified devuelto por el backend
+        :param cursor: Marca de tiempo para la siguiente consulta incremental (updated_since)
+        :param source: URL de la que proviene el catálogo; cada caché numera sus versiones desde 1
+        """
+        self.frame = frame
+        self.version = version
+        self.etag = etag
+        self.last_modified = last_modified
+        self.cursor = cursor
+        self.source = source
+        self.fetched_at = time.monotonic()
+        frame.attrs['catalog_version'] = version
+        frame.attrs['catalog_source'] = source
+
+    def __len__(self):
+        return len(self.frame)
+
+
+def catalog_identity(frame):
+    """
+    Identifica un DataFrame servido por una caché de catálogo.
+
+    Las versiones solo son únicas dentro de una caché, así que la identidad incluye la URL de origen.
+
+    :param frame: DataFrame de productos
+    :return: Tupla (origen, versión) o None si el DataFrame no proviene de una caché
+    """
+    version = frame.attrs.get('catalog_version')
+    if version is None:
+        return None
+    return frame.attrs.get('catalog_source'), version
+
+
+def compact_frame(frame):
+    """
+    Compacta el DataFrame columnar del catálogo.
+
+    Las columnas de texto repetitivas (categorías, vendedores, etc.) se convierten a ``category``
+    cuando el catálogo es grande; el resto de columnas conserva su tipo.
+
+    :param frame: DataFrame de productos
+    :return: DataFrame compactado
+    """
+    if len(frame) < CATEGORY_MIN_ROWS:
+        return frame
+    for column in frame.select_dtypes(include=['object', 'string']).columns:
+        if column == 'description':
+            continue
+        values = frame[column]
+        if values.map(lambda value: isinstance(value, (dict, list))).any():
+            continue
+        if values.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(frame):
+            frame[column] = values.astype('category')
+    return frame
+
+
+def _header(headers, name):
+    value = headers.get(name) if headers is not None else None
+    return value if isinstance(value, str) else None
+
+
+class CatalogCache:
+    def __init__(self, api_base_url, ttl=30, delta=False, timeout=10):
+        """
+        Caché del catálogo de productos con TTL y revalidación condicional (ETag / If-Modified-Since).
+
+        Mientras la copia sea más reciente que ``ttl`` segundos se sirve sin contactar al backend.
+        Al vencer se revalida: un 304 solo renueva el TTL. Con ``delta=True`` y un cursor disponible
+        se piden únicamente los productos modificados con ``?updated_since=``; los elementos con
+        ``"deleted": true`` se eliminan del catálogo.
+
+        :param api_base_url: URL base de la API del backend de Django
+        :param ttl: Segundos que la copia se considera fresca
+        :param delta: Si es True, usa consultas incrementales cuando hay cursor
+        :param timeout: Tiempo máximo de espera de cada solicitud HTTP
+        """
+        self.url = f'{api_base_url}/api/products/'
+        self.ttl = ttl
+        self.delta = delta
+        self.timeout = timeout
+        self.catalog = None
+        self._lock = threading.Lock()
+        # Un asyncio.Lock queda ligado al primer bucle que lo usa; se crea uno por bucle
+        self._async_locks = weakref.WeakKeyDictionary()
+        self.stats = {'hits': 0, 'revalidated': 0, 'full_fetches': 0, 'delta_fetches': 0}
+
+    def get(self):
+        """
+        Devuelve el catálogo vigente, revalidándolo con el backend si el TTL venció.
+
+        :return: Catalog
+        """
+        catalog = self.catalog
+        if catalog is not None and time.monotonic() - catalog.fetched_at < self.ttl:
+            self.stats['hits'] += 1
+            return catalog
+        with self._lock:
+            catalog = self.catalog
+            if catalog is not None and time.monotonic() - catalog.fetched_at < self.ttl:
+                self.stats['hits'] += 1
+                return catalog
+            url, headers, params = self.request_args()
+            response = requests.get(url, headers=headers, params=params, timeout=self.timeout)
+            return self.apply_response(response.status_code, response.headers,
+                                       response.json() if response.status_code == 200 else None,
+                                       is_delta=bool(params))
+
+    async def aget(self, client):
+        """
+        Variante asíncrona de ``get`` que usa un cliente httpx compartido.
+
+        La decodificación del JSON y la construcción del DataFrame se hacen en un hilo para no
+        bloquear el bucle de eventos.
+
+        :param client: httpx.AsyncClient
+        :return: Catalog
+        """
+        catalog = self.catalog
+        if catalog is not None and time.monotonic() - catalog.fetched_at < self.ttl:
+            self.stats['hits'] += 1
+            return catalog
+        loop = asyncio.get_running_loop()
+        async with self._async_locks.setdefault(loop, asyncio.Lock()):
+            catalog = self.catalog
+            if catalog is not None and time.monotonic() - catalog.fetched_at < self.ttl:
+                self.stats['hits'] += 1
+                return catalog
+            url, headers, params = self.request_args()
+            response = await client.get(url, headers=headers, params=params, timeout=self.timeout)
+            return await loop.run_in_executor(None, self._apply_http_response, response, bool(params))
+
+    def _apply_http_response(self, response, is_delta):
+        with self._lock:
+            return self.apply_response(response.status_code, response.headers,
+                                       response.json() if response.status_code == 200 else None,
+                                       is_delta=is_delta)
+
+    def invalidate(self):
+        """
+        Descarta la copia en memoria; la siguiente lectura hará una descarga completa.
+        """
+        with self._lock:
+            self.catalog = None
+
+    def request_args(self):
+        """
+        Construye la solicitud de revalidación según el estado actual de la caché.
+
+        :return: Tupla (url, headers, params)
+        """
+        catalog = self.catalog
+        headers, params = {}, {}
+        if catalog is None:
+            return self.url, headers, params
+        if self.delta and catalog.cursor:
+            params['updated_since'] = catalog.cursor
+            return self.url, headers, params
+        if catalog.etag:
+            headers['If-None-Match'] = catalog.etag
+        if catalog.last_modified:
+            headers['If-Modified-Since'] = catalog.last_modified
+        return self.url, headers, params
+
+    def apply_response(self, status_code, headers, payload, is_delta=False):
+        """
+        Incorpora la respuesta del backend a la caché y devuelve el catálogo resultante.
+
+        :param status_code: Código HTTP de la respuesta
+        :param headers: Encabezados de la respuesta
+        :param payload: Cuerpo JSON ya decodificado (None si no hay cuerpo)
+        :param is_delta: Si la respuesta corresponde a una consulta incremental
+        :return: Catalog
+        """
+        current = self.catalog
+        if status_code == 304 and current is not None:
+            current.fetched_at = time.monotonic()
+            self.stats['revalidated'] += 1
+            return current
+        if status_code != 200:
+            raise Exception("Error al obtener los datos de los productos")
+
+        etag = _header(headers, 'ETag')
+        last_modified = _header(headers, 'Last-Modified')
+        cursor = self._next_cursor(payload, headers)
+
+        if is_delta and current is not None:
+            self.stats['delta_fetches'] += 1
+            if not payload:
+                current.fetched_at = time.monotonic()
+                if cursor:
+                    current.cursor = cursor
+                return current
+            frame = self._merge_delta(current.frame, payload)
+            catalog = Catalog(frame, current.version + 1, current.etag, current.last_modified,
+                              cursor or current.cursor, source=self.url)
+        else:
+            self.stats['full_fetches'] += 1
+            version = current.version + 1 if current is not None else 1
+            catalog = Catalog(compact_frame(pd.DataFrame(payload)), version, etag, last_modified, cursor,
+                              source=self.url)
+        self.catalog = catalog
+        return catalog
+
+    @staticmethod
+    def _merge_delta(frame, changes):
+        changes_df = pd.DataFrame(changes)
+        changed_ids = set(changes_df['id'])
+        if 'deleted' in changes_df.columns:
+            deleted = changes_df['deleted'].fillna(False).astype(bool)
+            changes_df = changes_df[~deleted].drop(columns=['deleted'])
+        kept = frame[~frame['id'].isin(changed_ids)]
+        parts = [part for part in (kept, changes_df) if not part.empty]
+        if not parts:
+            return kept.reset_index(drop=True)
+        merged = pd.concat(parts, ignore_index=True)
+        return compact_frame(merged)
+
+    @staticmethod
+    def _next_cursor(payload, headers):
+        # Se prefiere la fecha de modificación más reciente reportada por el backend
+        if payload and isinstance(payload, list) and isinstance(payload[0], dict) and 'updated_at' in payload[0]:
+            values = [item.get('updated_at') for item in payload if item.get('updated_at')]
+            if values:
+                return max(values)
+        return _header(headers, 'Date')
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_catalog_cache(api_base_url, **kwargs):
+    """
+    Devuelve la caché de catálogo compartida del proceso para la URL indicada.
+
+    :param api_base_url: URL base de la API del backend de Django
+    :param kwargs: Parámetros de CatalogCache usados solo al crearla
+    :return: CatalogCache
+    """
+    with _caches_lock:
+        cache = _caches.get(api_base_url)
+        if cache is None:
+            cache = _caches[api_base_url] = CatalogCache(api_base_url, **kwargs)
+        return cache
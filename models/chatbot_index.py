@@ -0,0 +1,289 @@
+import csv
+import logging
+import threading
+import time
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from models.file_utils import FileWatcher
+from models.keyword_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def load_questions(filepath):
+    """
+    Lee las preguntas y respuestas del asistente desde un CSV con columnas 'question' y 'answer'.
+
+    Los campos van entre comillas y separados por ", ", por eso se ignoran los espacios tras la coma.
+
+    :param filepath: Ruta del CSV
+    :return: Diccionario pregunta -> respuesta en el orden del archivo
+    """
+    dataset = {}
+    with open(filepath, mode='r', encoding='utf-8') as file:
+        reader = csv.DictReader(file, skipinitialspace=True)
+        for row in reader:
+            if row.get('question') and row.get('answer') is not None:
+                dataset[row['question'].strip()] = row['answer'].strip()
+    return dataset
+
+
+def ngram_analyzer(ngram_range=(2, 4)):
+    """
+    Función que separa un texto normalizado en n-gramas de caracteres dentro de cada palabra.
+
+    :param ngram_range: Tamaños mínimo y máximo de los n-gramas
+    :return: Función texto -> lista de n-gramas
+    """
+    return TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range).build_analyzer()
+
+
+class NgramSearch:
+    """
+    Búsqueda aproximada por TF-IDF de n-gramas de caracteres sobre matrices CSR.
+
+    Las subclases definen ``row_indptr``/``row_indices``/``row_data`` (pregunta -> n-gramas, filas
+    normalizadas L2), ``post_indptr``/``post_indices``/``post_data`` (n-grama -> preguntas), ``idf``,
+    ``analyzer``, ``threshold``, ``max_postings`` y ``candidates``, además de ``_column``,
+    ``_exact_position``, ``answer_at`` y ``__len__``.
+
+    Una consulta elige candidatos recorriendo solo las listas de sus n-gramas más raros, hasta
+    ``max_postings`` entradas, y calcula la similitud exacta de los ``candidates`` mejores. Los
+    n-gramas muy comunes pesan poco en TF-IDF y serían los más caros de recorrer.
+    """
+
+    def _query_vector(self, text):
+        counts, unknown = {}, {}
+        for gram in self.analyzer(text):
+            column = self._column(gram)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+            else:
+                unknown[gram] = unknown.get(gram, 0) + 1
+        if not counts:
+            return None, None
+        columns = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idf[columns]
+        # La norma incluye los n-gramas desconocidos con el idf máximo, para no inflar consultas con ruido
+        unknown_weights = np.fromiter(unknown.values(), dtype=np.float32, count=len(unknown)) * self.max_idf
+        norm = np.sqrt(np.dot(weights, weights) + np.dot(unknown_weights, unknown_weights))
+        return columns, weights / norm
+
+    def search(self, question):
+        """
+        Busca la pregunta más parecida.
+
+        :param question: Pregunta del usuario
+        :return: Tupla (posición, similitud) o None si el índice está vacío o no hay n-gramas comunes
+        """
+        text = normalize_text(question)
+        position = self._exact_position(text)
+        if position is not None:
+            return position, 1.0
+        if not len(self) or not text:
+            return None
+        columns, weights = self._query_vector(text)
+        if columns is None:
+            return None
+        # Candidatos a partir de los n-gramas más raros (siempre al menos uno)
+        indptr = self.post_indptr
+        frequency = indptr[columns + 1] - indptr[columns]
+        order = np.argsort(frequency, kind='stable')
+        total = np.cumsum(frequency[order])
+        selected = order[:max(1, int(np.searchsorted(total, self.max_postings, side='right')))]
+        starts, ends = indptr[columns[selected]], indptr[columns[selected] + 1]
+        rows = np.concatenate([self.post_indices[s:e] for s, e in zip(starts, ends)])
+        values = np.concatenate([self.post_data[s:e] * w for s, e, w in zip(starts, ends, weights[selected])])
+        rows, inverse = np.unique(rows, return_inverse=True)
+        partial = np.bincount(inverse, weights=values)
+        if len(selected) < len(columns):
+            if len(rows) > self.candidates:
+                rows = rows[np.argpartition(-partial, self.candidates)[:self.candidates]]
+            scores = self._exact_scores(rows, columns, weights)
+        else:
+            scores = partial
+        best = int(np.argmax(scores))
+        return int(rows[best]), float(scores[best])
+
+    def _exact_scores(self, rows, columns, weights):
+        order = np.argsort(columns)
+        columns, weights = columns[order], weights[order]
+        starts, ends = self.row_indptr[rows], self.row_indptr[rows + 1]
+        indices = np.concatenate([self.row_indices[s:e] for s, e in zip(starts, ends)])
+        data = np.concatenate([self.row_data[s:e] for s, e in zip(starts, ends)])
+        positions = np.minimum(np.searchsorted(columns, indices), len(columns) - 1)
+        contributions = np.where(columns[positions] == indices, data * weights[positions], 0.0)
+        owners = np.repeat(np.arange(len(rows)), ends - starts)
+        return np.bincount(owners, weights=contributions, minlength=len(rows))
+
+    def answer(self, question):
+        """
+        Devuelve la respuesta de la pregunta más parecida si supera el umbral de confianza.
+
+        :param question: Pregunta del usuario
+        :return: Tupla (respuesta, similitud) o None
+        """
+        match = self.search(question)
+        if match is None or match[1] < self.threshold:
+            return None
+        position, score = match
+        return self.answer_at(position), score
+
+
+class ChatbotIndex(NgramSearch):
+    def __init__(self, questions, answers, threshold=0.5, ngram_range=(2, 4), max_postings=5000, candidates=32):
+        """
+        Índice en memoria de búsqueda aproximada de preguntas con TF-IDF de n-gramas de caracteres.
+
+        Las preguntas se normalizan (minúsculas, sin tildes ni puntuación) y se vectorizan una sola
+        vez al construir el índice. Además de la matriz por pregunta se guarda su transpuesta
+        (n-grama -> preguntas) para elegir candidatos (ver ``NgramSearch``).
+
+        :param questions: Secuencia de preguntas
+        :param answers: Secuencia de respuestas en el mismo orden
+        :param threshold: Similitud coseno mínima para aceptar una coincidencia
+        :param ngram_range: Tamaños mínimo y máximo de los n-gramas
+        :param max_postings: Entradas máximas recorridas para elegir candidatos
+        :param candidates: Número de candidatos con similitud exacta
+        """
+        self.questions = list(questions)
+        self.answers = list(answers)
+        if len(self.questions) != len(self.answers):
+            raise ValueError("Las preguntas y respuestas deben tener el mismo largo")
+        self.threshold = threshold
+        self.ngram_range = ngram_range
+        self.max_postings = max_postings
+        self.candidates = candidates
+        self.normalized = [normalize_text(question) for question in self.questions]
+        # Coincidencias exactas tras normalizar; si hay duplicados gana la última, como en el diccionario original
+        self.exact = {text: i for i, text in enumerate(self.normalized)}
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range, dtype=np.float32)
+        self.analyzer = ngram_analyzer(ngram_range)
+        if self.questions:
+            self.matrix = self.vectorizer.fit_transform(self.normalized).tocsr()
+            self.matrix.sort_indices()
+            self.postings = self.matrix.T.tocsr()
+            self.vocabulary = self.vectorizer.vocabulary_
+            self.idf = self.vectorizer.idf_.astype(np.float32)
+            self.max_idf = self.idf.max()
+            self.row_indptr, self.row_indices, self.row_data = (self.matrix.indptr, self.matrix.indices,
+                                                                self.matrix.data)
+            self.post_indptr, self.post_indices, self.post_data = (self.postings.indptr, self.postings.indices,
+                                                                   self.postings.data)
+        else:
+            self.matrix = self.postings = None
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def nbytes(self):
+        """
+        Tamaño aproximado en bytes de las matrices de n-gramas.
+        """
+        if self.postings is None:
+            return 0
+        return sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in (self.matrix, self.postings))
+
+    def _column(self, gram):
+        return self.vocabulary.get(gram)
+
+    def _exact_position(self, text):
+        return self.exact.get(text)
+
+    def answer_at(self, position):
+        return self.answers[position]
+
+    @classmethod
+    def from_csv(cls, filepath, threshold=0.5):
+        """
+        Construye el índice a partir del CSV del asistente.
+
+        :param filepath: Ruta del CSV
+        :param threshold: Similitud coseno mínima para aceptar una coincidencia
+        :return: ChatbotIndex
+        """
+        dataset = load_questions(filepath)
+        return cls(dataset.keys(), dataset.values(), threshold=threshold)
+
+
+class ChatbotIndexLoader:
+    def __init__(self, path, threshold=0.5, check_interval=5, builder=None, watch=()):
+        """
+        Mantiene el índice del chatbot y lo reconstruye cuando cambia su archivo (el CSV o el almacén
+        compilado) o alguno de los archivos de ``watch``, sin reiniciar el proceso.
+
+        El índice nuevo se construye en un hilo aparte mientras las consultas siguen usando el
+        anterior, y se publica con una sola asignación. Si el archivo no se puede leer o queda vacío,
+        se conserva el índice anterior.
+
+        :param path: Ruta del CSV del asistente o del almacén compilado
+        :param threshold: Similitud coseno mínima para aceptar una coincidencia
+        :param check_interval: Segundos mínimos entre comprobaciones de cambios del archivo
+        :param builder: Función ``(path, threshold) -> índice``; por defecto ``ChatbotIndex.from_csv``
+        :param watch: Otras rutas cuyos cambios también reconstruyen el índice
+        """
+        self.path = path
+        self.threshold = threshold
+        self.builder = builder or ChatbotIndex.from_csv
+        self._index = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher = FileWatcher((path, *watch), check_interval)
+        self._reload_thread = None
+        self.last_reload = None
+
+    def reload(self):
+        """
+        Reconstruye el índice desde el CSV y lo publica si la lectura fue correcta.
+
+        :return: Diccionario con el número de preguntas, el tamaño del índice y los segundos empleados
+        """
+        with self._reload_lock:
+            identity = self._watcher.identity()
+            start = time.perf_counter()
+            try:
+                index = self.builder(self.path, threshold=self.threshold)
+                if not len(index):
+                    raise ValueError(f"El archivo {self.path} no contiene preguntas")
+            except Exception:
+                # El archivo queda registrado para no reintentar hasta que vuelva a cambiar
+                self._watcher.loaded = identity
+                logger.exception("No se pudo recargar el índice del chatbot desde %s; se conserva el anterior",
+                                 self.path)
+                raise
+            self._index, self._watcher.loaded = index, identity
+            self.last_reload = {
+                'questions': len(index),
+                'nbytes': index.nbytes,
+                'seconds': time.perf_counter() - start,
+            }
+            logger.info("Índice del chatbot recargado en %.3fs: %d preguntas, %.1f MB", self.last_reload['seconds'],
+                        len(index), index.nbytes / 1e6)
+            return self.last_reload
+
+    def _watch_reload(self):
+        try:
+            self.reload()
+        except Exception:
+            pass
+
+    def _start_reload(self):
+        running = self._reload_thread is not None and self._reload_thread.is_alive()
+        if not running and self._watcher.changed():
+            self._reload_thread = threading.Thread(target=self._watch_reload, daemon=True)
+            self._reload_thread.start()
+
+    def current(self):
+        """
+        Devuelve el índice vigente. La primera llamada lo construye; las siguientes, si el archivo
+        cambió, inician la reconstrucción en segundo plano y devuelven el índice anterior.
+
+        :return: ChatbotIndex
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self.reload()
+        self._watcher.poll(self._start_reload)
+        return self._index
@@ -0,0 +1,237 @@
+import logging
+import os
+import zlib
+import numpy as np
+from models.chatbot_index import ChatbotIndex, NgramSearch, load_questions, ngram_analyzer
+from models.file_utils import atomic_write
+from models.keyword_index import normalize_text
+
+MAGIC = b'MNCB'
+FORMAT_VERSION = 1
+HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('n_questions', '<u8'), ('n_grams', '<u8'),
+                   ('table_size', '<u8'), ('ngram_min', '<u4'), ('ngram_max', '<u4'), ('max_idf', '<f4'),
+                   ('pad', '<u4')])
+EMPTY_SLOT = -1
+
+logger = logging.getLogger(__name__)
+
+
+def _pad(size):
+    return -size % 8
+
+
+def _encode_strings(strings):
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return offsets, b''.join(encoded)
+
+
+def _hash_table(grams):
+    # Tabla de direccionamiento abierto (sondeo lineal) con el doble de espacios que n-gramas
+    size = 1 << max(1, int(2 * len(grams) - 1).bit_length())
+    hashes = np.zeros(size, dtype=np.uint32)
+    columns = np.full(size, EMPTY_SLOT, dtype=np.int32)
+    mask = size - 1
+    for column, gram in enumerate(grams):
+        value = zlib.crc32(gram.encode('utf-8'))
+        slot = value & mask
+        while columns[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        hashes[slot], columns[slot] = value, column
+    return hashes, columns
+
+
+def write_chatbot_store(path, dataset, ngram_range=(2, 4)):
+    """
+    Compila preguntas y respuestas en un archivo binario de solo lectura y lo publica de forma atómica.
+
+    Formato (little-endian, secciones alineadas a 8 bytes): encabezado; claves normalizadas
+    ordenadas (offsets uint64 + texto UTF-8); respuestas en el orden de las claves (offsets +
+    texto); n-gramas del vocabulario (offsets + texto), su idf (float32) y una tabla hash
+    crc32 -> columna; matriz CSR pregunta -> n-gramas y su transpuesta n-grama -> preguntas.
+
+    :param path: Ruta del archivo de destino
+    :param dataset: Diccionario pregunta -> respuesta (ver ``load_questions``)
+    :param ngram_range: Tamaños mínimo y máximo de los n-gramas
+    :return: Número de preguntas escritas
+    """
+    # Una sola entrada por clave normalizada (gana la última, como en el diccionario original)
+    entries = {}
+    for question, answer in dataset.items():
+        entries[normalize_text(question)] = answer
+    entries.pop('', None)
+    keys = sorted(entries)
+    answers = [entries[key] for key in keys]
+    index = ChatbotIndex(keys, answers, ngram_range=ngram_range)
+
+    if len(index):
+        grams = [None] * len(index.vocabulary)
+        for gram, column in index.vocabulary.items():
+            grams[column] = gram
+        matrices = (index.matrix, index.postings)
+        idf, max_idf = index.idf, index.max_idf
+    else:
+        grams, idf, max_idf = [], np.zeros(0, dtype=np.float32), 0.0
+        empty = (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+        matrices = None
+    table_hashes, table_columns = _hash_table(grams)
+
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, FORMAT_VERSION, len(keys), len(grams), len(table_hashes), ngram_range[0], ngram_range[1],
+                 max_idf, 0)
+    sections = [header.tobytes()]
+    for strings in (keys, answers, grams):
+        offsets, blob = _encode_strings(strings)
+        sections += [offsets.tobytes(), blob + b'\0' * _pad(len(blob))]
+    sections += [idf.astype(np.float32).tobytes(), b'\0' * _pad(idf.nbytes),
+                 table_hashes.tobytes(), b'\0' * _pad(table_hashes.nbytes),
+                 table_columns.tobytes(), b'\0' * _pad(table_columns.nbytes)]
+    for matrix in (matrices or (None, None)):
+        arrays = empty if matrix is None else (matrix.indptr, matrix.indices, matrix.data)
+        indptr, indices, data = arrays
+        for array in (indptr.astype(np.int64), indices.astype(np.int32), data.astype(np.float32)):
+            sections += [array.tobytes(), b'\0' * _pad(array.nbytes)]
+
+    with atomic_write(path, prefix='.chatbot-') as file:
+        for section in sections:
+            file.write(section)
+    return len(keys)
+
+
+def build_chatbot_store(csv_path, path, ngram_range=(2, 4)):
+    """
+    Compila el CSV del asistente en un almacén binario.
+
+    :param csv_path: Ruta del CSV con columnas 'question' y 'answer'
+    :param path: Ruta del archivo de destino
+    :param ngram_range: Tamaños mínimo y máximo de los n-gramas
+    :return: Número de preguntas escritas
+    """
+    return write_chatbot_store(path, load_questions(csv_path), ngram_range=ngram_range)
+
+
+def open_chatbot_index(path, csv_path, threshold=0.5):
+    """
+    Abre el almacén compilado si está al día con el CSV del asistente; si no existe o el CSV se
+    modificó después de compilarlo, construye el índice desde el CSV para no servir respuestas viejas.
+
+    :param path: Ruta del almacén compilado
+    :param csv_path: Ruta del CSV del que se compiló el almacén
+    :param threshold: Similitud coseno mínima para aceptar una coincidencia
+    :return: ChatbotStore o ChatbotIndex
+    """
+    try:
+        store_mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return ChatbotIndex.from_csv(csv_path, threshold=threshold)
+    try:
+        csv_mtime = os.stat(csv_path).st_mtime_ns
+    except FileNotFoundError:
+        csv_mtime = None
+    if csv_mtime is not None and csv_mtime > store_mtime:
+        logger.warning("%s es más reciente que %s; se usa el CSV hasta recompilar el almacén", csv_path, path)
+        return ChatbotIndex.from_csv(csv_path, threshold=threshold)
+    return ChatbotStore(path, threshold=threshold)
+
+
+class ChatbotStore(NgramSearch):
+    def __init__(self, path, threshold=0.5, max_postings=5000, candidates=32):
+        """
+        Índice del chatbot leído desde un archivo de ``write_chatbot_store`` mapeado en memoria.
+
+        Abrirlo no lee el CSV ni construye estructuras de Python: todos los workers comparten las
+        páginas del archivo. Las coincidencias exactas se buscan con búsqueda binaria sobre las
+        claves ordenadas y los n-gramas de la consulta con la tabla hash.
+
+        :param path: Ruta del archivo
+        :param threshold: Similitud coseno mínima para aceptar una coincidencia
+        :param max_postings: Entradas máximas recorridas para elegir candidatos
+        :param candidates: Número de candidatos con similitud exacta
+        """
+        self.path = path
+        self.threshold = threshold
+        self.max_postings = max_postings
+        self.candidates = candidates
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        header = data[:HEADER.itemsize].view(HEADER)[0]
+        if header['magic'] != MAGIC or header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Archivo del chatbot inválido: {path}")
+        self._data = data
+        self._offset = HEADER.itemsize
+        n_questions, n_grams = int(header['n_questions']), int(header['n_grams'])
+        self.key_offsets, self.key_blob = self._strings(n_questions)
+        self.answer_offsets, self.answer_blob = self._strings(n_questions)
+        self.gram_offsets, self.gram_blob = self._strings(n_grams)
+        self.idf = self._array(np.float32, n_grams)
+        self.max_idf = np.float32(header['max_idf'])
+        self.table_hashes = self._array(np.uint32, int(header['table_size']))
+        self.table_columns = self._array(np.int32, int(header['table_size']))
+        self.row_indptr, self.row_indices, self.row_data = self._csr(n_questions)
+        self.post_indptr, self.post_indices, self.post_data = self._csr(n_grams)
+        self._mask = int(header['table_size']) - 1
+        self.ngram_range = (int(header['ngram_min']), int(header['ngram_max']))
+        self.analyzer = ngram_analyzer(self.ngram_range)
+
+    def _array(self, dtype, count):
+        size = np.dtype(dtype).itemsize * count
+        array = self._data[self._offset:self._offset + size].view(dtype)
+        self._offset += size + _pad(size)
+        return array
+
+    def _strings(self, count):
+        offsets = self._array(np.uint64, count + 1)
+        size = int(offsets[-1])
+        blob = self._data[self._offset:self._offset + size]
+        self._offset += size + _pad(size)
+        return offsets, blob
+
+    def _csr(self, rows):
+        indptr = self._array(np.int64, rows + 1)
+        nnz = int(indptr[-1])
+        return indptr, self._array(np.int32, nnz), self._array(np.float32, nnz)
+
+    def __len__(self):
+        return len(self.key_offsets) - 1
+
+    @property
+    def nbytes(self):
+        """
+        Tamaño del archivo mapeado en bytes.
+        """
+        return int(self._data.nbytes)
+
+    @staticmethod
+    def _string(offsets, blob, position):
+        return bytes(blob[int(offsets[position]):int(offsets[position + 1])])
+
+    def key_at(self, position):
+        return self._string(self.key_offsets, self.key_blob, position).decode('utf-8')
+
+    def answer_at(self, position):
+        return self._string(self.answer_offsets, self.answer_blob, position).decode('utf-8')
+
+    def _exact_position(self, text):
+        target = text.encode('utf-8')
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._string(self.key_offsets, self.key_blob, middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._string(self.key_offsets, self.key_blob, low) == target:
+            return low
+        return None
+
+    def _column(self, gram):
+        encoded = gram.encode('utf-8')
+        value = zlib.crc32(encoded)
+        slot = value & self._mask
+        while True:
+            column = int(self.table_columns[slot])
+            if column == EMPTY_SLOT:
+                return None
+            if self.table_hashes[slot] == value and self._string(self.gram_offsets, self.gram_blob, column) == encoded:
+                return column
+            slot = (slot + 1) & self._mask
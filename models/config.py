@@ -0,0 +1,5 @@
+import os
+
+# URL base del backend de Django, compartida por los modelos y los endpoints del API
+# (reemplazar con la URL real o definir DJANGO_API_BASE_URL)
+DJANGO_API_BASE_URL = os.environ.get('DJANGO_API_BASE_URL', 'http://<django-backend-url>')
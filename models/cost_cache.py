@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class ProductCostCache:
+    def __init__(self, maxsize=10000, ttl=300, stale_ttl=24 * 3600, refresh_workers=4):
+        """
+        Caché LRU de registros de costo de productos con política stale-while-revalidate.
+
+        Una entrada con menos de ``ttl`` segundos se sirve directamente. Entre ``ttl`` y
+        ``ttl + stale_ttl`` se sirve de inmediato la copia vieja y se programa una actualización
+        en segundo plano. Los fallos simultáneos de la misma clave comparten una sola consulta.
+
+        :param maxsize: Número máximo de registros guardados
+        :param ttl: Segundos que un registro se considera vigente
+        :param stale_ttl: Segundos adicionales en los que un registro vencido aún puede servirse
+        :param refresh_workers: Hilos disponibles para las actualizaciones en segundo plano
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='cost-refresh')
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        """
+        Devuelve el registro de costo de una clave, consultándolo con ``loader`` si hace falta.
+
+        :param key: Clave del registro (URL base del API, ID del producto)
+        :param loader: Función sin argumentos que obtiene el registro desde el backend
+        :return: Copia del registro de costo
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[0] if entry is not None else None
+            if entry is not None and age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None and age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._inflight[key] = Future()
+                    self._executor.submit(self._refresh, key, loader)
+                return dict(entry[1])
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+                leader = True
+        if leader:
+            self._load(key, loader, future)
+        return dict(future.result())
+
+    def _load(self, key, loader, future):
+        try:
+            record = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        self.put(key, record)
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(record)
+
+    def _refresh(self, key, loader):
+        with self._lock:
+            future = self._inflight.get(key)
+        self._load(key, loader, future)
+        with self._lock:
+            if future.exception() is None:
+                self.refreshes += 1
+            else:
+                # Se conserva la copia vieja; el siguiente acceso volverá a intentarlo
+                self.refresh_errors += 1
+
+    def put(self, key, record):
+        """
+        Guarda un registro, descartando el menos usado si se supera ``maxsize``.
+
+        :param key: Clave del registro (URL base del API, ID del producto)
+        :param record: Diccionario con los campos de costo
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(record))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Elimina un registro de la caché.
+
+        :param key: Clave del registro (URL base del API, ID del producto)
+        :return: True si el registro estaba guardado
+        """
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Devuelve los contadores de la caché.
+
+        :return: Diccionario con tamaño, aciertos, aciertos vencidos, fallos y tasa de aciertos
+        """
+        with self._lock:
+            total = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.stale_hits) / total if total else 0.0,
+            }
+
+
+# Caché compartida por todos los calculadores de precios
+product_cost_cache = ProductCostCache()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, prefix='.tmp-', suffix=''):
+    """
+    Escribe un archivo y lo publica de forma atómica.
+
+    Se escribe primero en un temporal del mismo directorio; al salir sin errores se sincroniza con el
+    disco y reemplaza a ``path`` con ``os.replace``, de modo que los lectores nunca ven un archivo a
+    medias. Si hay un error el temporal se elimina y ``path`` no cambia.
+
+    :param path: Ruta del archivo de destino
+    :param prefix: Prefijo del archivo temporal
+    :param suffix: Sufijo del archivo temporal
+    :return: Archivo binario abierto para escritura
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_identity(path):
+    """
+    Identifica la versión de un archivo sin leerlo.
+
+    :param path: Ruta del archivo
+    :return: Tupla (inodo, mtime en ns, tamaño) o None si el archivo no existe
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    def __init__(self, paths, check_interval=5):
+        """
+        Comprueba cada ``check_interval`` segundos como máximo si cambiaron unos archivos.
+
+        Los lectores que recargan algo derivado de un archivo registran en ``loaded`` la identidad
+        que cargaron; ``changed`` la compara con la actual.
+
+        :param paths: Rutas vigiladas
+        :param check_interval: Segundos mínimos entre comprobaciones
+        """
+        self.paths = tuple(paths)
+        self.check_interval = check_interval
+        self.loaded = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def identity(self):
+        """
+        Lee la identidad actual de los archivos vigilados.
+
+        :return: Tupla con la identidad de cada archivo (ver ``file_identity``)
+        """
+        return tuple(file_identity(path) for path in self.paths)
+
+    def changed(self):
+        """
+        :return: True si algún archivo cambió desde la identidad registrada en ``loaded``
+        """
+        return self.identity() != self.loaded
+
+    def poll(self, check, force=False):
+        """
+        Llama a ``check`` si pasaron ``check_interval`` segundos desde la última vez (o si ``force``).
+
+        Si varios hilos llegan a la vez, solo uno comprueba; los demás esperan el candado y no la repiten.
+
+        :param check: Función sin argumentos que compara y recarga
+        :param force: Si es True, comprueba sin importar el intervalo
+        """
+        now = time.monotonic()
+        if force or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if force or now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    check()
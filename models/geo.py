@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+from geopy.distance import geodesic
+from sklearn.neighbors import BallTree
+
+# Radio medio de la Tierra (IUGG) en kilómetros
+EARTH_RADIUS_KM = 6371.0088
+
+# Tamaños de celda de la grilla geográfica en grados, de la más gruesa a la más fina; cada nivel
+# divide la celda anterior en 10 x 10
+GRID_RESOLUTIONS = (1.0, 0.1, 0.01, 0.001)
+
+
+def haversine_km(origin, latitudes, longitudes):
+    """
+    Calcula en lote la distancia de círculo máximo desde un origen hasta muchos puntos.
+
+    :param origin: Tupla (latitud, longitud) del origen en grados
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :return: Arreglo de distancias en kilómetros
+    """
+    lat1, lon1 = np.radians(origin[0]), np.radians(origin[1])
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def geodesic_km(origin, latitudes, longitudes):
+    """
+    Calcula la distancia geodésica exacta (elipsoide WGS-84) punto por punto.
+
+    Es mucho más lenta que ``haversine_km``; se usa solo para refinar pocos resultados.
+
+    :param origin: Tupla (latitud, longitud) del origen en grados
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :return: Arreglo de distancias en kilómetros
+    """
+    return np.array([geodesic(origin, (lat, lon)).kilometers for lat, lon in zip(latitudes, longitudes)],
+                    dtype=np.float64)
+
+
+def distances_km(origin, latitudes, longitudes, mode='haversine'):
+    """
+    Calcula distancias desde un origen con el modo indicado.
+
+    :param origin: Tupla (latitud, longitud) del origen en grados
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :param mode: 'haversine' (vectorizado, para ranking) o 'geodesic' (exacto)
+    :return: Arreglo de distancias en kilómetros
+    """
+    if mode == 'haversine':
+        return haversine_km(origin, latitudes, longitudes)
+    if mode == 'geodesic':
+        return geodesic_km(origin, latitudes, longitudes)
+    raise ValueError(f"Modo de distancia no soportado: {mode}")
+
+
+class SpatialIndex:
+    def __init__(self, latitudes, longitudes, leaf_size=40):
+        """
+        Índice espacial (BallTree con métrica haversine) sobre coordenadas de productos.
+
+        Las filas con coordenadas faltantes no se indexan y nunca aparecen como candidatas.
+
+        :param latitudes: Arreglo de latitudes en grados
+        :param longitudes: Arreglo de longitudes en grados
+        :param leaf_size: Tamaño de hoja del árbol
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = valid_locations(latitudes, longitudes)
+        # Posiciones originales de las filas indexadas
+        self.positions = np.flatnonzero(valid)
+        self.tree = None
+        if len(self.positions):
+            coordinates = np.radians(np.column_stack([latitudes[valid], longitudes[valid]]))
+            self.tree = BallTree(coordinates, metric='haversine', leaf_size=leaf_size)
+
+    def __len__(self):
+        return len(self.positions)
+
+    @classmethod
+    def from_products(cls, products_df):
+        """
+        Construye el índice a partir del DataFrame devuelto por ``Recommender.get_product_data``.
+
+        :param products_df: DataFrame con columnas 'latitude' y 'longitude'
+        :return: SpatialIndex
+        """
+        return cls(products_df['latitude'].to_numpy(dtype=np.float64),
+                   products_df['longitude'].to_numpy(dtype=np.float64))
+
+    def query_radius(self, origin, max_distance_km):
+        """
+        Devuelve las posiciones de las filas dentro del radio indicado, en orden ascendente.
+
+        :param origin: Tupla (latitud, longitud) del origen en grados
+        :param max_distance_km: Radio máximo en kilómetros
+        :return: Arreglo de posiciones (enteros) dentro del catálogo original
+        """
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64)
+        point = np.radians([[origin[0], origin[1]]])
+        found = self.tree.query_radius(point, r=max_distance_km / EARTH_RADIUS_KM)[0]
+        return np.sort(self.positions[found]).astype(np.int64)
+
+
+def _cells_per_degree(resolution):
+    if resolution not in GRID_RESOLUTIONS:
+        raise ValueError(f"Resolución de grilla no soportada: {resolution}")
+    return round(1 / resolution)
+
+
+def grid_indices(latitudes, longitudes, resolution):
+    """
+    Calcula la fila y columna de la celda de la grilla que contiene cada coordenada.
+
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :param resolution: Tamaño de la celda en grados (uno de ``GRID_RESOLUTIONS``)
+    :return: Tupla de arreglos int64 (floor(latitud / resolución), floor(longitud / resolución))
+    """
+    factor = _cells_per_degree(GRID_RESOLUTIONS[-1]) // _cells_per_degree(resolution)
+    # Se calcula la celda más fina y se divide, así cada celda está contenida en la del nivel anterior.
+    # El margen de 1e-5 grados evita que 12.34 guardado en float32 como 12.339999... caiga en la celda
+    # anterior (el error de float32 en longitudes de ~86 grados es de ~4e-6 grados)
+    finest = _cells_per_degree(GRID_RESOLUTIONS[-1])
+    lat_cells = np.floor((np.asarray(latitudes, dtype=np.float64) + 1e-5) * finest).astype(np.int64) // factor
+    lon_cells = np.floor((np.asarray(longitudes, dtype=np.float64) + 1e-5) * finest).astype(np.int64) // factor
+    return lat_cells, lon_cells
+
+
+def cell_ids_from_indices(lat_cells, lon_cells, resolution):
+    """
+    Combina fila y columna de la grilla en un ID entero único por celda.
+
+    El ID es ``fila * columnas + columna`` contando desde (-90, -180); la longitud da la vuelta en 180.
+
+    :param lat_cells: Arreglo de filas (ver ``grid_indices``)
+    :param lon_cells: Arreglo de columnas
+    :param resolution: Tamaño de la celda en grados
+    :return: Arreglo int64 de IDs de celda
+    """
+    per_degree = _cells_per_degree(resolution)
+    rows = np.clip(np.asarray(lat_cells, dtype=np.int64) + 90 * per_degree, 0, 180 * per_degree - 1)
+    columns = (np.asarray(lon_cells, dtype=np.int64) + 180 * per_degree) % (360 * per_degree)
+    return rows * (360 * per_degree) + columns
+
+
+def grid_cell_ids(latitudes, longitudes, resolution):
+    """
+    Calcula el ID de la celda de la grilla que contiene cada coordenada.
+
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :param resolution: Tamaño de la celda en grados (uno de ``GRID_RESOLUTIONS``)
+    :return: Arreglo int64 de IDs de celda
+    """
+    return cell_ids_from_indices(*grid_indices(latitudes, longitudes, resolution), resolution)
+
+
+def coarsen_cells(cell_ids, resolution, target):
+    """
+    Convierte IDs de celda a la celda que los contiene en una resolución más gruesa.
+
+    :param cell_ids: Arreglo de IDs en ``resolution``
+    :param resolution: Tamaño de celda de los IDs en grados
+    :param target: Tamaño de celda buscado, igual o mayor que ``resolution``
+    :return: Arreglo int64 de IDs en ``target``
+    """
+    per_degree, target_per_degree = _cells_per_degree(resolution), _cells_per_degree(target)
+    if target_per_degree > per_degree:
+        raise ValueError(f"No se puede pasar de celdas de {resolution} a celdas más finas de {target}")
+    factor = per_degree // target_per_degree
+    rows, columns = np.divmod(np.asarray(cell_ids, dtype=np.int64), 360 * per_degree)
+    return (rows // factor) * (360 * target_per_degree) + columns // factor
+
+
+def cell_centers(cell_ids, resolution):
+    """
+    Devuelve el centro de cada celda.
+
+    :param cell_ids: Arreglo de IDs de celda
+    :param resolution: Tamaño de celda de los IDs en grados
+    :return: Tupla de arreglos (latitudes, longitudes) en grados
+    """
+    per_degree = _cells_per_degree(resolution)
+    rows, columns = np.divmod(np.asarray(cell_ids, dtype=np.int64), 360 * per_degree)
+    # Redondeo para que el centro de 12.13-12.14 sea 12.135 y no 12.135000000000005
+    return np.round((rows + 0.5) / per_degree - 90, 6), np.round((columns + 0.5) / per_degree - 180, 6)
+
+
+def bin_cells(cell_ids, weights, resolution, max_cells=None):
+    """
+    Suma pesos por celda y, si quedan más de ``max_cells`` celdas, sube a la resolución más gruesa
+    que entre en el límite (o a la más gruesa de todas).
+
+    Al subir de nivel solo se reagrupan las sumas ya calculadas, no los puntos originales.
+
+    :param cell_ids: Arreglo de IDs de celda (pueden repetirse)
+    :param weights: Arreglo de pesos del mismo largo
+    :param resolution: Tamaño de celda de los IDs en grados
+    :param max_cells: Número máximo de celdas en el resultado (opcional)
+    :return: Tupla (IDs ordenados, sumas, resolución usada)
+    """
+    codes, cells = pd.factorize(np.asarray(cell_ids, dtype=np.int64))
+    totals = np.bincount(codes, weights=np.asarray(weights, dtype=np.float64), minlength=len(cells))
+    coarser = [level for level in GRID_RESOLUTIONS if level > resolution]
+    while max_cells is not None and len(cells) > max_cells and coarser:
+        target = coarser.pop()
+        codes, parents = pd.factorize(coarsen_cells(cells, resolution, target))
+        cells, totals, resolution = parents, np.bincount(codes, weights=totals, minlength=len(parents)), target
+    order = np.argsort(cells, kind='stable')
+    return np.asarray(cells)[order], totals[order], resolution
+
+
+def valid_locations(latitudes, longitudes):
+    """
+    Marca los puntos con ambas coordenadas finitas; los demás (p. ej. NaN por falta de ubicación)
+    no tienen celda en la grilla.
+
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :return: Arreglo booleano
+    """
+    return np.isfinite(np.asarray(latitudes, dtype=np.float64)) & np.isfinite(np.asarray(longitudes, dtype=np.float64))
+
+
+def bin_locations(latitudes, longitudes, weights, resolution, max_cells=None):
+    """
+    Agrupa puntos ponderados en las celdas de la grilla; los puntos sin coordenadas se descartan.
+
+    El tamaño del resultado depende del área cubierta y de la resolución, no del número de puntos.
+
+    :param latitudes: Arreglo de latitudes en grados
+    :param longitudes: Arreglo de longitudes en grados
+    :param weights: Arreglo de pesos (p. ej. montos de venta)
+    :param resolution: Tamaño de la celda en grados (uno de ``GRID_RESOLUTIONS``)
+    :param max_cells: Número máximo de celdas en el resultado (ver ``bin_cells``)
+    :return: Tupla (IDs ordenados, sumas, resolución usada)
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    valid = valid_locations(latitudes, longitudes)
+    if not valid.all():
+        latitudes, longitudes, weights = latitudes[valid], longitudes[valid], weights[valid]
+    return bin_cells(grid_cell_ids(latitudes, longitudes, resolution), weights, resolution, max_cells)
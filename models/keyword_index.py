@@ -0,0 +1,81 @@
+import re
+import unicodedata
+import numpy as np
+
+_NON_WORD = re.compile(r'[^0-9a-zñ]+')
+
+
+def normalize_text(text):
+    """
+    Normaliza un texto en español: minúsculas, sin tildes y sin puntuación.
+
+    La ñ se conserva porque distingue palabras (año / ano).
+
+    :param text: Texto original
+    :return: Texto normalizado con los tokens separados por un espacio
+    """
+    text = str(text).lower().replace('ñ', '\0')
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text.replace('\0', 'ñ')).strip()
+
+
+def tokenize_interests(interests):
+    """
+    Normaliza y tokeniza una lista de intereses.
+
+    :param interests: Lista de intereses (pueden tener varias palabras)
+    :return: Tupla de tuplas de tokens, sin intereses vacíos ni repetidos
+    """
+    tokenized = (tuple(normalize_text(interest).split()) for interest in interests)
+    return tuple(dict.fromkeys(tokens for tokens in tokenized if tokens))
+
+
+class KeywordIndex:
+    def __init__(self, descriptions):
+        """
+        Índice invertido de tokens sobre las descripciones normalizadas del catálogo.
+
+        La normalización (minúsculas y sin tildes) se hace una sola vez al construir el índice.
+        Cada token apunta a las posiciones ordenadas de las filas que lo contienen.
+
+        :param descriptions: Secuencia de descripciones en el orden de las filas del catálogo
+        """
+        self.texts = [f' {normalize_text(d)} ' if d is not None else ' ' for d in descriptions]
+        postings = {}
+        for position, text in enumerate(self.texts):
+            for token in set(text.split()):
+                postings.setdefault(token, []).append(position)
+        self.postings = {token: np.array(rows, dtype=np.int64) for token, rows in postings.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def match(self, interests):
+        """
+        Devuelve las posiciones de las filas que mencionan alguno de los intereses.
+
+        Un interés de una palabra se resuelve con su lista de posiciones; uno de varias palabras
+        intersecta las listas de sus tokens y verifica la frase completa solo en esas filas.
+
+        :param interests: Lista de intereses o tupla ya tokenizada con ``tokenize_interests``
+        :return: Arreglo ordenado de posiciones
+        """
+        if not isinstance(interests, tuple):
+            interests = tokenize_interests(interests)
+        empty = np.empty(0, dtype=np.int64)
+        matches = []
+        for tokens in interests:
+            lists = [self.postings.get(token, empty) for token in tokens]
+            lists.sort(key=len)
+            rows = lists[0]
+            for other in lists[1:]:
+                if not len(rows):
+                    break
+                rows = np.intersect1d(rows, other, assume_unique=True)
+            if len(tokens) > 1 and len(rows):
+                phrase = f" {' '.join(tokens)} "
+                rows = np.array([row for row in rows if phrase in self.texts[row]], dtype=np.int64)
+            matches.append(rows)
+        if not matches:
+            return empty
+        return np.unique(np.concatenate(matches))
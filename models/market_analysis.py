@@ -1,100 +1,257 @@
+import hashlib
+import json
+import logging
+import numpy as np
 import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from models.market_charts import render_charts
+from models.geo import GRID_RESOLUTIONS, bin_locations, cell_centers
+from models.sales_aggregates import MissingSaleIdError, SalesStatistics, location_frame
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%Y-%m-%d'
+HOUR_FORMAT = '%H:%M:%S'
+# Ventas pedidas por página al backend; acota la memoria de cada análisis
+SALES_PAGE_SIZE = 10000
+# Tamaño de celda en grados (~1.1 km) y número máximo de celdas de las ventas por ubicación
+LOCATION_RESOLUTION = 0.01
+MAX_LOCATION_CELLS = 5000
+
+
+def parse_hours(hours):
+    """
+    Extrae la hora (0-23) de textos 'HH:MM:SS' sin pasar por fechas.
+
+    Si algún valor no tiene el formato fijo se usa ``pd.to_datetime`` con ``HOUR_FORMAT``.
+
+    :param hours: Serie de textos con la hora de la venta
+    :return: Arreglo int8 con la hora
+    """
+    # 'U8' recorta los textos más largos ('14:00:00.123'); esos no toman el camino rápido
+    if not (hours.str.len() == 8).all():
+        return pd.to_datetime(hours, format=HOUR_FORMAT).dt.hour.to_numpy().astype(np.int8)
+    codes = hours.to_numpy(dtype='U8').view(np.uint32).reshape(-1, 8)
+    digits = codes[:, [0, 1, 3, 4, 6, 7]] - ord('0')
+    values = (codes[:, 0] - ord('0')) * 10 + (codes[:, 1] - ord('0'))
+    if (len(codes) and (codes[:, 2] == ord(':')).all() and (codes[:, 5] == ord(':')).all()
+            and (digits <= 9).all() and (values <= 23).all()):
+        return values.astype(np.int8)
+    return pd.to_datetime(hours, format=HOUR_FORMAT).dt.hour.to_numpy().astype(np.int8)
+
+
+def statistics_to_dict(daily_sales, hourly_sales, location_sales):
+    """
+    Convierte las estadísticas de ventas en estructuras serializables a JSON.
+
+    :param daily_sales: Serie con ventas diarias
+    :param hourly_sales: Serie con ventas por hora
+    :param location_sales: DataFrame con ventas por ubicación
+    :return: Diccionario con las listas 'daily_sales', 'hourly_sales' y 'location_sales'
+    """
+    return {
+        'daily_sales': [{'date': str(date), 'sales_amount': float(amount)} for date, amount in daily_sales.items()],
+        'hourly_sales': [{'hour': int(hour), 'sales_amount': float(amount)} for hour, amount in hourly_sales.items()],
+        'location_sales': [
+            {'buyer_latitude': float(lat), 'buyer_longitude': float(lon), 'sales_amount': float(amount)}
+            for lat, lon, amount in zip(location_sales['buyer_latitude'], location_sales['buyer_longitude'],
+                                        location_sales['sales_amount'])
+        ],
+    }
+
+
+def statistics_version(statistics):
+    """
+    Huella del contenido de las estadísticas; cambia solo si cambian los datos.
+
+    :param statistics: Diccionario de ``statistics_to_dict``
+    :return: Cadena hexadecimal
+    """
+    payload = json.dumps(statistics, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
 
 class MarketAnalysis:
-    def __init__(self, api_url):
+    def __init__(self, api_url, aggregate_store=None, page_size=SALES_PAGE_SIZE,
+                 location_resolution=LOCATION_RESOLUTION, max_location_cells=MAX_LOCATION_CELLS):
         """
         Inicializa el análisis de mercado con la URL del API.
 
         :param api_url: URL del API de Django
+        :param aggregate_store: ``SalesAggregateStore`` opcional; si se indica, cada análisis solo
+            descarga y suma las ventas nuevas desde el último análisis del vendedor
+        :param page_size: Ventas pedidas por página al backend
+        :param location_resolution: Tamaño de celda en grados para agrupar las ventas por ubicación
+            (uno de ``GRID_RESOLUTIONS``); None agrupa por coordenadas exactas y no admite ``aggregate_store``
+        :param max_location_cells: Si hay más celdas, se usa una resolución más gruesa
         """
+        if location_resolution is not None and location_resolution not in GRID_RESOLUTIONS:
+            raise ValueError(f"Resolución de ubicación no soportada: {location_resolution}")
+        if location_resolution is None and aggregate_store is not None:
+            # El almacén solo guarda celdas de la grilla, no coordenadas exactas
+            raise ValueError("El almacén de agregados no admite location_resolution=None (coordenadas exactas)")
         self.api_url = api_url
+        self.aggregate_store = aggregate_store
+        self.page_size = page_size
+        self.location_resolution = location_resolution
+        self.max_location_cells = max_location_cells
 
-    def fetch_data(self, user_id):
+    def fetch_pages(self, user_id, after_id=None):
+        """
+        Descarga las ventas del usuario página por página siguiendo la paginación del backend.
+
+        Acepta respuestas paginadas al estilo de Django REST Framework (``results`` y ``next``) y
+        también una lista simple, que se trata como una única página.
+
+        :param user_id: ID del usuario; None pide las ventas de todos los vendedores
+        :param after_id: Si se indica, solo se piden las ventas con ID mayor
+        :return: Generador de DataFrames con las ventas de cada página
+        """
+        # Las ventas se piden por ID ascendente: el cursor de los agregados depende de ese orden
+        params = {'page_size': self.page_size, 'ordering': 'id'}
+        if user_id is not None:
+            params['user_id'] = user_id
+        if after_id is not None:
+            params['after_id'] = after_id
+        url = f"{self.api_url}/sales/"
+        with requests.Session() as session:
+            while url:
+                response = session.get(url, params=params)
+                response.raise_for_status()
+                data = response.json()
+                if isinstance(data, dict):
+                    # El enlace 'next' ya incluye los filtros de la consulta
+                    rows, url, params = data.get('results') or [], data.get('next'), None
+                else:
+                    rows, url = data, None
+                if rows:
+                    yield pd.DataFrame(rows)
+
+    def fetch_data(self, user_id, after_id=None):
         """
         Obtiene datos de ventas específicos del usuario desde el API de Django.
 
+        Junta todas las páginas en un solo DataFrame; para historiales grandes conviene recorrer
+        ``fetch_pages``.
+
         :param user_id: ID del usuario
+        :param after_id: Si se indica, solo se piden las ventas con ID mayor
         :return: DataFrame con los datos de ventas
         """
-        response = requests.get(f"{self.api_url}/sales/?user_id={user_id}")
-        response.raise_for_status()
-        data = response.json()
-        return pd.DataFrame(data)
+        pages = list(self.fetch_pages(user_id, after_id))
+        return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
 
     def process_data(self, df):
         """
-        Procesa los datos de ventas para análisis.
+        Procesa los datos de ventas para análisis con operaciones vectorizadas.
+
+        Las fechas se leen con formato fijo, la ubicación anidada del comprador se expande a columnas
+        en una sola pasada y las columnas derivadas usan tipos compactos (coordenadas float32, hora int8).
 
         :param df: DataFrame con los datos de ventas
         :return: DataFrame procesado
         """
-        df['date'] = pd.to_datetime(df['date'])
-        df['hour'] = pd.to_datetime(df['hour'], format='%H:%M:%S').dt.hour
-        df['sales_amount'] = df['amount'].astype(float)
-        df['buyer_latitude'] = df['buyer_location'].apply(lambda loc: loc['latitude'])
-        df['buyer_longitude'] = df['buyer_location'].apply(lambda loc: loc['longitude'])
+        df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT)
+        df['hour'] = parse_hours(df['hour'])
+        df['sales_amount'] = pd.to_numeric(df['amount']).astype(np.float64)
+        # Una ubicación nula, vacía o que no es un diccionario queda como coordenadas NaN
+        records = [location if isinstance(location, dict) else {} for location in df['buyer_location']]
+        locations = pd.DataFrame.from_records(records, columns=['latitude', 'longitude'], nrows=len(df))
+        df['buyer_latitude'] = locations['latitude'].to_numpy(dtype=np.float32)
+        df['buyer_longitude'] = locations['longitude'].to_numpy(dtype=np.float32)
         return df
 
     def generate_statistics(self, df):
         """
         Genera estadísticas de ventas.
 
+        Las ubicaciones se agrupan en celdas de ``location_resolution`` grados por su ID entero y se
+        reportan en el centro de cada celda; la resolución usada queda en ``attrs['resolution']``.
+
         :param df: DataFrame con los datos de ventas
         :return: DataFrames con estadísticas de ventas
         """
         daily_sales = df.groupby(df['date'].dt.date)['sales_amount'].sum()
         hourly_sales = df.groupby('hour')['sales_amount'].sum()
-        location_sales = df.groupby(['buyer_latitude', 'buyer_longitude'])['sales_amount'].sum().reset_index()
+        if self.location_resolution is None:
+            location_sales = df.groupby(['buyer_latitude', 'buyer_longitude'])['sales_amount'].sum().reset_index()
+            location_sales.attrs['resolution'] = None
+        else:
+            cells, totals, resolution = bin_locations(df['buyer_latitude'], df['buyer_longitude'], df['sales_amount'],
+                                                      self.location_resolution, self.max_location_cells)
+            location_sales = location_frame(*cell_centers(cells, resolution), totals, resolution)
         return daily_sales, hourly_sales, location_sales
 
-    def plot_statistics(self, daily_sales, hourly_sales, location_sales):
+    def update_aggregates(self, user_id):
+        """
+        Descarga las ventas del usuario posteriores al cursor y las suma al almacén de agregados.
+
+        Las páginas deben llegar en orden de ID ascendente; si una página empieza en un ID no mayor que
+        el último de la anterior se lanza ``ValueError`` en lugar de descartar sus ventas.
+
+        :param user_id: ID del usuario
+        :return: Número de ventas incorporadas
         """
-        Plotea gráficos de las estadísticas de ventas.
+        # Cada página se suma en su propia transacción, así una descarga interrumpida no se repite
+        merged = 0
+        last_id = None
+        for page in self.fetch_pages(user_id, after_id=self.aggregate_store.cursor(user_id)):
+            # merge descarta las ventas con ID no mayor que el cursor; una página fuera de orden se perdería
+            if 'id' in page.columns and last_id is not None and page['id'].min() <= last_id:
+                raise ValueError(f"El backend devolvió las ventas del usuario {user_id} fuera de orden: la página "
+                                 f"empieza en el ID {page['id'].min()} después del ID {last_id}")
+            merged += self.aggregate_store.merge(user_id, self.process_data(page))
+            last_id = page['id'].max()
+        return merged
 
-        :param daily_sales: Serie con ventas diarias
-        :param hourly_sales: Serie con ventas por hora
-        :param location_sales: DataFrame con ventas por ubicación
+    def stream_statistics(self, user_id):
         """
-        plt.figure(figsize=(14, 10))
+        Calcula las estadísticas de ``generate_statistics`` página por página, sin juntar el historial.
 
-        # Gráfico de ventas diarias
-        plt.subplot(3, 1, 1)
-        sns.lineplot(x=daily_sales.index, y=daily_sales.values, color='blue')
-        plt.title('Ventas Diarias')
-        plt.xlabel('Fecha')
-        plt.ylabel('Monto de Ventas')
+        :param user_id: ID del usuario
+        :return: Tupla (ventas diarias, ventas por hora, ventas por ubicación)
+        """
+        statistics = SalesStatistics(location_resolution=self.location_resolution,
+                                     max_location_cells=self.max_location_cells)
+        for page in self.fetch_pages(user_id):
+            statistics.add(self.process_data(page))
+        return statistics.result()
 
-        # Gráfico de ventas por hora
-        plt.subplot(3, 1, 2)
-        sns.lineplot(x=hourly_sales.index, y=hourly_sales.values, color='green')
-        plt.title('Ventas por Hora')
-        plt.xlabel('Hora del Día')
-        plt.ylabel('Monto de Ventas')
+    def run_analysis(self, user_id):
+        """
+        Ejecuta el análisis de mercado para un usuario específico.
 
-        # Gráfico de ventas por ubicación
-        plt.subplot(3, 1, 3)
-        plt.figure(figsize=(14, 7))
-        sns.scatterplot(x='buyer_longitude', y='buyer_latitude', size='sales_amount', data=location_sales, palette='viridis', sizes=(20, 200))
-        plt.title('Ventas por Ubicación del Comprador')
-        plt.xlabel('Longitud')
-        plt.ylabel('Latitud')
+        Los gráficos no se dibujan aquí; se piden aparte a ``models.market_charts``. Las ventas se
+        procesan por páginas. Con un almacén de agregados solo se descargan las ventas posteriores
+        al cursor del vendedor; si las ventas no traen 'id' se recalcula todo el historial.
 
-        plt.tight_layout()
-        plt.show()
+        :param user_id: ID del usuario
+        :return: Diccionario con user_id, data_version, location_resolution y las estadísticas diarias,
+            por hora y por ubicación
+        """
+        if self.aggregate_store is not None:
+            try:
+                self.update_aggregates(user_id)
+                return self.stored_analysis(user_id)
+            except MissingSaleIdError as e:
+                logger.warning("Se recalcula todo el historial del usuario %s: %s", user_id, e)
+        return self._analysis_result(user_id, *self.stream_statistics(user_id))
 
-    def run_analysis(self, user_id):
+    def stored_analysis(self, user_id):
         """
-        Ejecuta el análisis de mercado para un usuario específico y muestra los gráficos.
+        Devuelve el resultado de ``run_analysis`` con los agregados ya guardados, sin descargar ventas.
 
         :param user_id: ID del usuario
+        :return: Diccionario con la forma de ``run_analysis``
         """
-        df = self.fetch_data(user_id)
-        processed_df = self.process_data(df)
-        daily_sales, hourly_sales, location_sales = self.generate_statistics(processed_df)
-        self.plot_statistics(daily_sales, hourly_sales, location_sales)
+        return self._analysis_result(user_id, *self.aggregate_store.statistics(
+            user_id, self.location_resolution, self.max_location_cells))
+
+    @staticmethod
+    def _analysis_result(user_id, daily_sales, hourly_sales, location_sales):
+        statistics = statistics_to_dict(daily_sales, hourly_sales, location_sales)
+        return dict(user_id=user_id, data_version=statistics_version(statistics),
+                    location_resolution=location_sales.attrs.get('resolution'), **statistics)
 
 
 # Ejemplo de uso
@@ -102,4 +259,6 @@ if __name__ == "__main__":
     api_url = 'http://<django-backend-url>' #URL de la API desarrollada en Django
     user_id = 1  # ID del usuario de ejemplo
     analysis = MarketAnalysis(api_url)
-    analysis.run_analysis(user_id)
+    result = analysis.run_analysis(user_id)
+    with open(f'ventas_{user_id}.png', 'wb') as file:
+        file.write(render_charts(result))
@@ -0,0 +1,152 @@
+import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+def render_charts(statistics, fmt='png'):
+    """
+    Dibuja los gráficos de ventas con el backend Agg y la API orientada a objetos de matplotlib.
+
+    No usa pyplot: la figura no se registra en ningún estado global y se libera al terminar.
+
+    :param statistics: Diccionario de ``statistics_to_dict``
+    :param fmt: 'png' o 'svg'
+    :return: Bytes de la imagen
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Formato de gráfico no soportado: {fmt}")
+    figure = Figure(figsize=(14, 15))
+    FigureCanvasAgg(figure)
+    daily_ax, hourly_ax, location_ax = figure.subplots(3, 1)
+
+    # Gráfico de ventas diarias
+    daily = statistics['daily_sales']
+    daily_ax.plot(pd.to_datetime([row['date'] for row in daily]), [row['sales_amount'] for row in daily],
+                  color='blue')
+    daily_ax.set_title('Ventas Diarias')
+    daily_ax.set_xlabel('Fecha')
+    daily_ax.set_ylabel('Monto de Ventas')
+
+    # Gráfico de ventas por hora
+    hourly = statistics['hourly_sales']
+    hourly_ax.plot([row['hour'] for row in hourly], [row['sales_amount'] for row in hourly], color='green')
+    hourly_ax.set_title('Ventas por Hora')
+    hourly_ax.set_xlabel('Hora del Día')
+    hourly_ax.set_ylabel('Monto de Ventas')
+
+    # Gráfico de ventas por ubicación (tamaño del punto proporcional al monto, entre 20 y 200)
+    location = statistics['location_sales']
+    if location:
+        amounts = np.array([row['sales_amount'] for row in location], dtype=np.float64)
+        spread = np.ptp(amounts)
+        sizes = 20 + 180 * (amounts - amounts.min()) / spread if spread else 20
+        location_ax.scatter([row['buyer_longitude'] for row in location],
+                            [row['buyer_latitude'] for row in location], s=sizes, c=amounts, cmap='viridis', alpha=0.7)
+    location_ax.set_title('Ventas por Ubicación del Comprador')
+    location_ax.set_xlabel('Longitud')
+    location_ax.set_ylabel('Latitud')
+
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    def __init__(self, max_workers=2, maxsize=256):
+        """
+        Renderiza gráficos en un grupo de procesos y guarda los resultados por (user_id, versión, formato).
+
+        Los renderizados simultáneos de la misma clave comparten un solo trabajo.
+
+        :param max_workers: Procesos dedicados a dibujar
+        :param maxsize: Número máximo de imágenes guardadas
+        """
+        self.max_workers = max_workers
+        self.maxsize = maxsize
+        self._executor = None
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn evita heredar hilos y locks del servidor al crear los procesos
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def cached(self, user_id, data_version, fmt='png'):
+        """
+        Devuelve los bytes del gráfico si ya están guardados, sin renderizar.
+
+        :param user_id: ID del usuario
+        :param data_version: Versión de las estadísticas
+        :param fmt: 'png' o 'svg'
+        :return: Bytes de la imagen o None
+        """
+        key = (user_id, data_version, fmt)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def render(self, user_id, data_version, statistics, fmt='png'):
+        """
+        Devuelve los bytes del gráfico, renderizándolo solo si no está guardado.
+
+        :param user_id: ID del usuario
+        :param data_version: Versión de las estadísticas (ver ``statistics_version``)
+        :param statistics: Diccionario de ``statistics_to_dict``
+        :param fmt: 'png' o 'svg'
+        :return: Future con los bytes de la imagen
+        """
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Formato de gráfico no soportado: {fmt}")
+        key = (user_id, data_version, fmt)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(self._entries[key])
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            self.renders += 1
+            future = self._pool().submit(render_charts, statistics, fmt)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._store(key, done))
+        return future
+
+    def _store(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._entries[key] = future.result()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Renderizador compartido por el proceso del API
+chart_renderer = ChartRenderer()
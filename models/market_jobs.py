@@ -0,0 +1,156 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from models.market_analysis import LOCATION_RESOLUTION, MarketAnalysis
+from models.sales_aggregates import SalesAggregateStore
+
+# Almacenes de agregados abiertos en cada proceso del grupo, por ruta
+_stores = {}
+
+
+def run_analysis_job(api_url, user_id, aggregates_path=None, location_resolution=LOCATION_RESOLUTION):
+    """
+    Ejecuta el análisis de mercado de un vendedor dentro de un proceso del grupo.
+
+    :param api_url: URL del API de Django
+    :param user_id: ID del vendedor
+    :param aggregates_path: Ruta del almacén de agregados en SQLite (opcional)
+    :param location_resolution: Tamaño de celda en grados de las ventas por ubicación
+    :return: Diccionario de ``MarketAnalysis.run_analysis``
+    """
+    store = None
+    if aggregates_path is not None:
+        store = _stores.get(aggregates_path)
+        if store is None:
+            store = _stores[aggregates_path] = SalesAggregateStore(aggregates_path)
+    return MarketAnalysis(api_url, store, location_resolution=location_resolution).run_analysis(user_id)
+
+
+class AnalysisJobs:
+    def __init__(self, max_workers=2, max_pending=256, ttl=600):
+        """
+        Ejecuta análisis de mercado en segundo plano en un grupo de procesos acotado.
+
+        Cada envío recibe un ID de trabajo para consultar su estado. Mientras un vendedor tiene un
+        trabajo pendiente o en curso con la misma resolución de ubicación, los envíos nuevos para él
+        devuelven ese mismo trabajo. Los resultados se conservan ``ttl`` segundos después de terminar.
+
+        :param max_workers: Procesos dedicados a los análisis
+        :param max_pending: Trabajos sin terminar admitidos a la vez
+        :param ttl: Segundos que se conserva un trabajo terminado
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = None
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn evita heredar hilos y locks del servidor al crear los procesos
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _expire(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and now - job['finished_at'] >= self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, api_url, user_id, aggregates_path=None, location_resolution=LOCATION_RESOLUTION):
+        """
+        Encola el análisis de un vendedor o devuelve el trabajo que ya tiene en curso.
+
+        :param api_url: URL del API de Django
+        :param user_id: ID del vendedor
+        :param aggregates_path: Ruta del almacén de agregados en SQLite (opcional)
+        :param location_resolution: Tamaño de celda en grados de las ventas por ubicación
+        :return: Diccionario con el estado del trabajo (ver ``get``)
+        """
+        key = (user_id, location_resolution)
+        with self._lock:
+            self._expire(time.monotonic())
+            job_id = self._active.get(key)
+            if job_id is not None:
+                self.deduplicated += 1
+                return self._snapshot(self._jobs[job_id])
+            if len(self._active) >= self.max_pending:
+                raise RuntimeError("Demasiados análisis en cola; intente más tarde")
+            args = (api_url, user_id, aggregates_path, location_resolution)
+            try:
+                future = self._pool().submit(run_analysis_job, *args)
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. por memoria); se crea un grupo nuevo para los siguientes
+                self._executor = None
+                future = self._pool().submit(run_analysis_job, *args)
+            job_id = uuid.uuid4().hex
+            job = {'job_id': job_id, 'user_id': user_id, 'key': key, 'future': future, 'finished_at': None}
+            self._jobs[job_id] = job
+            self._active[key] = job_id
+            self.submitted += 1
+        job['future'].add_done_callback(lambda done: self._finish(job))
+        return self._snapshot(job)
+
+    def _finish(self, job):
+        with self._lock:
+            job['finished_at'] = time.monotonic()
+            if self._active.get(job['key']) == job['job_id']:
+                del self._active[job['key']]
+
+    def get(self, job_id):
+        """
+        Devuelve el estado de un trabajo.
+
+        :param job_id: ID del trabajo
+        :return: Diccionario con job_id, user_id, status ('pending', 'running', 'done' o 'failed') y,
+            según el caso, 'result' o 'error'; None si el trabajo no existe o ya expiró
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job is not None else None
+
+    @staticmethod
+    def _snapshot(job):
+        future = job['future']
+        snapshot = {'job_id': job['job_id'], 'user_id': job['user_id']}
+        if not future.done():
+            snapshot['status'] = 'running' if future.running() else 'pending'
+        elif future.cancelled():
+            snapshot.update(status='failed', error='El trabajo fue cancelado')
+        elif future.exception() is not None:
+            snapshot.update(status='failed', error=str(future.exception()))
+        else:
+            snapshot.update(status='done', result=future.result())
+        return snapshot
+
+    def stats(self):
+        """
+        Devuelve contadores de los trabajos.
+
+        :return: Diccionario con trabajos guardados, activos, enviados y deduplicados
+        """
+        with self._lock:
+            return {
+                'jobs': len(self._jobs),
+                'active': len(self._active),
+                'submitted': self.submitted,
+                'deduplicated': self.deduplicated,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Trabajos de análisis compartidos por el proceso del API
+analysis_jobs = AnalysisJobs()
@@ -3,7 +3,9 @@ import pandas as pd
 from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, classification_report
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.preprocessing import MinMaxScaler
+from sklearn.compose import ColumnTransformer, TransformedTargetRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
 from sklearn.model_selection import train_test_split
 import requests
 
@@ -50,6 +52,44 @@ def preprocess_data(data, target_column, test_size=0.2, random_state=42):
     return X_train, X_test, y_train, y_test
 
 
+def split_data(data, target_column, test_size=0.2, random_state=42):
+    """
+    Divide los datos sin transformarlos en conjuntos de entrenamiento y prueba.
+
+    A diferencia de ``preprocess_data`` no escala ni codifica: esas transformaciones quedan dentro
+    del modelo construido con ``build_regression_pipeline``.
+
+    :param data: DataFrame con los datos
+    :param target_column: Nombre de la columna objetivo
+    :param test_size: Proporción del conjunto de prueba
+    :param random_state: Estado aleatorio para la división de datos
+    :return: Conjuntos de entrenamiento y prueba para características y etiquetas
+    """
+    data = data.drop_duplicates().dropna()
+    X = data.drop(columns=[target_column])
+    y = data[target_column]
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+def build_regression_pipeline(model, X):
+    """
+    Envuelve un regresor con el mismo preprocesamiento de ``preprocess_data`` (escalado MinMax de las
+    columnas numéricas, variables dummy de las categóricas y escalado del objetivo), guardado junto al
+    modelo para que ``predict`` reciba datos crudos y devuelva valores en la escala original.
+
+    :param model: Regresor de scikit-learn sin entrenar
+    :param X: DataFrame de características de entrenamiento (define las columnas de cada tipo)
+    :return: TransformedTargetRegressor sin entrenar
+    """
+    numerical_columns = list(X.select_dtypes(include='number').columns)
+    categorical_columns = [column for column in X.columns if column not in numerical_columns]
+    preprocessing = ColumnTransformer([
+        ('numerical', MinMaxScaler(), numerical_columns),
+        ('categorical', OneHotEncoder(drop='first', handle_unknown='ignore'), categorical_columns),
+    ])
+    return TransformedTargetRegressor(regressor=make_pipeline(preprocessing, model), transformer=MinMaxScaler())
+
+
 def calculate_metrics(y_true, y_pred):
     """
     Calcula métricas de evaluación para un modelo de regresión.
@@ -0,0 +1,277 @@
+import datetime
+import logging
+import zipfile
+import numpy as np
+import pandas as pd
+import pymysql
+from models.file_utils import atomic_write
+from models.geo import GRID_RESOLUTIONS, cell_centers, grid_cell_ids, valid_locations
+from models.market_analysis import DATE_FORMAT, LOCATION_RESOLUTION, MarketAnalysis, parse_hours
+
+logger = logging.getLogger(__name__)
+
+SALES_COLUMNS = ('user_id', 'date', 'hour', 'amount', 'buyer_latitude', 'buyer_longitude')
+# Bits reservados en las claves compuestas (vendedor, día) y (vendedor, celda)
+DAY_BITS = 24
+CELL_BITS = 37
+EPOCH_DAY = np.datetime64('1970-01-01', 'D')
+
+
+def read_sales_chunks(connection, table='sales', chunksize=500000, user_column='user_id'):
+    """
+    Lee la tabla de ventas por bloques desde una conexión DB-API (p. ej. ``DataSplitter.connection``).
+
+    Con PyMySQL se usa un cursor sin búfer (``SSCursor``), así el cliente no carga la tabla completa
+    antes del primer bloque.
+
+    :param connection: Conexión DB-API abierta
+    :param table: Nombre de la tabla de ventas
+    :param chunksize: Filas por bloque
+    :param user_column: Columna con el ID del vendedor
+    :return: Generador de DataFrames con las columnas de ``SALES_COLUMNS``
+    """
+    columns = (user_column,) + SALES_COLUMNS[1:]
+    if isinstance(connection, pymysql.connections.Connection):
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+    else:
+        cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=SALES_COLUMNS, nrows=len(rows))
+    finally:
+        cursor.close()
+
+
+def drop_orphan_sales(df):
+    """
+    Descarta las ventas sin vendedor (user_id nulo o ausente) y registra cuántas fueron.
+
+    :param df: DataFrame de ventas
+    :return: DataFrame solo con las ventas que tienen user_id
+    """
+    orphans = df['user_id'].isna() if 'user_id' in df.columns else pd.Series(True, index=df.index)
+    if orphans.any():
+        logger.warning("Se descartan %d ventas sin user_id", int(orphans.sum()))
+        df = df[~orphans].reset_index(drop=True)
+    return df
+
+
+def process_sales_rows(df):
+    """
+    Convierte un bloque leído de la base de datos a las columnas de ``MarketAnalysis.process_data``.
+
+    Acepta fechas como texto o ``datetime.date`` y horas como texto 'HH:MM:SS' o ``timedelta``
+    (así devuelve PyMySQL las columnas TIME). Las ventas sin vendedor (user_id NULL) se descartan y
+    se registra cuántas fueron.
+
+    :param df: DataFrame con las columnas de ``SALES_COLUMNS``
+    :return: DataFrame con user_id, date, hour, sales_amount, buyer_latitude y buyer_longitude
+    """
+    df = drop_orphan_sales(df)
+    dates = df['date']
+    if dates.dtype == object and len(dates) and isinstance(dates.iloc[0], str):
+        dates = pd.to_datetime(dates, format=DATE_FORMAT)
+    else:
+        dates = pd.to_datetime(dates)
+    hours = df['hour']
+    if pd.api.types.is_timedelta64_dtype(hours) or (len(hours) and isinstance(hours.iloc[0], datetime.timedelta)):
+        hours = (pd.to_timedelta(hours).dt.total_seconds().to_numpy() // 3600 % 24).astype(np.int8)
+    else:
+        hours = parse_hours(hours.astype(str))
+    return pd.DataFrame({
+        'user_id': df['user_id'].to_numpy(dtype=np.int64),
+        'date': dates,
+        'hour': hours,
+        'sales_amount': pd.to_numeric(df['amount']).to_numpy(dtype=np.float64),
+        'buyer_latitude': pd.to_numeric(df['buyer_latitude']).to_numpy(dtype=np.float32),
+        'buyer_longitude': pd.to_numeric(df['buyer_longitude']).to_numpy(dtype=np.float32),
+    })
+
+
+def iter_api_sales(api_url, page_size=50000):
+    """
+    Recorre las ventas de todos los vendedores desde el API de Django, página por página.
+
+    Como en la base de datos, las ventas sin vendedor se descartan (ver ``drop_orphan_sales``).
+
+    :param api_url: URL del API de Django
+    :param page_size: Ventas por página
+    :return: Generador de DataFrames procesados por ``MarketAnalysis.process_data``
+    """
+    analysis = MarketAnalysis(api_url, page_size=page_size)
+    for page in analysis.fetch_pages(None):
+        page = drop_orphan_sales(page)
+        if not page.empty:
+            yield analysis.process_data(page)
+
+
+def _group_sum(keys, weights, presorted_runs=False):
+    # Agrupar ordenando deja las claves ordenadas. Al combinar parciales ya ordenados, el ordenamiento
+    # estable (timsort) solo mezcla las secuencias; un bloque nuevo se ordena con quicksort (vectorizado)
+    order = np.argsort(keys, kind='stable' if presorted_runs else 'quicksort')
+    keys = keys[order]
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1)) if len(keys) else np.zeros(0, int)
+    return keys[starts], np.add.reduceat(weights[order], starts) if len(keys) else np.zeros(0)
+
+
+class PlatformStatistics:
+    def __init__(self, location_resolution=LOCATION_RESOLUTION, compact_rows=2000000):
+        """
+        Ventas diarias, por hora y por celda de ubicación de todos los vendedores en una sola pasada.
+
+        Cada grupo se identifica con una clave entera que combina el ID del vendedor con el día, la
+        hora o la celda de la grilla, y cada bloque se suma ordenando sus claves. Solo se guardan las
+        sumas parciales por clave; cuando pasan ``compact_rows`` filas se combinan, y el umbral se
+        duplica si tras combinarlas siguen ocupando más de la mitad.
+
+        :param location_resolution: Tamaño de celda en grados (uno de ``GRID_RESOLUTIONS``)
+        :param compact_rows: Filas parciales acumuladas antes de combinarlas
+        """
+        if location_resolution not in GRID_RESOLUTIONS:
+            raise ValueError(f"Resolución de ubicación no soportada: {location_resolution}")
+        self.location_resolution = location_resolution
+        self.compact_rows = compact_rows
+        self._threshold = compact_rows
+        self._partials = {'daily': [], 'hourly': [], 'location': []}
+        self._rows = 0
+        self.sales = 0
+
+    def add(self, df):
+        """
+        Suma un bloque de ventas procesadas (ver ``process_sales_rows``).
+
+        :param df: DataFrame con user_id, date, hour, sales_amount, buyer_latitude y buyer_longitude
+        """
+        if df.empty:
+            return
+        users = df['user_id'].to_numpy(dtype=np.int64)
+        if users.min() < 0 or users.max() >= 1 << (63 - CELL_BITS):
+            raise ValueError("Los IDs de vendedor deben estar entre 0 y 2**26")
+        amounts = df['sales_amount'].to_numpy(dtype=np.float64)
+        days = (df['date'].to_numpy().astype('datetime64[D]') - EPOCH_DAY).astype(np.int64) + (1 << (DAY_BITS - 1))
+        # Las ventas sin ubicación cuentan en los totales diarios y por hora, pero no tienen celda
+        latitudes, longitudes = df['buyer_latitude'].to_numpy(), df['buyer_longitude'].to_numpy()
+        valid = valid_locations(latitudes, longitudes)
+        cells = grid_cell_ids(latitudes[valid], longitudes[valid], self.location_resolution)
+        keys = {
+            'daily': ((users << DAY_BITS) | days, amounts),
+            'hourly': (users * 24 + df['hour'].to_numpy(dtype=np.int64), amounts),
+            'location': ((users[valid] << CELL_BITS) | cells, amounts[valid]),
+        }
+        for name, (key, weights) in keys.items():
+            partial = _group_sum(key, weights)
+            self._partials[name].append(partial)
+            self._rows += len(partial[0])
+        self.sales += len(df)
+        if self._rows > self._threshold:
+            self._compact()
+
+    def _compact(self):
+        self._rows = 0
+        for partials in self._partials.values():
+            if len(partials) > 1:
+                partials[:] = [_group_sum(np.concatenate([keys for keys, _ in partials]),
+                                          np.concatenate([sums for _, sums in partials]), presorted_runs=True)]
+            self._rows += sum(len(keys) for keys, _ in partials)
+        # Si casi todas las claves son distintas, combinar de nuevo enseguida no reduce nada
+        self._threshold = max(self.compact_rows, 2 * self._rows)
+
+    def result(self):
+        """
+        Devuelve las estadísticas como columnas ordenadas por vendedor y por día, hora o celda.
+
+        :return: Diccionario de arreglos: daily_user_id, daily_date (datetime64[D]), daily_sales_amount,
+            hourly_user_id, hourly_hour, hourly_sales_amount, location_user_id, location_cell_id
+            (ver ``models.geo.cell_centers``), location_sales_amount y location_resolution
+        """
+        self._compact()
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        # Las sumas combinadas ya quedan ordenadas por clave, es decir por vendedor y luego día, hora o celda
+        (daily_keys, daily_sums), (hourly_keys, hourly_sums), (location_keys, location_sums) = (
+            (self._partials[name] or [empty])[0] for name in ('daily', 'hourly', 'location'))
+        return {
+            'daily_user_id': (daily_keys >> DAY_BITS).astype(np.int32),
+            'daily_date': EPOCH_DAY + ((daily_keys & ((1 << DAY_BITS) - 1)) - (1 << (DAY_BITS - 1))),
+            'daily_sales_amount': daily_sums,
+            'hourly_user_id': (hourly_keys // 24).astype(np.int32),
+            'hourly_hour': (hourly_keys % 24).astype(np.int8),
+            'hourly_sales_amount': hourly_sums,
+            'location_user_id': (location_keys >> CELL_BITS).astype(np.int32),
+            'location_cell_id': location_keys & ((1 << CELL_BITS) - 1),
+            'location_sales_amount': location_sums,
+            'location_resolution': np.float64(self.location_resolution),
+        }
+
+
+def platform_statistics(chunks, location_resolution=LOCATION_RESOLUTION):
+    """
+    Calcula las estadísticas de todos los vendedores recorriendo los bloques una sola vez.
+
+    :param chunks: Iterable de DataFrames procesados
+    :param location_resolution: Tamaño de celda en grados
+    :return: Diccionario de arreglos (ver ``PlatformStatistics.result``)
+    """
+    statistics = PlatformStatistics(location_resolution)
+    for chunk in chunks:
+        statistics.add(chunk)
+    return statistics.result()
+
+
+def write_platform_statistics(path, statistics):
+    """
+    Guarda las estadísticas en un archivo .npz comprimido (una columna por arreglo) y lo publica de
+    forma atómica.
+
+    :param path: Ruta del archivo de destino
+    :param statistics: Diccionario de ``PlatformStatistics.result``
+    """
+    with atomic_write(path, prefix='.platform-', suffix='.npz') as file:
+        # Igual que np.savez_compressed pero con compresión nivel 1: las columnas ordenadas se comprimen
+        # casi igual y la escritura es varias veces más rápida
+        with zipfile.ZipFile(file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for name, values in statistics.items():
+                with archive.open(f'{name}.npy', 'w', force_zip64=True) as member:
+                    np.lib.format.write_array(member, np.asanyarray(values), allow_pickle=False)
+
+
+def load_platform_statistics(path):
+    """
+    Lee un archivo de ``write_platform_statistics``.
+
+    :param path: Ruta del archivo
+    :return: Diccionario de arreglos
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def seller_statistics(statistics, user_id):
+    """
+    Extrae las estadísticas de un vendedor con la forma de ``statistics_to_dict``.
+
+    :param statistics: Diccionario de ``PlatformStatistics.result`` o ``load_platform_statistics``
+    :param user_id: ID del vendedor
+    :return: Diccionario con las listas 'daily_sales', 'hourly_sales' y 'location_sales'
+    """
+    def rows(prefix):
+        users = statistics[f'{prefix}_user_id']
+        return slice(np.searchsorted(users, user_id, side='left'), np.searchsorted(users, user_id, side='right'))
+
+    daily, hourly, location = rows('daily'), rows('hourly'), rows('location')
+    latitudes, longitudes = cell_centers(statistics['location_cell_id'][location],
+                                         float(statistics['location_resolution']))
+    return {
+        'daily_sales': [{'date': str(date), 'sales_amount': float(amount)}
+                        for date, amount in zip(statistics['daily_date'][daily],
+                                                statistics['daily_sales_amount'][daily])],
+        'hourly_sales': [{'hour': int(hour), 'sales_amount': float(amount)}
+                         for hour, amount in zip(statistics['hourly_hour'][hourly],
+                                                 statistics['hourly_sales_amount'][hourly])],
+        'location_sales': [{'buyer_latitude': float(lat), 'buyer_longitude': float(lon), 'sales_amount': float(amount)}
+                           for lat, lon, amount in zip(latitudes, longitudes,
+                                                       statistics['location_sales_amount'][location])],
+    }
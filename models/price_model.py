@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.compose import TransformedTargetRegressor
+from models.pricing import COST_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.environ.get('PRICE_MODEL_PATH',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'RandomForestRegressor.pkl'))
+
+
+class PriceModel:
+    def __init__(self, model):
+        """
+        Envoltura de un regresor que predice precios en córdobas a partir de los datos crudos del producto.
+
+        Las características se toman en el orden de ``feature_names_in_`` si el modelo se entrenó con
+        un DataFrame; si no, se usan los campos de costo en el orden de ``COST_FIELDS``.
+
+        :param model: Regresor de scikit-learn ya entrenado
+        """
+        self.model = model
+        names = getattr(model, 'feature_names_in_', None)
+        self.feature_names = list(names) if names is not None else list(COST_FIELDS)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        """
+        Carga el modelo guardado con joblib por scripts/train_models.py.
+
+        Solo se aceptan modelos guardados con su preprocesamiento y el escalado del objetivo
+        (``TransformedTargetRegressor``); un regresor suelto de versiones anteriores predice en la
+        escala [0, 1] del entrenamiento y no en córdobas.
+
+        :param path: Ruta del archivo .pkl
+        :return: PriceModel o None si el archivo no existe
+        """
+        if not os.path.exists(path):
+            return None
+        model = joblib.load(path)
+        if not isinstance(model, TransformedTargetRegressor):
+            raise ValueError(f"El modelo de precios {path} no incluye el escalado del objetivo; "
+                             "vuelva a entrenarlo con scripts/train_models.py")
+        return cls(model)
+
+    def features(self, product_data):
+        """
+        Arma el vector de características de un producto en el orden del modelo.
+
+        :param product_data: Diccionario con los datos del producto
+        :return: Arreglo 1-D (object, para admitir columnas categóricas)
+        """
+        missing = [name for name in self.feature_names if product_data.get(name) is None]
+        if missing:
+            raise ValueError(f"Faltan características para el modelo de precios: {', '.join(missing)}")
+        return np.array([product_data[name] for name in self.feature_names], dtype=object)
+
+    def predict(self, rows):
+        """
+        Predice el precio de un lote de productos con una sola llamada a ``model.predict``.
+
+        :param rows: Matriz (n, n_features)
+        :return: Arreglo de n precios
+        """
+        if hasattr(self.model, 'feature_names_in_'):
+            rows = pd.DataFrame(rows, columns=self.feature_names).infer_objects()
+        else:
+            rows = np.asarray(rows, dtype=np.float64)
+        return np.asarray(self.model.predict(rows), dtype=np.float64).reshape(-1)
+
+
+class MicroBatcher:
+    def __init__(self, predict, max_batch_size=64, max_wait=0.005):
+        """
+        Agrupa solicitudes concurrentes de una fila en lotes para una sola predicción.
+
+        Un lote se despacha cuando llega a ``max_batch_size`` filas o cuando pasan ``max_wait``
+        segundos desde la primera fila. La predicción corre en el executor del loop y cada
+        solicitud recibe su propio resultado (o la excepción del lote).
+
+        :param predict: Función que recibe una matriz (n, n_features) y devuelve n valores
+        :param max_batch_size: Número máximo de filas por lote
+        :param max_wait: Segundos máximos que espera la primera fila de un lote
+        """
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, row):
+        """
+        Encola una fila y espera su predicción.
+
+        :param row: Arreglo 1-D de características
+        :return: Valor predicho
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Lo que ya está en la cola entra sin esperar más
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            batch = [(row, future) for row, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            try:
+                values = await self._loop.run_in_executor(None, self.predict, np.vstack([row for row, _ in batch]))
+                # Sin esta comprobación, las solicitudes sin valor esperarían para siempre
+                if len(values) != len(batch):
+                    raise ValueError(f"La predicción devolvió {len(values)} valores para {len(batch)} filas")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), value in zip(batch, values):
+                if not future.done():
+                    future.set_result(float(value))
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+# Segundos que se recuerda que no hay modelo entrenado antes de volver a buscar el archivo
+MODEL_RECHECK_INTERVAL = 30
+
+_price_model = None
+_price_batcher = None
+_load_failed = False
+_missing_checked_at = {}
+
+
+def get_price_batcher(path=MODEL_PATH):
+    """
+    Devuelve el agrupador compartido del modelo de precios, cargando el modelo la primera vez.
+
+    Si no hay modelo entrenado, el archivo no se vuelve a buscar hasta pasados ``MODEL_RECHECK_INTERVAL``
+    segundos.
+
+    :param path: Ruta del archivo .pkl
+    :return: Tupla (PriceModel, MicroBatcher) o (None, None) si no hay modelo entrenado o no es válido
+    """
+    global _price_model, _price_batcher, _load_failed
+    if _price_batcher is None:
+        if _load_failed:
+            return None, None
+        checked_at = _missing_checked_at.get(path)
+        if checked_at is not None and time.monotonic() - checked_at < MODEL_RECHECK_INTERVAL:
+            return None, None
+        try:
+            model = PriceModel.load(path)
+        except Exception:
+            # Un modelo inválido se registra una vez y se ignora hasta reiniciar el proceso
+            logger.exception("No se pudo cargar el modelo de precios de %s", path)
+            _load_failed = True
+            return None, None
+        if model is None:
+            _missing_checked_at[path] = time.monotonic()
+            return None, None
+        _price_model, _price_batcher = model, MicroBatcher(model.predict)
+    return _price_model, _price_batcher
+
+
+async def predict_price(product_data, path=MODEL_PATH):
+    """
+    Predice el precio de un producto pasando por el agrupador compartido.
+
+    :param product_data: Diccionario con los datos del producto
+    :param path: Ruta del archivo .pkl
+    :return: Precio predicho o None si no hay modelo entrenado
+    """
+    model, batcher = get_price_batcher(path)
+    if model is None:
+        return None
+    return await batcher.submit(model.features(product_data))
+
+
+async def close_price_batcher():
+    if _price_batcher is not None:
+        await _price_batcher.close()
@@ -1,35 +1,135 @@
+import numpy as np
+import pandas as pd
 import requests
+from models.config import DJANGO_API_BASE_URL
+from models.cost_cache import product_cost_cache
+from models.pricing_rules import pricing_rules
+
+# Campos de costo que suman al costo total (material_cost_per_unit se multiplica por quantity_per_unit)
+COST_FIELDS = ['material_cost_per_unit', 'quantity_per_unit', 'transport_cost', 'labor_cost', 'material_costs',
+               'other_expenses']
+
+
+def estimate_earnings_percentages(total_costs, categories=None):
+    """
+    Estima en lote el porcentaje de ganancia según los tramos de las reglas de precios
+    (sección ``pricing`` de configs/config.yaml).
+
+    :param total_costs: Arreglo de costos totales (o un solo costo)
+    :param categories: Categorías de los productos (secuencia, escalar o None)
+    :return: Arreglo de porcentajes de ganancia (o un solo porcentaje)
+    """
+    rules = pricing_rules.current()
+    costs = np.atleast_1d(np.asarray(total_costs, dtype=np.float64))
+    percentages = rules.earnings_percentages(costs, rules.category_codes(categories, len(costs)))
+    return percentages[0] if np.ndim(total_costs) == 0 else percentages
+
+
+def fetch_products_data(product_ids, api_base_url=DJANGO_API_BASE_URL):
+    """
+    Obtiene en una sola solicitud los datos de costo de varios productos desde el API de Django.
+
+    Solo se devuelven los productos pedidos, aunque el backend ignore el filtro ``?ids=``.
+
+    :param product_ids: Lista de IDs de productos
+    :param api_base_url: URL base del API de Django
+    :return: Lista de diccionarios de productos
+    """
+    url = f'{api_base_url}/api/products/'
+    response = requests.get(url, params={'ids': ','.join(str(pid) for pid in product_ids)})
+    if response.status_code == 200:
+        requested = set(product_ids)
+        return [product for product in response.json() if product.get('id') in requested]
+    else:
+        raise Exception("Error al obtener los datos de los productos")
+
+
+def fetch_product_record(product_id, api_base_url=DJANGO_API_BASE_URL):
+    """
+    Obtiene los datos de costo de un producto desde el API de Django, sin pasar por la caché.
+
+    :param product_id: ID del producto
+    :param api_base_url: URL base del API de Django
+    :return: Datos del producto
+    """
+    url = f'{api_base_url}/api/products/{product_id}/'
+    response = requests.get(url)
+    if response.status_code == 200:
+        return response.json()
+    else:
+        raise Exception("Error al obtener los datos del producto")
+
+
+def suggest_prices(products):
+    """
+    Calcula costo total, margen y precio sugerido de muchos productos con operaciones vectorizadas.
+
+    Respeta el ``earnings_percentage`` propio de cada producto cuando viene definido y aplica la
+    regla de precios de su ``category``, si la tiene.
+
+    :param products: Lista de diccionarios o DataFrame con los campos de costo y 'id'
+    :return: DataFrame con product_id, total_cost, earnings_percentage y suggested_price (NaN si a un
+        producto le falta algún campo de costo)
+    """
+    frame = products if isinstance(products, pd.DataFrame) else pd.DataFrame(products)
+    # Un campo de costo ausente en todo el lote deja esos productos con costo NaN en vez de fallar el lote
+    costs = {field: pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=np.float64) if field in frame.columns
+             else np.full(len(frame), np.nan) for field in COST_FIELDS}
+    total_cost = (costs['material_cost_per_unit'] * costs['quantity_per_unit'] + costs['transport_cost']
+                  + costs['labor_cost'] + costs['material_costs'] + costs['other_expenses'])
+    override = None
+    if 'earnings_percentage' in frame.columns:
+        override = pd.to_numeric(frame['earnings_percentage'], errors='coerce').to_numpy(dtype=np.float64)
+    categories = frame['category'].to_numpy() if 'category' in frame.columns else None
+    earnings_percentage, suggested_price = pricing_rules.current().evaluate(total_cost, categories, override)
+    return pd.DataFrame({
+        'product_id': frame['id'].to_numpy(),
+        'total_cost': total_cost,
+        'earnings_percentage': earnings_percentage,
+        'suggested_price': suggested_price,
+    })
+
 
 class PricingCalculator:
-    def __init__(self, product_id):
+    def __init__(self, product_id, product_data=None):
         """
         Inicializa el calculador de precios con datos obtenidos desde el API de Django.
 
         :param product_id: ID del producto para obtener datos
+        :param product_data: Datos de costo ya disponibles; si se indican no se consulta el API
         """
         self.product_id = product_id
-        self.product_data = self.fetch_product_data()
+        self.product_data = product_data if product_data is not None else self.fetch_product_data()
         self.material_cost_per_unit = self.product_data['material_cost_per_unit']
         self.quantity_per_unit = self.product_data['quantity_per_unit']
-        self.price_per_unit = self.product_data['price_per_unit']
+        self.price_per_unit = self.product_data.get('price_per_unit')
         self.transport_cost = self.product_data['transport_cost']
         self.labor_cost = self.product_data['labor_cost']
         self.material_costs = self.product_data['material_costs']
         self.other_expenses = self.product_data['other_expenses']
         self.earnings_percentage = self.product_data.get('earnings_percentage')
+        self.category = self.product_data.get('category')
+
+    @classmethod
+    def from_cost_data(cls, cost_data, product_id=None):
+        """
+        Crea un calculador a partir de datos de costo enviados por el cliente, sin consultar el API.
+
+        :param cost_data: Diccionario con los campos de costo del producto
+        :param product_id: ID del producto, si se conoce
+        :return: PricingCalculator
+        """
+        return cls(product_id, product_data=dict(cost_data))
 
     def fetch_product_data(self):
         """
-        Obtiene datos del producto desde el API de Django.
+        Obtiene datos del producto desde el API de Django a través de la caché de costos compartida.
 
         :return: Datos del producto
         """
-        url = f'http://<django-backend-url>/api/products/{self.product_id}/'
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception("Error al obtener los datos del producto")
+        api_base_url = DJANGO_API_BASE_URL
+        return product_cost_cache.get((api_base_url, self.product_id),
+                                      lambda: fetch_product_record(self.product_id, api_base_url))
 
     def calculate_total_cost(self):
         """
@@ -51,14 +151,8 @@ class PricingCalculator:
         """
         if self.earnings_percentage is not None:
             return self.earnings_percentage
-        if total_cost <= 200:
-            return 10
-        elif total_cost <= 800:
-            return 15
-        elif total_cost <= 1500:
-            return 20
-        else:
-            return 25
+        percentage = float(estimate_earnings_percentages(total_cost, self.category))
+        return int(percentage) if percentage.is_integer() else percentage
 
     def suggest_price(self):
         """
@@ -68,17 +162,23 @@ class PricingCalculator:
         """
         total_cost = self.calculate_total_cost()
         earnings_percentage = self.estimate_earnings_percentage(total_cost)
-        suggested_price = total_cost * (1 + earnings_percentage / 100)
+        rules = pricing_rules.current()
+        suggested_price = float(rules.apply_margin(np.array([total_cost], dtype=np.float64),
+                                                   np.array([earnings_percentage], dtype=np.float64),
+                                                   rules.category_codes(self.category, 1))[0])
 
         return suggested_price, earnings_percentage
 
-    def generate_price_suggestion_message(self):
+    def generate_price_suggestion_message(self, suggested_price=None, earnings_percentage=None):
         """
         Genera un mensaje cordial y amigable con la sugerencia de precio.
 
+        :param suggested_price: Precio ya calculado con ``suggest_price``; si falta se calcula
+        :param earnings_percentage: Porcentaje de ganancia ya calculado
         :return: Mensaje de sugerencia de precio
         """
-        suggested_price, earnings_percentage = self.suggest_price()
+        if suggested_price is None or earnings_percentage is None:
+            suggested_price, earnings_percentage = self.suggest_price()
         return (f"Hola, basado en los datos proporcionados, el precio sugerido para su producto es "
                 f"${suggested_price:.2f}. Esto incluye un margen de ganancia de {earnings_percentage}% sobre el costo total del producto. "
                 "Este precio le permitirá cubrir todos los gastos y obtener una ganancia adecuada. "
@@ -0,0 +1,231 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+import yaml
+from models.file_utils import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.environ.get('PRICING_CONFIG_PATH',
+                             os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                          'configs', 'config.yaml'))
+
+# Reglas usadas cuando la configuración no define la sección ``pricing``; la regla 'default' de la
+# configuración hereda de aquí lo que no defina (por ejemplo, los tramos)
+DEFAULT_RULES = {
+    'default': {
+        'tiers': [
+            {'max_cost': 200, 'percentage': 10},
+            {'max_cost': 800, 'percentage': 15},
+            {'max_cost': 1500, 'percentage': 20},
+            {'percentage': 25},
+        ],
+    },
+}
+
+ROUNDING_MODES = {'none': 0, 'nearest': 1, 'up': 2, 'down': 3}
+
+
+def _compile_rule(name, rule, fallback=None):
+    rule = dict(fallback or {}, **(rule or {}))
+    tiers = rule.get('tiers')
+    if not tiers:
+        raise ValueError(f"La regla de precios '{name}' no define tramos")
+    limits = [tier.get('max_cost') for tier in tiers]
+    if any(limit is None for limit in limits[:-1]) or limits[-1] is not None:
+        raise ValueError(f"La regla de precios '{name}' debe terminar con un único tramo sin 'max_cost'")
+    limits = np.array(limits[:-1], dtype=np.float64)
+    if np.any(np.diff(limits) <= 0):
+        raise ValueError(f"Los tramos de la regla de precios '{name}' deben ser crecientes")
+    rounding = rule.get('rounding') or {}
+    mode = rounding.get('mode', 'none')
+    if mode not in ROUNDING_MODES:
+        raise ValueError(f"Modo de redondeo desconocido en '{name}': {mode}")
+    return {
+        'limits': limits,
+        'percentages': np.array([tier['percentage'] for tier in tiers], dtype=np.float64),
+        'min_percentage': rule.get('min_percentage'),
+        'max_percentage': rule.get('max_percentage'),
+        'max_markup': rule.get('max_markup'),
+        'rounding_mode': ROUNDING_MODES[mode],
+        'rounding_step': float(rounding.get('step', 0) or 0),
+    }
+
+
+class PricingRules:
+    def __init__(self, config):
+        """
+        Reglas de precios compiladas a arreglos para evaluarlas en lote.
+
+        La fila 0 de cada tabla es la regla por defecto y las siguientes son las categorías en el
+        orden de ``categories``. La regla por defecto hereda de ``DEFAULT_RULES`` y cada categoría de
+        la regla por defecto. Los tramos de todas las reglas se rellenan con +inf hasta el mismo
+        largo, de modo que el tramo de cada producto se resuelve con ``searchsorted``.
+
+        :param config: Diccionario con las claves 'default' y opcionalmente 'categories'
+        """
+        default_rule = dict(DEFAULT_RULES['default'], **(config.get('default') or {}))
+        categories = config.get('categories') or {}
+        compiled = [_compile_rule('default', default_rule)] + [_compile_rule(name, rule, default_rule)
+                                                               for name, rule in categories.items()]
+        self.categories = list(categories)
+        self._codes = {name: i + 1 for i, name in enumerate(self.categories)}
+        n_tiers = max(len(rule['percentages']) for rule in compiled)
+        self.limits = np.full((len(compiled), n_tiers - 1), np.inf)
+        self.percentages = np.zeros((len(compiled), n_tiers))
+        for i, rule in enumerate(compiled):
+            size = len(rule['percentages'])
+            self.limits[i, :size - 1] = rule['limits']
+            self.percentages[i, :size] = rule['percentages']
+            # Los tramos de relleno heredan el porcentaje del último tramo real
+            self.percentages[i, size:] = rule['percentages'][-1]
+        self.min_percentage = np.array([-np.inf if r['min_percentage'] is None else r['min_percentage']
+                                        for r in compiled])
+        self.max_percentage = np.array([np.inf if r['max_percentage'] is None else r['max_percentage']
+                                        for r in compiled])
+        self.max_markup = np.array([np.inf if r['max_markup'] is None else r['max_markup'] for r in compiled])
+        self.rounding_mode = np.array([r['rounding_mode'] for r in compiled], dtype=np.int8)
+        self.rounding_step = np.array([r['rounding_step'] for r in compiled])
+
+    def category_codes(self, categories, size):
+        """
+        Convierte nombres de categoría en índices de las tablas; las desconocidas usan la regla por defecto.
+
+        :param categories: Secuencia de categorías, un escalar o None
+        :param size: Número de productos
+        :return: Arreglo de índices (int16)
+        """
+        if categories is None or not self.categories:
+            return np.zeros(size, dtype=np.int16)
+        if np.isscalar(categories):
+            return np.full(size, self._codes.get(categories, 0), dtype=np.int16)
+        # factorize agrupa por hash, sin ordenar las cadenas
+        inverse, uniques = pd.factorize(np.asarray(categories, dtype=object))
+        lookup = np.array([self._codes.get(name, 0) for name in uniques] + [0], dtype=np.int16)
+        return lookup[inverse]
+
+    def earnings_percentages(self, total_costs, codes):
+        """
+        Porcentaje de ganancia por producto según el tramo de su regla, con los topes aplicados.
+
+        :param total_costs: Arreglo de costos totales
+        :param codes: Arreglo de índices de regla (ver ``category_codes``)
+        :return: Arreglo de porcentajes
+        """
+        if len(self.limits) == 1:
+            tiers = np.searchsorted(self.limits[0], total_costs, side='left')
+        else:
+            tiers = np.empty(len(total_costs), dtype=np.intp)
+            for code in np.unique(codes):
+                mask = codes == code
+                tiers[mask] = np.searchsorted(self.limits[code], total_costs[mask], side='left')
+        percentages = self.percentages[codes, tiers]
+        return np.clip(percentages, self.min_percentage[codes], self.max_percentage[codes])
+
+    def evaluate(self, total_costs, categories=None, overrides=None):
+        """
+        Calcula en lote el porcentaje de ganancia y el precio sugerido.
+
+        Un ``earnings_percentage`` propio del producto reemplaza al de la regla sin los topes de
+        porcentaje (``min_percentage``/``max_percentage``); el tope de ganancia ``max_markup`` y el
+        redondeo de su regla sí se aplican al precio.
+
+        :param total_costs: Arreglo de costos totales
+        :param categories: Categorías de los productos (secuencia, escalar o None)
+        :param overrides: Arreglo de porcentajes propios, con NaN donde no hay
+        :return: Tupla (porcentajes, precios sugeridos)
+        """
+        total_costs = np.asarray(total_costs, dtype=np.float64)
+        codes = self.category_codes(categories, len(total_costs))
+        percentages = self.earnings_percentages(total_costs, codes)
+        if overrides is not None:
+            overrides = np.asarray(overrides, dtype=np.float64)
+            percentages = np.where(np.isnan(overrides), percentages, overrides)
+        return percentages, self.apply_margin(total_costs, percentages, codes)
+
+    def apply_margin(self, total_costs, percentages, codes):
+        """
+        Calcula el precio sugerido a partir del costo y el porcentaje, con el tope de ganancia y el redondeo.
+
+        :param total_costs: Arreglo de costos totales
+        :param percentages: Arreglo de porcentajes de ganancia
+        :param codes: Arreglo de índices de regla
+        :return: Arreglo de precios sugeridos
+        """
+        prices = total_costs * (1 + percentages / 100)
+        prices = np.minimum(prices, total_costs + self.max_markup[codes])
+        return self.round_prices(prices, codes)
+
+    def round_prices(self, prices, codes):
+        """
+        Aplica la regla de redondeo de cada producto (al múltiplo de ``step`` más cercano, hacia arriba o abajo).
+
+        :param prices: Arreglo de precios
+        :param codes: Arreglo de índices de regla
+        :return: Arreglo de precios redondeados
+        """
+        modes = self.rounding_mode[codes]
+        if not modes.any():
+            return prices
+        steps = self.rounding_step[codes]
+        safe_steps = np.where(steps > 0, steps, 1.0)
+        scaled = prices / safe_steps
+        rounded = np.select([modes == 1, modes == 2, modes == 3],
+                            [np.round(scaled), np.ceil(scaled), np.floor(scaled)], scaled) * safe_steps
+        return np.where((modes > 0) & (steps > 0), rounded, prices)
+
+
+def load_rules(path):
+    """
+    Lee y compila la sección ``pricing`` del archivo de configuración.
+
+    :param path: Ruta del archivo YAML
+    :return: PricingRules
+    """
+    with open(path, encoding='utf-8') as file:
+        config = yaml.safe_load(file) or {}
+    return PricingRules(config.get('pricing') or DEFAULT_RULES)
+
+
+class PricingRulesLoader:
+    def __init__(self, path=CONFIG_PATH, check_interval=2):
+        """
+        Mantiene las reglas compiladas y las recarga cuando cambia el archivo de configuración.
+
+        Si la nueva configuración es inválida se conservan las reglas anteriores.
+
+        :param path: Ruta del archivo YAML
+        :param check_interval: Segundos mínimos entre comprobaciones de cambios del archivo
+        """
+        self.path = path
+        self._rules = None
+        self._watcher = FileWatcher([path], check_interval)
+
+    def _reload(self):
+        identity = self._watcher.identity()
+        if identity == self._watcher.loaded and self._rules is not None:
+            return
+        try:
+            rules = load_rules(self.path) if identity[0] is not None else PricingRules(DEFAULT_RULES)
+        except Exception:
+            logger.exception("No se pudieron cargar las reglas de precios de %s", self.path)
+            # Se conservan las reglas anteriores hasta que el archivo vuelva a cambiar
+            self._watcher.loaded = identity
+            if self._rules is None:
+                self._rules = PricingRules(DEFAULT_RULES)
+            return
+        self._rules, self._watcher.loaded = rules, identity
+
+    def current(self):
+        """
+        Devuelve las reglas vigentes, recargándolas si el archivo cambió.
+
+        :return: PricingRules
+        """
+        self._watcher.poll(self._reload, force=self._rules is None)
+        return self._rules
+
+
+# Reglas compartidas por todo el proceso
+pricing_rules = PricingRulesLoader()
@@ -0,0 +1,205 @@
+import threading
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from models.catalog import catalog_identity
+
+# scikit-learn solo incluye la lista de palabras vacías en inglés
+SPANISH_STOP_WORDS = frozenset([
+    'a', 'al', 'algo', 'algunas', 'algunos', 'ante', 'antes', 'como', 'con', 'contra', 'cual', 'cuando',
+    'de', 'del', 'desde', 'donde', 'durante', 'e', 'el', 'ella', 'ellas', 'ellos', 'en', 'entre', 'era',
+    'es', 'esa', 'esas', 'ese', 'eso', 'esos', 'esta', 'estas', 'este', 'esto', 'estos', 'fue', 'ha',
+    'hay', 'la', 'las', 'le', 'les', 'lo', 'los', 'mas', 'más', 'me', 'mi', 'mis', 'muy', 'ni', 'no',
+    'nos', 'o', 'otra', 'otro', 'para', 'pero', 'por', 'porque', 'que', 'qué', 'se', 'ser', 'si', 'sí',
+    'sin', 'sobre', 'su', 'sus', 'también', 'te', 'tu', 'tus', 'un', 'una', 'uno', 'unos', 'y', 'ya',
+])
+
+
+class ProductIndex:
+    def __init__(self, rebuild_ratio=0.25):
+        """
+        Índice TF-IDF del catálogo completo que se mantiene en memoria como matriz dispersa.
+
+        El vocabulario y los pesos IDF se ajustan una sola vez; las altas, ediciones y bajas
+        posteriores se transforman con el vectorizador existente y se agregan a la matriz sin
+        volver a ajustar. Cuando la proporción de cambios acumulados supera ``rebuild_ratio``
+        el índice se reconstruye para compactar filas eliminadas y actualizar el vocabulario.
+
+        :param rebuild_ratio: Proporción de cambios que provoca una reconstrucción completa
+        """
+        self.rebuild_ratio = rebuild_ratio
+        self.vectorizer = None
+        self.matrix = None
+        self.row_of = {}
+        self.descriptions = {}
+        self._pending = []
+        self._changes = 0
+        self._synced_version = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.row_of)
+
+    @staticmethod
+    def _make_vectorizer():
+        return TfidfVectorizer(stop_words=list(SPANISH_STOP_WORDS))
+
+    def build(self, product_ids, descriptions):
+        """
+        Ajusta el vectorizador y construye la matriz TF-IDF de todo el catálogo.
+
+        :param product_ids: Lista de IDs de productos
+        :param descriptions: Lista de descripciones en el mismo orden
+        """
+        product_ids = list(product_ids)
+        descriptions = ['' if d is None else str(d) for d in descriptions]
+        vectorizer = self._make_vectorizer()
+        try:
+            matrix = vectorizer.fit_transform(descriptions).tocsr()
+        except ValueError:
+            # Catálogo vacío o sin términos útiles
+            vectorizer, matrix = None, sp.csr_matrix((len(product_ids), 0))
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.matrix = matrix
+            self.row_of = {pid: row for row, pid in enumerate(product_ids)}
+            self.descriptions = dict(zip(product_ids, descriptions))
+            self._pending = []
+            self._changes = 0
+
+    def transform(self, texts):
+        """
+        Transforma textos al espacio TF-IDF del índice (filas normalizadas L2).
+
+        :param texts: Lista de textos
+        :return: Matriz dispersa CSR
+        """
+        if self.vectorizer is None:
+            return sp.csr_matrix((len(texts), 0))
+        return self.vectorizer.transform(texts).tocsr()
+
+    def upsert(self, products):
+        """
+        Agrega o actualiza productos en el índice sin reajustar el vectorizador.
+
+        :param products: Lista de tuplas (product_id, description)
+        """
+        products = [(pid, '' if d is None else str(d)) for pid, d in products]
+        if not products:
+            return
+        with self._lock:
+            if self.matrix is None:
+                self.build([pid for pid, _ in products], [d for _, d in products])
+                return
+            rows = self.transform([d for _, d in products])
+            next_row = self.matrix.shape[0] + sum(block.shape[0] for block in self._pending)
+            self._pending.append(rows)
+            for offset, (pid, description) in enumerate(products):
+                # La fila anterior queda huérfana hasta la siguiente reconstrucción
+                self.row_of[pid] = next_row + offset
+                self.descriptions[pid] = description
+            self._changes += len(products)
+            self._maybe_rebuild()
+
+    def remove(self, product_ids):
+        """
+        Elimina productos del índice.
+
+        :param product_ids: Lista de IDs de productos
+        """
+        with self._lock:
+            for pid in product_ids:
+                if self.row_of.pop(pid, None) is not None:
+                    self.descriptions.pop(pid, None)
+                    self._changes += 1
+            self._maybe_rebuild()
+
+    def sync(self, products_df):
+        """
+        Sincroniza el índice con el catálogo actual aplicando solo las diferencias.
+
+        Si el DataFrame proviene de la caché de catálogo y esa misma versión de esa misma caché ya
+        fue sincronizada, no se hace ningún trabajo.
+
+        :param products_df: DataFrame de productos con columnas 'id' y 'description'
+        """
+        version = catalog_identity(products_df)
+        if version is not None and version == self._synced_version:
+            return
+        ids = products_df['id'].tolist()
+        descriptions = products_df['description'].fillna('').astype(str).tolist()
+        with self._lock:
+            self._synced_version = version
+            if self.matrix is None:
+                self.build(ids, descriptions)
+                return
+            current = dict(zip(ids, descriptions))
+            removed = self.descriptions.keys() - current.keys()
+            changed = [(pid, d) for pid, d in current.items() if self.descriptions.get(pid) != d]
+            if removed:
+                self.remove(list(removed))
+            if changed:
+                self.upsert(changed)
+
+    def _maybe_rebuild(self):
+        total = max(len(self.row_of), 1)
+        if self._changes / total > self.rebuild_ratio:
+            ids = list(self.descriptions)
+            self.build(ids, [self.descriptions[pid] for pid in ids])
+
+    def _snapshot(self, product_ids):
+        # Matriz y filas se leen juntas bajo el candado para que sean coherentes entre sí
+        with self._lock:
+            if self._pending:
+                self.matrix = sp.vstack([self.matrix] + self._pending, format='csr')
+                self._pending = []
+            rows = np.fromiter((self.row_of.get(pid, -1) for pid in product_ids), dtype=np.int64,
+                               count=len(product_ids))
+            return self.matrix, self.vectorizer, rows
+
+    def rows_for(self, product_ids):
+        """
+        Devuelve las filas de la matriz para los IDs indicados (-1 si no están indexados).
+
+        :param product_ids: Secuencia de IDs de productos
+        :return: Arreglo de índices de fila
+        """
+        return self._snapshot(product_ids)[2]
+
+    def similarity(self, query, product_ids):
+        """
+        Calcula la similitud coseno entre un texto de consulta y los productos indicados.
+
+        :param query: Texto de consulta (por ejemplo, los intereses del usuario)
+        :param product_ids: Secuencia de IDs de productos
+        :return: Arreglo con los puntajes de similitud
+        """
+        matrix, vectorizer, rows = self._snapshot(product_ids)
+        scores = np.zeros(len(rows), dtype=np.float64)
+        if vectorizer is None or not len(rows):
+            return scores
+        query_vector = vectorizer.transform([query])
+        known = rows >= 0
+        scores[known] = (matrix[rows[known]] @ query_vector.T).toarray().ravel()
+        return scores
+
+    def similarity_many(self, queries, product_ids):
+        """
+        Calcula la similitud de varios textos de consulta contra los mismos productos con un solo
+        producto de matrices dispersas.
+
+        El resultado se mantiene disperso: con catálogos grandes una matriz densa de consultas por
+        productos ocuparía memoria proporcional al catálogo por cada consulta.
+
+        :param queries: Lista de textos de consulta
+        :param product_ids: Secuencia de IDs de productos
+        :return: Matriz dispersa CSR (consultas x productos) con los puntajes de similitud
+        """
+        matrix, vectorizer, rows = self._snapshot(product_ids)
+        shape = (len(queries), len(rows))
+        if vectorizer is None or not len(rows) or not len(queries):
+            return sp.csr_matrix(shape)
+        known = np.flatnonzero(rows >= 0)
+        scores = (vectorizer.transform(queries) @ matrix[rows[known]].T).tocoo()
+        # Las columnas del producto corresponden solo a los productos indexados
+        return sp.csr_matrix((scores.data, (scores.row, known[scores.col])), shape=shape)
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from models.keyword_index import tokenize_interests
+
+
+class UserProfile:
+    def __init__(self, user_id, interests, location):
+        """
+        Perfil de usuario ya procesado, con los intereses normalizados y tokenizados.
+
+        :param user_id: ID del usuario
+        :param interests: Lista de intereses tal como vienen del API
+        :param location: Tupla (latitud, longitud)
+        """
+        self.user_id = user_id
+        self.interests = list(interests)
+        self.location = tuple(location)
+        self.interest_tokens = tokenize_interests(self.interests)
+
+
+class ProfileCache:
+    def __init__(self, maxsize=10000, ttl=300):
+        """
+        Caché LRU con vencimiento de perfiles de usuario, compartida por todo el proceso.
+
+        Cada invalidación o escritura directa marca la clave con una generación creciente. Una descarga
+        toma ``generation()`` antes de pedir el perfil y lo guarda con ``put(..., generation=...)``; si la
+        clave cambió entretanto, el resultado se descarta en lugar de reinsertar el perfil anterior.
+
+        :param maxsize: Número máximo de perfiles guardados
+        :param ttl: Segundos que un perfil se considera vigente
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Generación de la última invalidación o escritura directa por clave (acotada a ``maxsize``);
+        # ``_floor`` es la mayor generación descartada, para rechazar descargas más antiguas que ella
+        self._generations = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Devuelve el perfil guardado o None si no existe o venció.
+
+        :param key: Clave del perfil (URL base del API, ID del usuario)
+        :return: UserProfile o None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self):
+        """
+        Devuelve la generación actual; se toma antes de descargar un perfil y se pasa a ``put``.
+
+        :return: Entero creciente
+        """
+        with self._lock:
+            return self._clock
+
+    def _bump(self, key):
+        self._clock += 1
+        self._generations[key] = self._clock
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.maxsize:
+            self._floor = max(self._floor, self._generations.popitem(last=False)[1])
+
+    def put(self, key, profile, generation=None):
+        """
+        Guarda un perfil, descartando el menos usado si se supera ``maxsize``.
+
+        :param key: Clave del perfil (URL base del API, ID del usuario)
+        :param profile: UserProfile
+        :param generation: Generación tomada antes de descargar el perfil; None para una escritura directa
+        :return: True si se guardó, False si la clave se invalidó o reemplazó durante la descarga
+        """
+        with self._lock:
+            if generation is None:
+                self._bump(key)
+            elif generation < self._floor or self._generations.get(key, 0) > generation:
+                return False
+            self._entries[key] = (time.monotonic(), profile)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        """
+        Elimina un perfil de la caché.
+
+        :param key: Clave del perfil (URL base del API, ID del usuario)
+        :return: True si el perfil estaba guardado
+        """
+        with self._lock:
+            self._bump(key)
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Devuelve los contadores de la caché.
+
+        :return: Diccionario con tamaño, aciertos, fallos, descartes y tasa de aciertos
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+
+# Caché compartida por todas las instancias del recomendador
+profile_cache = ProfileCache()
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class RankingWeights:
+    def __init__(self, similarity=1.0, distance=0.5, price=0.2, rating=0.3, distance_scale_km=10.0):
+        """
+        Pesos de la puntuación compuesta usada para ordenar recomendaciones.
+
+        :param similarity: Peso de la similitud con los intereses (mayor es mejor)
+        :param distance: Peso de la cercanía al usuario (menor distancia es mejor)
+        :param price: Peso del precio (menor precio es mejor)
+        :param rating: Peso de la calificación del producto (mayor es mejor)
+        :param distance_scale_km: Distancia a la que la cercanía vale la mitad
+        """
+        if distance_scale_km <= 0:
+            raise ValueError("distance_scale_km debe ser mayor que 0")
+        self.similarity = float(similarity)
+        self.distance = float(distance)
+        self.price = float(price)
+        self.rating = float(rating)
+        self.distance_scale_km = float(distance_scale_km)
+
+    def __repr__(self):
+        return (f"RankingWeights(similarity={self.similarity}, distance={self.distance}, price={self.price}, "
+                f"rating={self.rating}, distance_scale_km={self.distance_scale_km})")
+
+
+def composite_score(similarity, distance, price, rating, weights=None):
+    """
+    Combina similitud, distancia, precio y calificación en una sola puntuación.
+
+    Cada componente se lleva al rango [0, 1]: la distancia con 1 / (1 + d / escala), el precio con
+    una normalización min-max invertida sobre los candidatos y la calificación dividida entre 5.
+    Los valores faltantes aportan 0.
+
+    :param similarity: Arreglo de similitudes
+    :param distance: Arreglo de distancias en kilómetros
+    :param price: Arreglo de precios
+    :param rating: Arreglo de calificaciones (0 a 5)
+    :param weights: RankingWeights (por defecto los valores predeterminados)
+    :return: Arreglo de puntuaciones
+    """
+    weights = weights or RankingWeights()
+    similarity = np.nan_to_num(np.asarray(similarity, dtype=np.float64), nan=0.0)
+    distance = np.asarray(distance, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    rating = np.nan_to_num(np.asarray(rating, dtype=np.float64), nan=0.0)
+
+    closeness = np.nan_to_num(1.0 / (1.0 + distance / weights.distance_scale_km), nan=0.0)
+    cheapness = np.zeros(len(price))
+    valid_price = ~np.isnan(price)
+    if valid_price.any():
+        low, high = price[valid_price].min(), price[valid_price].max()
+        span = high - low
+        cheapness[valid_price] = (high - price[valid_price]) / span if span > 0 else 1.0
+
+    return (weights.similarity * similarity
+            + weights.distance * closeness
+            + weights.price * cheapness
+            + weights.rating * np.clip(rating, 0, 5) / 5.0)
+
+
+def top_k(scores, k, tiebreak=None):
+    """
+    Selecciona las posiciones de las k mejores puntuaciones en O(n) y ordena solo esas k.
+
+    Los empates se resuelven por el valor ascendente de ``tiebreak`` (por ejemplo, el ID del
+    producto) para que el orden sea determinista.
+
+    :param scores: Arreglo de puntuaciones (mayor es mejor)
+    :param k: Número de posiciones a devolver
+    :param tiebreak: Arreglo para desempatar (por defecto, la posición)
+    :return: Arreglo de posiciones ordenadas de mejor a peor
+    """
+    scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+    n = len(scores)
+    tiebreak = np.arange(n) if tiebreak is None else np.asarray(tiebreak)
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)
+        needed = k - len(above)
+        if len(ties) > needed:
+            ties = ties[np.argpartition(tiebreak[ties], needed - 1)[:needed]]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((tiebreak[candidates], -scores[candidates]))
+    return candidates[order].astype(np.int64)
@@ -0,0 +1,138 @@
+import time
+import numpy as np
+from models.file_utils import FileWatcher, atomic_write
+
+MAGIC = b'MNRS'
+FORMAT_VERSION = 2
+HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('n_users', '<u8'), ('top_n', '<u4'), ('pad', '<u4'),
+                   ('created_at', '<f8')])
+# Columnas float32 guardadas por recomendación, en el orden del archivo
+METRICS = ('scores', 'similarity', 'distance')
+
+
+def write_store(path, results, top_n):
+    """
+    Escribe recomendaciones precalculadas en un archivo binario y lo publica de forma atómica.
+
+    El archivo se publica con ``atomic_write``, de modo que los lectores nunca ven un archivo a medias.
+
+    Formato (little-endian): encabezado, user_ids ordenados (int64), fecha de cálculo (float64),
+    cantidad de recomendaciones por usuario (int32), IDs de productos (int64, ``top_n`` por usuario
+    rellenado con -1), puntuaciones, similitudes y distancias en km (float32).
+
+    :param path: Ruta del archivo de destino
+    :param results: Iterable de tuplas (user_id, product_ids, scores) o (user_id, product_ids, scores,
+        similarities, distances); las columnas que falten se guardan como NaN
+    :param top_n: Número máximo de recomendaciones guardadas por usuario
+    :return: Número de usuarios escritos
+    """
+    rows = {}
+    now = time.time()
+    for user_id, product_ids, *values in results:
+        product_ids = np.asarray(product_ids, dtype=np.int64)[:top_n]
+        values = [np.asarray(column, dtype=np.float32)[:top_n] for column in values]
+        values += [np.full(len(product_ids), np.nan, dtype=np.float32)] * (len(METRICS) - len(values))
+        rows[int(user_id)] = (product_ids, values)
+    user_ids = np.array(sorted(rows), dtype=np.int64)
+    n_users = len(user_ids)
+    counts = np.zeros(n_users, dtype=np.int32)
+    product_ids = np.full((n_users, top_n), -1, dtype=np.int64)
+    metrics = np.zeros((len(METRICS), n_users, top_n), dtype=np.float32)
+    for i, user_id in enumerate(user_ids):
+        ids, values = rows[int(user_id)]
+        counts[i] = len(ids)
+        product_ids[i, :len(ids)] = ids
+        for metric, column in zip(metrics, values):
+            metric[i, :len(column)] = column
+
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, FORMAT_VERSION, n_users, top_n, 0, now)
+    with atomic_write(path, prefix='.recommendations-') as file:
+        for array in (header, user_ids, np.full(n_users, now, dtype=np.float64), counts, product_ids, *metrics):
+            file.write(array.tobytes())
+    return n_users
+
+
+class RecommendationStore:
+    def __init__(self, path, max_age=24 * 3600, check_interval=5):
+        """
+        Lector de recomendaciones precalculadas mapeadas en memoria (solo lectura).
+
+        Todos los workers comparten las páginas del archivo. Cuando el archivo se reemplaza, la
+        siguiente consulta abre el nuevo; las lecturas en curso siguen usando el mapeo anterior.
+
+        :param path: Ruta del archivo generado por ``write_store``
+        :param max_age: Segundos tras los cuales una entrada se considera vencida
+        :param check_interval: Segundos mínimos entre comprobaciones de cambios del archivo
+        """
+        self.path = path
+        self.max_age = max_age
+        self._arrays = None
+        self._watcher = FileWatcher([path], check_interval)
+
+    def _open(self):
+        identity = self._watcher.identity()
+        if identity == self._watcher.loaded:
+            return
+        if identity[0] is None:
+            self._arrays, self._watcher.loaded = None, identity
+            return
+        data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        header = data[:HEADER.itemsize].view(HEADER)[0]
+        if header['magic'] != MAGIC or header['version'] > FORMAT_VERSION:
+            raise ValueError(f"Archivo de recomendaciones inválido: {self.path}")
+        if header['version'] < FORMAT_VERSION:
+            # Un archivo de una versión anterior se ignora hasta que scripts/precompute_recommendations.py lo regenere
+            self._arrays, self._watcher.loaded = None, identity
+            return
+        n_users, top_n = int(header['n_users']), int(header['top_n'])
+        offset = HEADER.itemsize
+        arrays = {'top_n': top_n}
+        columns = [('user_ids', np.int64, n_users), ('computed_at', np.float64, n_users), ('counts', np.int32, n_users),
+                   ('product_ids', np.int64, n_users * top_n)] + [(name, np.float32, n_users * top_n) for name in METRICS]
+        for name, dtype, count in columns:
+            size = np.dtype(dtype).itemsize * count
+            arrays[name] = data[offset:offset + size].view(dtype)
+            offset += size
+        for name in ('product_ids',) + METRICS:
+            arrays[name] = arrays[name].reshape(n_users, top_n)
+        self._arrays = arrays
+        self._watcher.loaded = identity
+
+    def _current(self):
+        try:
+            self._watcher.poll(self._open, force=self._arrays is None)
+        except FileNotFoundError:
+            # El archivo desapareció entre la comprobación y la apertura
+            self._arrays, self._watcher.loaded = None, None
+        return self._arrays
+
+    def get(self, user_id, allow_stale=False, with_metrics=False):
+        """
+        Busca las recomendaciones precalculadas de un usuario.
+
+        :param user_id: ID del usuario
+        :param allow_stale: Si es True, devuelve también entradas vencidas
+        :param with_metrics: Si es True, incluye las similitudes y distancias guardadas
+        :return: Tupla (product_ids, scores, computed_at), o (product_ids, scores, similarities, distances,
+            computed_at) con ``with_metrics``; None si no hay entrada válida
+        """
+        arrays = self._current()
+        if arrays is None:
+            return None
+        user_ids = arrays['user_ids']
+        i = int(np.searchsorted(user_ids, user_id))
+        if i >= len(user_ids) or user_ids[i] != user_id:
+            return None
+        computed_at = float(arrays['computed_at'][i])
+        if not allow_stale and time.time() - computed_at > self.max_age:
+            return None
+        count = int(arrays['counts'][i])
+        names = METRICS if with_metrics else METRICS[:1]
+        return (np.array(arrays['product_ids'][i, :count]),
+                *(np.array(arrays[name][i, :count]) for name in names), computed_at)
+
+    @property
+    def top_n(self):
+        arrays = self._current()
+        return arrays['top_n'] if arrays is not None else 0
@@ -1,19 +1,38 @@
+import asyncio
+import hashlib
+import threading
+import weakref
+from functools import partial
+import httpx
+import numpy as np
 import pandas as pd
-from geopy.distance import geodesic
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import requests
+import scipy.sparse as sp
+from models.catalog import catalog_identity, get_catalog_cache
+from models.geo import distances_km, SpatialIndex
+from models.keyword_index import KeywordIndex
+from models.product_index import ProductIndex
+from models.profile_cache import UserProfile, profile_cache
+from models.ranking import RankingWeights, composite_score, top_k
 
 
 class Recommender:
-    def __init__(self, django_api_base_url):
+    # Índice TF-IDF compartido por todas las instancias del proceso
+    product_index = ProductIndex()
+    # Índices derivados del catálogo (espacial, palabras clave, IDs), reconstruidos solo cuando
+    # cambian las columnas de las que dependen
+    _derived = {}
+    _derived_lock = threading.Lock()
+
+    def __init__(self, django_api_base_url, ranking_weights=None):
         """
         Inicializa el recomendador con configuraciones predeterminadas.
 
         :param django_api_base_url: URL base de la API del backend de Django
+        :param ranking_weights: RankingWeights para la puntuación compuesta (opcional)
         """
-        self.vectorizer = TfidfVectorizer(stop_words='spanish')
         self.api_base_url = django_api_base_url
+        self.ranking_weights = ranking_weights or RankingWeights()
 
     def get_user_data(self, user_id):
         """
@@ -22,63 +41,302 @@ class Recommender:
         :param user_id: ID del usuario
         :return: Tuple (interests, location)
         """
-        url = f'{self.api_base_url}/api/userprofiles/{user_id}/'
-        response = requests.get(url)
-        if response.status_code == 200:
-            user_data = response.json()
-            interests = user_data['interests']
-            location = (user_data['location']['latitude'], user_data['location']['longitude'])
-            return interests, location
-        else:
-            raise Exception("Error al obtener los datos del usuario")
+        profile = self.get_user_profile(user_id)
+        return profile.interests, profile.location
+
+    def get_user_profile(self, user_id):
+        """
+        Obtiene el perfil del usuario desde la caché compartida o, si no está, desde la API de Django.
+
+        :param user_id: ID del usuario
+        :return: UserProfile
+        """
+        key = (self.api_base_url, user_id)
+        profile = profile_cache.get(key)
+        if profile is None:
+            generation = profile_cache.generation()
+            url = f'{self.api_base_url}/api/userprofiles/{user_id}/'
+            response = requests.get(url)
+            if response.status_code != 200:
+                raise Exception("Error al obtener los datos del usuario")
+            profile = UserProfile(user_id, *self.parse_user_data(response.json()))
+            profile_cache.put(key, profile, generation=generation)
+        return profile
+
+    def get_user_profiles(self, user_ids, chunk_size=200):
+        """
+        Obtiene los perfiles de varios usuarios; los que no están en caché se piden en lote con
+        ``/api/userprofiles/?ids=``.
+
+        :param user_ids: Lista de IDs de usuarios
+        :param chunk_size: Máximo de IDs por solicitud
+        :return: Diccionario user_id -> UserProfile; los usuarios inexistentes se omiten
+        """
+        profiles = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            profile = profile_cache.get((self.api_base_url, user_id))
+            if profile is None:
+                missing.append(user_id)
+            else:
+                profiles[user_id] = profile
+        generation = profile_cache.generation()
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            url = f'{self.api_base_url}/api/userprofiles/'
+            response = requests.get(url, params={'ids': ','.join(str(uid) for uid in chunk)})
+            if response.status_code != 200:
+                raise Exception("Error al obtener los datos de los usuarios")
+            for user_data in response.json():
+                profile = UserProfile(user_data['id'], *self.parse_user_data(user_data))
+                profile_cache.put((self.api_base_url, profile.user_id), profile, generation=generation)
+                profiles[profile.user_id] = profile
+        return profiles
+
+    @staticmethod
+    def parse_user_data(user_data):
+        """
+        Extrae intereses y ubicación de un perfil devuelto por la API de Django.
+
+        :param user_data: Diccionario del perfil
+        :return: Tuple (interests, location)
+        """
+        interests = user_data['interests']
+        location = (user_data['location']['latitude'], user_data['location']['longitude'])
+        return interests, location
 
     def get_product_data(self):
         """
-        Obtiene todos los datos de productos desde la API de Django.
+        Obtiene todos los datos de productos desde la caché de catálogo compartida del proceso,
+        que revalida con la API de Django solo cuando vence su TTL.
 
-        :return: DataFrame de productos
+        :return: DataFrame de productos (compartido; no debe modificarse en sitio)
         """
-        url = f'{self.api_base_url}/api/products/'
-        response = requests.get(url)
-        if response.status_code == 200:
-            products = response.json()
-            return pd.DataFrame(products)
-        else:
-            raise Exception("Error al obtener los datos de los productos")
+        return get_catalog_cache(self.api_base_url).get().frame
+
+    @staticmethod
+    def catalog_key(products_df, columns):
+        """
+        Identifica el contenido de un catálogo para reutilizar índices derivados de él.
+
+        :param products_df: DataFrame de productos
+        :param columns: Columnas de las que depende el índice
+        :return: Origen y versión del catálogo en caché o un hash de las columnas indicadas
+        """
+        key = catalog_identity(products_df)
+        if key is None:
+            hashed = pd.util.hash_pandas_object(products_df[columns], index=False)
+            key = hashlib.blake2b(hashed.to_numpy().tobytes(), digest_size=16).hexdigest()
+        return key
+
+    def derived_index(self, name, products_df, columns, build):
+        """
+        Devuelve un índice derivado del catálogo compartido por el proceso, reconstruyéndolo solo
+        si cambiaron las columnas de las que depende.
+
+        :param name: Nombre del índice
+        :param products_df: DataFrame de productos
+        :param columns: Columnas de las que depende el índice
+        :param build: Función que construye el índice a partir del DataFrame
+        :return: Índice construido por ``build``
+        """
+        key = self.catalog_key(products_df, columns)
+        # Un índice por backend, así dos catálogos usados a la vez no se reconstruyen mutuamente
+        slot = (self.api_base_url, name)
+        with Recommender._derived_lock:
+            cached = Recommender._derived.get(slot)
+            if cached is None or cached[0] != key:
+                cached = Recommender._derived[slot] = (key, build(products_df))
+            return cached[1]
 
-    def recommend(self, user_id, top_n=5):
+    def get_spatial_index(self, products_df):
+        """
+        Devuelve el índice espacial del catálogo, reconstruyéndolo solo si cambiaron las coordenadas.
+
+        :param products_df: DataFrame de productos
+        :return: SpatialIndex
+        """
+        return self.derived_index('spatial', products_df, ['latitude', 'longitude'], SpatialIndex.from_products)
+
+    def get_keyword_index(self, products_df):
+        """
+        Devuelve el índice invertido de palabras clave, reconstruyéndolo solo si cambiaron las descripciones.
+
+        :param products_df: DataFrame de productos
+        :return: KeywordIndex
+        """
+        return self.derived_index('keyword', products_df, ['description'],
+                                  lambda df: KeywordIndex(df['description'].tolist()))
+
+    def get_id_index(self, products_df):
+        """
+        Devuelve un índice de pandas sobre los IDs del catálogo para ubicar productos por ID.
+
+        :param products_df: DataFrame de productos
+        :return: pandas.Index
+        """
+        return self.derived_index('ids', products_df, ['id'], lambda df: pd.Index(df['id']))
+
+    def recommend(self, user_id, top_n=5, exact_distances=False, max_distance_km=None):
         """
         Recomienda productos basados en el ID del usuario.
 
         :param user_id: ID del usuario
         :param top_n: Número máximo de recomendaciones a devolver (por defecto 5)
+        :param exact_distances: Si es True, recalcula con distancia geodésica exacta solo los N seleccionados
+        :param max_distance_km: Radio máximo de búsqueda en kilómetros (None para todo el catálogo)
         :return: DataFrame de productos recomendados
         """
-        interests, user_location = self.get_user_data(user_id)
+        profile = self.get_user_profile(user_id)
         products_df = self.get_product_data()
+        self.product_index.sync(products_df)
+        return self.rank_products(products_df, profile.interests, profile.location, top_n=top_n,
+                                  interest_tokens=profile.interest_tokens, exact_distances=exact_distances, max_distance_km=max_distance_km)
+
+    def recommend_many(self, user_ids, top_n=5, max_distance_km=None, chunk_size=256):
+        """
+        Recomienda productos para muchos usuarios con una sola descarga del catálogo.
 
-        # Filtrar productos según intereses
-        filtered_products = self.filter_by_interests(products_df, interests)
+        Las similitudes de cada bloque de usuarios se calculan con un único producto de matrices
+        dispersas contra el índice TF-IDF; el filtrado y el ranking son los mismos de ``recommend``.
+
+        :param user_ids: Lista de IDs de usuarios
+        :param top_n: Número máximo de recomendaciones por usuario
+        :param max_distance_km: Radio máximo de búsqueda en kilómetros (None para todo el catálogo)
+        :param chunk_size: Usuarios por bloque de cálculo
+        :return: Generador de tuplas (user_id, DataFrame de recomendaciones o None si no existe el perfil)
+        """
+        user_ids = list(user_ids)
+        profiles = self.get_user_profiles(user_ids)
+        products_df = self.get_product_data()
+        self.product_index.sync(products_df)
+        product_ids = products_df['id'].tolist()
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            known = [uid for uid in chunk if uid in profiles]
+            queries = [' '.join(profiles[uid].interests) for uid in known]
+            similarities = self.product_index.similarity_many(queries, product_ids)
+            rows = {uid: row for row, uid in enumerate(known)}
+            for uid in chunk:
+                if uid not in profiles:
+                    yield uid, None
+                    continue
+                profile = profiles[uid]
+                yield uid, self.rank_products(products_df, profile.interests, profile.location, top_n=top_n,
+                                              interest_tokens=profile.interest_tokens,
+                                              max_distance_km=max_distance_km,
+                                              similarity=similarities[rows[uid]])
+
+    def recommend_precomputed(self, user_id, store, top_n=5, products_df=None):
+        """
+        Sirve recomendaciones precalculadas desde un RecommendationStore, uniéndolas con el catálogo.
+
+        El resultado tiene las mismas columnas que ``recommend`` (similarity, distance, rating y score).
+        Si faltan productos eliminados después del cálculo y ya no alcanzan para ``top_n``, se devuelve
+        None para que el llamador recurra al ranking en vivo.
+
+        :param user_id: ID del usuario
+        :param store: RecommendationStore
+        :param top_n: Número máximo de recomendaciones a devolver
+        :param products_df: Catálogo ya obtenido (por defecto se lee de la caché)
+        :return: DataFrame de productos recomendados, o None si no hay entrada vigente y completa
+        """
+        entry = self._precomputed_entry(user_id, store, top_n)
+        if entry is None:
+            return None
+        if products_df is None:
+            products_df = self.get_product_data()
+        return self._join_precomputed(entry, products_df, top_n)
+
+    @staticmethod
+    def _precomputed_entry(user_id, store, top_n):
+        if top_n > store.top_n:
+            return None
+        entry = store.get(user_id, with_metrics=True)
+        # Archivos escritos sin similitudes ni distancias no pueden reproducir la respuesta en vivo
+        if entry is None or np.isnan(entry[2]).any() or np.isnan(entry[3]).any():
+            return None
+        return entry
+
+    def _join_precomputed(self, entry, products_df, top_n):
+        product_ids, scores, similarities, distances, _ = entry
+        positions = self.get_id_index(products_df).get_indexer(product_ids)
+        present = positions >= 0
+        if present.sum() < min(top_n, len(product_ids)):
+            return None
+        selected = np.flatnonzero(present)[:top_n]
+        recommended_products = products_df.iloc[positions[selected]].copy()
+        recommended_products['similarity'] = similarities[selected].astype(np.float64)
+        recommended_products['distance'] = distances[selected].astype(np.float64)
+        recommended_products['rating'] = recommended_products.get('rating', [0] * len(recommended_products))
+        recommended_products['score'] = scores[selected].astype(np.float64)
+        return recommended_products
+
+    def rank_products(self, products_df, interests, user_location, top_n=5, exact_distances=False,
+                      max_distance_km=None, similarity=None, interest_tokens=None):
+        """
+        Filtra, puntúa y selecciona los mejores productos del catálogo para un usuario.
+
+        :param products_df: DataFrame del catálogo completo
+        :param interests: Lista de intereses del usuario
+        :param user_location: Tupla (latitud, longitud) del usuario
+        :param top_n: Número máximo de recomendaciones a devolver
+        :param exact_distances: Si es True, recalcula con distancia geodésica exacta solo los N seleccionados
+        :param max_distance_km: Radio máximo de búsqueda en kilómetros (None para todo el catálogo)
+        :param similarity: Similitudes ya calculadas, alineadas con las filas de ``products_df``; puede ser
+            una fila dispersa de ``ProductIndex.similarity_many`` (opcional)
+        :param interest_tokens: Intereses ya tokenizados del perfil en caché (opcional)
+        :return: DataFrame de productos recomendados
+        """
+        # Filtrar productos según intereses (posiciones ordenadas, sin copiar el catálogo)
+        positions = self.interest_positions(products_df, interests if interest_tokens is None else interest_tokens)
+
+        # Limitar los candidatos a los productos dentro del radio indicado
+        if max_distance_km is not None:
+            nearby = self.get_spatial_index(products_df).query_radius(user_location, max_distance_km)
+            positions = np.intersect1d(positions, nearby, assume_unique=True)
+        filtered_products = products_df.iloc[positions].copy()
 
         # Calcular similitudes de productos
-        filtered_products['similarity'] = self.calculate_similarity(filtered_products['description'])
+        if similarity is None:
+            filtered_products['similarity'] = self.calculate_similarity(filtered_products['id'], interests)
+        elif sp.issparse(similarity):
+            # Solo se densifican las columnas de los candidatos
+            filtered_products['similarity'] = similarity[:, positions].toarray().ravel()
+        else:
+            filtered_products['similarity'] = np.asarray(similarity)[positions]
 
-        # Calcular distancias desde la ubicación del usuario
-        filtered_products['distance'] = filtered_products.apply(
-            lambda row: geodesic(user_location, (row['latitude'], row['longitude'])).kilometers,
-            axis=1
+        # Calcular distancias desde la ubicación del usuario (haversine vectorizado para el ranking)
+        filtered_products['distance'] = distances_km(
+            user_location, filtered_products['latitude'].to_numpy(), filtered_products['longitude'].to_numpy()
         )
 
-        # Filtrar productos con mejor puntuación
         filtered_products['rating'] = filtered_products.get('rating', [0] * len(
             filtered_products))  # Asume una columna de rating opcional
-        filtered_products = filtered_products.sort_values(by=['rating'], ascending=False)
 
-        # Ordenar productos por similitud, luego por distancia, luego por precio
-        recommended_products = filtered_products.sort_values(by=['similarity', 'distance', 'price'])
+        # Puntuación compuesta y selección de los primeros N sin ordenar todo el catálogo
+        filtered_products['score'] = composite_score(
+            filtered_products['similarity'].to_numpy(), filtered_products['distance'].to_numpy(),
+            filtered_products['price'].to_numpy(dtype=float), filtered_products['rating'].to_numpy(dtype=float),
+            self.ranking_weights
+        )
+        top_positions = top_k(filtered_products['score'].to_numpy(), top_n, filtered_products['id'].to_numpy())
+        recommended_products = filtered_products.iloc[top_positions].copy()
+        if exact_distances:
+            recommended_products['distance'] = self.refine_distances(recommended_products, user_location)
+        return recommended_products
+
+    def refine_distances(self, products_df, user_location):
+        """
+        Recalcula la distancia geodésica exacta para un conjunto reducido de productos.
 
-        # Seleccionar los primeros N productos
-        return recommended_products.head(top_n)
+        :param products_df: DataFrame con los productos seleccionados
+        :param user_location: Tupla (latitud, longitud) del usuario
+        :return: Arreglo de distancias en kilómetros
+        """
+        return distances_km(user_location, products_df['latitude'].to_numpy(), products_df['longitude'].to_numpy(),
+                            mode='geodesic')
 
     def filter_by_interests(self, products_df, interests):
         """
@@ -88,20 +346,126 @@ class Recommender:
         :param interests: Lista de intereses
         :return: DataFrame filtrado
         """
-        interests = set(interests)
-        return products_df[products_df['description'].apply(
-            lambda desc: any(interest in desc for interest in interests)
-        )]
+        return products_df.iloc[self.interest_positions(products_df, interests)].copy()
+
+    def interest_positions(self, products_df, interests):
+        """
+        Devuelve las posiciones de los productos cuya descripción menciona algún interés.
+
+        La coincidencia es por palabras completas, sin distinguir mayúsculas ni tildes, y se
+        resuelve con el índice invertido del catálogo.
+
+        :param products_df: DataFrame de productos
+        :param interests: Lista de intereses o tupla ya tokenizada
+        :return: Arreglo ordenado de posiciones
+        """
+        return self.get_keyword_index(products_df).match(interests)
 
-    def calculate_similarity(self, descriptions):
+    def calculate_similarity(self, product_ids, interests):
         """
-        Calcula la similitud coseno de las descripciones de productos.
+        Calcula la similitud coseno entre los intereses del usuario y las descripciones de productos
+        usando el índice TF-IDF en memoria, sin volver a ajustar el vectorizador.
 
-        :param descriptions: Serie de descripciones de productos
+        :param product_ids: Serie de IDs de productos
+        :param interests: Lista de intereses
         :return: Puntajes de similitud
         """
-        descriptions_matrix = self.vectorizer.fit_transform(descriptions)
-        return cosine_similarity(descriptions_matrix[0:1], descriptions_matrix).flatten()
+        return self.product_index.similarity(' '.join(interests), product_ids.tolist())
+
+
+class AsyncRecommender(Recommender):
+    # Clientes HTTP asíncronos con su pool de conexiones, uno por bucle de eventos: un cliente
+    # httpx queda ligado al bucle en el que abrió sus conexiones
+    _clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_client(cls):
+        """
+        Devuelve el cliente httpx compartido del bucle de eventos actual, creándolo la primera vez.
+
+        :return: httpx.AsyncClient
+        """
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None or client.is_closed:
+            client = cls._clients[loop] = httpx.AsyncClient(
+                timeout=10, limits=httpx.Limits(max_connections=100, max_keepalive_connections=20))
+        return client
+
+    @classmethod
+    async def close_client(cls):
+        """
+        Cierra el cliente HTTP del bucle de eventos actual (al apagar la aplicación).
+        """
+        client = cls._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def aget_user_profile(self, user_id):
+        """
+        Variante asíncrona de ``get_user_profile``.
+
+        :param user_id: ID del usuario
+        :return: UserProfile
+        """
+        key = (self.api_base_url, user_id)
+        profile = profile_cache.get(key)
+        if profile is None:
+            generation = profile_cache.generation()
+            url = f'{self.api_base_url}/api/userprofiles/{user_id}/'
+            response = await self.get_client().get(url)
+            if response.status_code != 200:
+                raise Exception("Error al obtener los datos del usuario")
+            profile = UserProfile(user_id, *self.parse_user_data(response.json()))
+            profile_cache.put(key, profile, generation=generation)
+        return profile
+
+    async def aget_product_data(self):
+        """
+        Variante asíncrona de ``get_product_data``.
+
+        :return: DataFrame de productos (compartido; no debe modificarse en sitio)
+        """
+        return (await get_catalog_cache(self.api_base_url).aget(self.get_client())).frame
+
+    async def arecommend(self, user_id, top_n=5, exact_distances=False, max_distance_km=None):
+        """
+        Variante asíncrona de ``recommend``: el perfil y el catálogo se piden en paralelo y el
+        cálculo se ejecuta en un hilo para no bloquear el bucle de eventos.
+
+        :param user_id: ID del usuario
+        :param top_n: Número máximo de recomendaciones a devolver (por defecto 5)
+        :param exact_distances: Si es True, recalcula con distancia geodésica exacta solo los N seleccionados
+        :param max_distance_km: Radio máximo de búsqueda en kilómetros (None para todo el catálogo)
+        :return: DataFrame de productos recomendados
+        """
+        profile, products_df = await asyncio.gather(self.aget_user_profile(user_id), self.aget_product_data())
+        return await asyncio.get_running_loop().run_in_executor(None, partial(
+            self._score, products_df, profile.interests, profile.location, top_n=top_n,
+            interest_tokens=profile.interest_tokens, exact_distances=exact_distances, max_distance_km=max_distance_km
+        ))
+
+    async def arecommend_precomputed(self, user_id, store, top_n=5):
+        """
+        Variante asíncrona de ``recommend_precomputed``: la unión con el catálogo (y la construcción
+        del índice de IDs si cambió) se ejecuta en un hilo.
+
+        :param user_id: ID del usuario
+        :param store: RecommendationStore
+        :param top_n: Número máximo de recomendaciones a devolver
+        :return: DataFrame de productos recomendados, o None si no hay entrada vigente y completa
+        """
+        entry = self._precomputed_entry(user_id, store, top_n)
+        if entry is None:
+            return None
+        products_df = await self.aget_product_data()
+        return await asyncio.get_running_loop().run_in_executor(None, partial(
+            self._join_precomputed, entry, products_df, top_n
+        ))
+
+    def _score(self, products_df, interests, user_location, **kwargs):
+        self.product_index.sync(products_df)
+        return self.rank_products(products_df, interests, user_location, **kwargs)
 
 
 # Ejemplo de uso
@@ -0,0 +1,319 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from models.geo import (bin_cells, cell_centers, cell_ids_from_indices, coarsen_cells, grid_cell_ids, grid_indices,
+                        valid_locations)
+
+# Tamaño en grados de las celdas de ubicación (~110 m en latitud)
+LOCATION_CELL_DEGREES = 0.001
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (
+    user_id INTEGER PRIMARY KEY,
+    last_sale_id INTEGER NOT NULL,
+    sale_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_sales (
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    sales_amount REAL NOT NULL,
+    PRIMARY KEY (user_id, date)
+);
+CREATE TABLE IF NOT EXISTS hourly_sales (
+    user_id INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    sales_amount REAL NOT NULL,
+    PRIMARY KEY (user_id, hour)
+);
+CREATE TABLE IF NOT EXISTS location_sales (
+    user_id INTEGER NOT NULL,
+    lat_cell INTEGER NOT NULL,
+    lon_cell INTEGER NOT NULL,
+    sales_amount REAL NOT NULL,
+    PRIMARY KEY (user_id, lat_cell, lon_cell)
+);
+"""
+
+
+def location_cells(latitudes, longitudes, cell_degrees=LOCATION_CELL_DEGREES):
+    """
+    Calcula los índices enteros de la celda de la grilla que contiene cada coordenada.
+
+    :param latitudes: Arreglo de latitudes
+    :param longitudes: Arreglo de longitudes
+    :param cell_degrees: Tamaño de la celda en grados (uno de ``GRID_RESOLUTIONS``)
+    :return: Tupla de arreglos int64 (celda de latitud, celda de longitud)
+    """
+    return grid_indices(latitudes, longitudes, cell_degrees)
+
+
+def location_frame(latitudes, longitudes, amounts, resolution=None):
+    """
+    Arma el DataFrame de ventas por ubicación con las columnas de ``MarketAnalysis.generate_statistics``.
+
+    :param latitudes: Arreglo de latitudes
+    :param longitudes: Arreglo de longitudes
+    :param amounts: Arreglo de montos
+    :param resolution: Tamaño de celda en grados de las ubicaciones; se guarda en ``attrs['resolution']``
+    :return: DataFrame con 'buyer_latitude', 'buyer_longitude' y 'sales_amount'
+    """
+    frame = pd.DataFrame({
+        'buyer_latitude': np.asarray(latitudes, dtype=np.float64),
+        'buyer_longitude': np.asarray(longitudes, dtype=np.float64),
+        'sales_amount': np.asarray(amounts, dtype=np.float64),
+    })
+    frame.attrs['resolution'] = resolution
+    return frame
+
+
+def aggregate_sales(df, cell_degrees=LOCATION_CELL_DEGREES):
+    """
+    Suma las ventas procesadas por día, por hora y por celda de ubicación.
+
+    :param df: DataFrame procesado por ``MarketAnalysis.process_data``
+    :param cell_degrees: Tamaño de la celda de ubicación en grados
+    :return: Tupla de DataFrames (diario, por hora, por ubicación)
+    """
+    amounts = df['sales_amount'].to_numpy(dtype=np.float64)
+    daily = pd.Series(amounts).groupby(df['date'].dt.normalize().to_numpy()).sum()
+    daily = pd.DataFrame({'date': pd.DatetimeIndex(daily.index).strftime('%Y-%m-%d'),
+                          'sales_amount': daily.to_numpy()})
+    hourly = pd.Series(amounts).groupby(df['hour'].to_numpy()).sum()
+    hourly = pd.DataFrame({'hour': hourly.index.astype(np.int64), 'sales_amount': hourly.to_numpy()})
+    # Las ventas sin ubicación cuentan en los totales diarios y por hora, pero no tienen celda
+    latitudes, longitudes = df['buyer_latitude'].to_numpy(), df['buyer_longitude'].to_numpy()
+    valid = valid_locations(latitudes, longitudes)
+    lat_cells, lon_cells = location_cells(latitudes[valid], longitudes[valid], cell_degrees)
+    location = pd.DataFrame({'lat_cell': lat_cells, 'lon_cell': lon_cells, 'sales_amount': amounts[valid]})
+    location = location.groupby(['lat_cell', 'lon_cell'], as_index=False)['sales_amount'].sum()
+    return daily, hourly, location
+
+
+class SalesStatistics:
+    def __init__(self, compact_rows=100000, location_resolution=None, max_location_cells=None):
+        """
+        Acumula por lotes las mismas sumas que ``MarketAnalysis.generate_statistics``.
+
+        Cada lote se agrupa al llegar y solo se guardan sus sumas parciales; cuando estas superan
+        ``compact_rows`` filas se combinan en una sola. La memoria queda acotada por el tamaño del
+        lote y el número de grupos distintos, no por el número de ventas.
+
+        :param compact_rows: Filas parciales acumuladas antes de combinarlas
+        :param location_resolution: Tamaño de celda en grados para agrupar ubicaciones; None agrupa
+            por coordenadas exactas
+        :param max_location_cells: Número máximo de celdas de ubicación (ver ``models.geo.bin_cells``)
+        """
+        self.compact_rows = compact_rows
+        self.location_resolution = location_resolution
+        self.max_location_cells = max_location_cells
+        self._partials = {'daily': [], 'hourly': [], 'location': []}
+        self._rows = 0
+        self.sales = 0
+
+    def add(self, df):
+        """
+        Suma un lote de ventas procesadas por ``MarketAnalysis.process_data``.
+
+        :param df: DataFrame procesado
+        """
+        if df.empty:
+            return
+        amounts = df['sales_amount']
+        # Los días se agrupan como datetime64; pasar a datetime.date por fila es lo más caro
+        daily = amounts.groupby(df['date'].dt.normalize().rename('date')).sum()
+        hourly = amounts.groupby(df['hour']).sum()
+        if self.location_resolution is None:
+            location = amounts.groupby([df['buyer_latitude'], df['buyer_longitude']]).sum()
+        else:
+            latitudes, longitudes = df['buyer_latitude'].to_numpy(), df['buyer_longitude'].to_numpy()
+            valid = valid_locations(latitudes, longitudes)
+            location = amounts[valid].groupby(grid_cell_ids(latitudes[valid], longitudes[valid],
+                                                            self.location_resolution)).sum()
+        for key, partial in (('daily', daily), ('hourly', hourly), ('location', location)):
+            self._partials[key].append(partial)
+            self._rows += len(partial)
+        self.sales += len(df)
+        if self._rows > self.compact_rows:
+            self._compact()
+
+    def _compact(self):
+        self._rows = 0
+        for key, partials in self._partials.items():
+            if len(partials) > 1:
+                levels = list(range(partials[0].index.nlevels))
+                partials[:] = [pd.concat(partials).groupby(level=levels).sum()]
+            self._rows += sum(len(partial) for partial in partials)
+
+    def result(self):
+        """
+        Devuelve las estadísticas acumuladas con la forma de ``MarketAnalysis.generate_statistics``.
+
+        :return: Tupla (ventas diarias, ventas por hora, ventas por ubicación)
+        """
+        self._compact()
+        if not self.sales:
+            empty = pd.Series(dtype=np.float64, name='sales_amount')
+            return (empty.rename_axis('date'), empty.rename_axis('hour'),
+                    location_frame([], [], [], self.location_resolution))
+        daily, hourly, location = (self._partials[key][0] for key in ('daily', 'hourly', 'location'))
+        daily = daily.set_axis(pd.Index(daily.index.date, name='date'))
+        if self.location_resolution is None:
+            location = location.reset_index()
+            location.attrs['resolution'] = None
+            return daily, hourly, location
+        cells, totals, resolution = bin_cells(location.index.to_numpy(), location.to_numpy(),
+                                              self.location_resolution, self.max_location_cells)
+        return daily, hourly, location_frame(*cell_centers(cells, resolution), totals, resolution)
+
+
+class MissingSaleIdError(ValueError):
+    """
+    Las ventas no traen el ID que los agregados incrementales usan como cursor.
+    """
+
+
+class SalesAggregateStore:
+    def __init__(self, path, cell_degrees=LOCATION_CELL_DEGREES):
+        """
+        Agregados de ventas por vendedor guardados en SQLite, actualizados de forma incremental.
+
+        Por cada vendedor se guarda el ID de la última venta incorporada (cursor). Solo las ventas
+        con ID mayor se suman a los agregados diarios, por hora y por celda de ubicación, en la
+        misma transacción que avanza el cursor; así una venta nunca se cuenta dos veces, aunque dos
+        análisis del mismo vendedor corran a la vez.
+
+        :param path: Ruta del archivo SQLite
+        :param cell_degrees: Tamaño de la celda de ubicación en grados
+        """
+        self.path = path
+        self.cell_degrees = cell_degrees
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # Una conexión por hilo; sqlite3 no permite compartirlas entre hilos
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self, write=False):
+        return _Transaction(self._connect(), write)
+
+    def cursor(self, user_id):
+        """
+        Devuelve el ID de la última venta incorporada para el vendedor.
+
+        :param user_id: ID del vendedor
+        :return: ID de la venta o None si todavía no hay agregados
+        """
+        with self._transaction() as connection:
+            row = connection.execute('SELECT last_sale_id FROM cursors WHERE user_id = ?', (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def version(self, user_id):
+        """
+        Versión de los agregados del vendedor: cambia cada vez que ``merge`` incorpora ventas.
+
+        Solo lee el cursor, así que sirve para validar cachés sin leer los agregados.
+
+        :param user_id: ID del vendedor
+        :return: Tupla (ID de la última venta, número de ventas) o None si todavía no hay agregados
+        """
+        with self._transaction() as connection:
+            row = connection.execute('SELECT last_sale_id, sale_count FROM cursors WHERE user_id = ?',
+                                     (user_id,)).fetchone()
+        return tuple(row) if row else None
+
+    def merge(self, user_id, df):
+        """
+        Suma a los agregados las ventas procesadas con ID mayor que el cursor y lo avanza.
+
+        :param user_id: ID del vendedor
+        :param df: DataFrame procesado por ``MarketAnalysis.process_data`` con la columna 'id'
+        :return: Número de ventas incorporadas
+        """
+        # Sin el ID de cada venta no hay cursor y una venta podría sumarse dos veces
+        if 'id' not in df.columns:
+            raise MissingSaleIdError("Las ventas no tienen la columna 'id'; los agregados incrementales la "
+                                     "necesitan. Use MarketAnalysis sin almacén de agregados")
+        if df['id'].isna().any():
+            raise MissingSaleIdError("Hay ventas sin 'id'; los agregados incrementales necesitan el ID de cada venta")
+        with self._transaction(write=True) as connection:
+            row = connection.execute('SELECT last_sale_id, sale_count FROM cursors WHERE user_id = ?',
+                                     (user_id,)).fetchone()
+            last_sale_id, sale_count = row if row else (None, 0)
+            if last_sale_id is not None:
+                df = df[df['id'].to_numpy() > last_sale_id]
+            if df.empty:
+                return 0
+            daily, hourly, location = aggregate_sales(df, self.cell_degrees)
+            connection.executemany(
+                'INSERT INTO daily_sales VALUES (?, ?, ?) ON CONFLICT (user_id, date) '
+                'DO UPDATE SET sales_amount = sales_amount + excluded.sales_amount',
+                ((user_id, date, float(amount)) for date, amount in zip(daily['date'], daily['sales_amount'])))
+            connection.executemany(
+                'INSERT INTO hourly_sales VALUES (?, ?, ?) ON CONFLICT (user_id, hour) '
+                'DO UPDATE SET sales_amount = sales_amount + excluded.sales_amount',
+                ((user_id, int(hour), float(amount)) for hour, amount in zip(hourly['hour'], hourly['sales_amount'])))
+            connection.executemany(
+                'INSERT INTO location_sales VALUES (?, ?, ?, ?) ON CONFLICT (user_id, lat_cell, lon_cell) '
+                'DO UPDATE SET sales_amount = sales_amount + excluded.sales_amount',
+                ((user_id, int(lat), int(lon), float(amount))
+                 for lat, lon, amount in zip(location['lat_cell'], location['lon_cell'], location['sales_amount'])))
+            connection.execute(
+                'INSERT INTO cursors VALUES (?, ?, ?) ON CONFLICT (user_id) '
+                'DO UPDATE SET last_sale_id = excluded.last_sale_id, sale_count = excluded.sale_count',
+                (user_id, int(df['id'].max()), sale_count + len(df)))
+            return len(df)
+
+    def statistics(self, user_id, resolution=None, max_cells=None):
+        """
+        Lee los agregados de un vendedor con la misma forma que ``MarketAnalysis.generate_statistics``.
+
+        Las ubicaciones se devuelven como el centro de cada celda, agrupadas en ``resolution``. El
+        almacén no guarda coordenadas exactas: ``resolution=None`` significa celdas de ``cell_degrees``,
+        no las coordenadas exactas de ``MarketAnalysis(location_resolution=None)``.
+
+        :param user_id: ID del vendedor
+        :param resolution: Tamaño de celda en grados, igual o mayor que ``cell_degrees`` (None usa este)
+        :param max_cells: Número máximo de celdas de ubicación (ver ``models.geo.bin_cells``)
+        :return: Tupla (ventas diarias, ventas por hora, ventas por ubicación)
+        """
+        with self._transaction() as connection:
+            daily = connection.execute('SELECT date, sales_amount FROM daily_sales WHERE user_id = ? ORDER BY date',
+                                       (user_id,)).fetchall()
+            hourly = connection.execute('SELECT hour, sales_amount FROM hourly_sales WHERE user_id = ? ORDER BY hour',
+                                        (user_id,)).fetchall()
+            location = connection.execute(
+                'SELECT lat_cell, lon_cell, sales_amount FROM location_sales WHERE user_id = ?', (user_id,)).fetchall()
+        daily_sales = pd.Series([amount for _, amount in daily], index=[date for date, _ in daily], dtype=np.float64)
+        hourly_sales = pd.Series([amount for _, amount in hourly], index=[hour for hour, _ in hourly],
+                                 dtype=np.float64)
+        rows = np.array(location, dtype=np.float64).reshape(-1, 3)
+        resolution = resolution or self.cell_degrees
+        cells = cell_ids_from_indices(rows[:, 0].astype(np.int64), rows[:, 1].astype(np.int64), self.cell_degrees)
+        cells, totals, resolution = bin_cells(coarsen_cells(cells, self.cell_degrees, resolution), rows[:, 2],
+                                              resolution, max_cells)
+        return daily_sales, hourly_sales, location_frame(*cell_centers(cells, resolution), totals, resolution)
+
+
+class _Transaction:
+    def __init__(self, connection, write):
+        self.connection = connection
+        self.write = write
+
+    def __enter__(self):
+        # Las escrituras toman el bloqueo (BEGIN IMMEDIATE) antes de leer el cursor
+        self.connection.execute('BEGIN IMMEDIATE' if self.write else 'BEGIN')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,14 @@
+import argparse
+import time
+from models.chatbot_store import build_chatbot_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila el CSV del asistente en un almacén binario mapeable.")
+    parser.add_argument('--csv', default='api/endpoints/asistente.csv')
+    parser.add_argument('--output', default='models/chatbot.bin')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = build_chatbot_store(args.csv, args.output)
+    print(f"{written} preguntas escritas en {args.output} en {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,46 @@
+import argparse
+import time
+import numpy as np
+from data.data_splitting import DataSplitter
+from models.market_analysis import LOCATION_RESOLUTION
+from models.platform_analytics import (iter_api_sales, platform_statistics, process_sales_rows, read_sales_chunks,
+                                       write_platform_statistics)
+
+
+def sales_chunks(source, api_url, table, chunksize):
+    """
+    Devuelve los bloques de ventas procesadas de todos los vendedores.
+
+    :param source: 'db' (conexión de ``DataSplitter``) o 'api' (endpoint /sales/ paginado)
+    :param api_url: URL del API de Django
+    :param table: Tabla de ventas en la base de datos
+    :param chunksize: Ventas por bloque o página
+    :return: Generador de DataFrames procesados
+    """
+    if source == 'api':
+        yield from iter_api_sales(api_url, page_size=chunksize)
+        return
+    splitter = DataSplitter(None, table, None, load=False)
+    try:
+        for chunk in read_sales_chunks(splitter.connection, table, chunksize):
+            yield process_sales_rows(chunk)
+    finally:
+        splitter.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula las estadísticas de ventas de todos los vendedores.")
+    parser.add_argument('--source', choices=('db', 'api'), default='db')
+    parser.add_argument('--api-url', default='http://localhost:8000')  # URL de la API desarrollada en Django
+    parser.add_argument('--table', default='sales')
+    parser.add_argument('--chunksize', type=int, default=500000)
+    parser.add_argument('--resolution', type=float, default=LOCATION_RESOLUTION)
+    parser.add_argument('--output', default='models/platform_statistics.npz')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    statistics = platform_statistics(sales_chunks(args.source, args.api_url, args.table, args.chunksize),
+                                     args.resolution)
+    write_platform_statistics(args.output, statistics)
+    sellers = len(np.unique(statistics['daily_user_id']))
+    print(f"{sellers} vendedores escritos en {args.output} en {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,57 @@
+import argparse
+import time
+import requests
+from models.recommendation_store import write_store
+from models.recommender import Recommender
+
+
+def fetch_user_ids(api_base_url):
+    """
+    Obtiene los IDs de todos los perfiles de usuario desde la API de Django.
+
+    :param api_base_url: URL base de la API del backend de Django
+    :return: Lista de IDs de usuarios
+    """
+    response = requests.get(f'{api_base_url}/api/userprofiles/')
+    if response.status_code == 200:
+        return [profile['id'] for profile in response.json()]
+    else:
+        raise Exception("Error al obtener los perfiles de usuario desde el API")
+
+
+def precompute_recommendations(api_base_url, output_file, top_n=10):
+    """
+    Calcula las recomendaciones de todos los usuarios y publica el archivo de forma atómica.
+
+    :param api_base_url: URL base de la API del backend de Django
+    :param output_file: Ruta del archivo de recomendaciones
+    :param top_n: Número de recomendaciones por usuario
+    :return: Número de usuarios escritos
+    """
+    recommender = Recommender(api_base_url)
+    user_ids = fetch_user_ids(api_base_url)
+    results = (
+        (user_id, recommendations['id'].to_numpy(), recommendations['score'].to_numpy(),
+         recommendations['similarity'].to_numpy(), recommendations['distance'].to_numpy())
+        for user_id, recommendations in recommender.recommend_many(user_ids, top_n=top_n)
+        if recommendations is not None
+    )
+    return write_store(output_file, results, top_n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precalcula recomendaciones para todos los usuarios.")
+    parser.add_argument('--api-url', default='http://localhost:8000')  # URL de la API desarrollada en Django
+    parser.add_argument('--output', default='models/recommendations.bin')
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--every', type=int, default=0,
+                        help="Segundos entre actualizaciones; 0 ejecuta una sola vez")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        written = precompute_recommendations(args.api_url, args.output, args.top_n)
+        print(f"{written} usuarios escritos en {args.output} en {time.perf_counter() - start:.1f}s")
+        if args.every <= 0:
+            break
+        time.sleep(args.every)
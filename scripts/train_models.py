@@ -4,7 +4,7 @@ from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.linear_model import LinearRegression, LogisticRegression
 from sklearn.svm import SVR, SVC
 import joblib
-from models.model_utils import preprocess_data
+from models.model_utils import build_regression_pipeline, preprocess_data, split_data
 
 
 def fetch_data_from_api(api_url):
@@ -26,12 +26,15 @@ def train_regression_models(api_url, target_column):
     """
     Entrena varios modelos de regresión usando los datos obtenidos desde la API y guarda los modelos entrenados.
 
+    Cada modelo se guarda con su preprocesamiento y el escalado del objetivo, de modo que
+    ``models.price_model.PriceModel`` recibe los datos crudos y obtiene precios en córdobas.
+
     :param api_url: URL del API para obtener datos
     :param target_column: Nombre de la columna objetivo
     """
-    # Cargar y preprocesar los datos
+    # Cargar y dividir los datos; el escalado y la codificación van dentro de cada modelo
     df = fetch_data_from_api(api_url)
-    X_train, X_test, y_train, y_test = preprocess_data(df, target_column)
+    X_train, X_test, y_train, y_test = split_data(df, target_column)
 
     # Definir modelos
     models = {
@@ -41,7 +44,8 @@ def train_regression_models(api_url, target_column):
     }
 
     for model_name, model in models.items():
-        # Entrenar el modelo
+        # Entrenar el modelo junto con su preprocesamiento
+        model = build_regression_pipeline(model, X_train)
         model.fit(X_train, y_train)
 
         # Guardar el modelo
@@ -0,0 +1,63 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class StubBackend:
+    """
+    Servidor HTTP local que imita rutas del backend de Django para las pruebas.
+
+    Cada ruta es una función ``(query, headers) -> (status, headers, body)`` donde ``body``
+    puede ser un objeto JSON, ``bytes`` o None.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                backend._dispatch(self)
+
+            def do_POST(self):
+                backend._dispatch(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, path):
+        return sum(1 for request_path, _, _ in self.requests if request_path == path)
+
+    def _dispatch(self, handler):
+        parts = urlsplit(handler.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.requests.append((parts.path, query, dict(handler.headers)))
+        route = self.routes.get(parts.path)
+        if route is None:
+            status, headers, body = 404, {}, {'detail': 'Not found'}
+        else:
+            status, headers, body = route(query, handler.headers)
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body or b'')))
+        handler.end_headers()
+        if body:
+            handler.wfile.write(body)
@@ -0,0 +1,76 @@
+import asyncio
+import time
+import unittest
+import pandas as pd
+from models.catalog import get_catalog_cache
+from models.recommender import AsyncRecommender, Recommender
+from stub_backend import StubBackend
+
+DELAY = 0.3
+
+PRODUCTS = [
+    {'id': 1, 'description': 'Hamaca tejida de algodón', 'latitude': 12.13, 'longitude': -86.25, 'price': 900.0},
+    {'id': 2, 'description': 'Café orgánico de Jinotega', 'latitude': 13.09, 'longitude': -85.99, 'price': 150.0},
+    {'id': 3, 'description': 'Hamaca de colores', 'latitude': 11.97, 'longitude': -86.09, 'price': 1200.0},
+]
+PROFILE = {'id': 1, 'interests': ['hamaca'], 'location': {'latitude': 12.1, 'longitude': -86.2}}
+
+
+def slow(body):
+    def route(query, headers):
+        time.sleep(DELAY)
+        return 200, {}, body
+    return route
+
+
+class TestAsyncRecommender(unittest.TestCase):
+    def test_fetches_run_concurrently_and_match_sync_results(self):
+        routes = {'/api/userprofiles/1/': slow(PROFILE), '/api/products/': slow(PRODUCTS)}
+        with StubBackend(routes) as backend:
+            async def run():
+                try:
+                    start = time.perf_counter()
+                    result = await AsyncRecommender(backend.base_url).arecommend(1, top_n=2)
+                    return result, time.perf_counter() - start
+                finally:
+                    await AsyncRecommender.close_client()
+
+            recommendations, elapsed = asyncio.run(run())
+            # Ambas llamadas tardan DELAY; en secuencia serían al menos 2 * DELAY
+            self.assertLess(elapsed, 2 * DELAY)
+            self.assertEqual(recommendations['id'].tolist(), [1, 3])
+            pd.testing.assert_frame_equal(recommendations, Recommender(backend.base_url).recommend(1, top_n=2))
+
+    def test_user_errors_propagate(self):
+        with StubBackend({'/api/products/': slow(PRODUCTS)}) as backend:
+            async def run():
+                try:
+                    return await AsyncRecommender(backend.base_url).arecommend(1)
+                finally:
+                    await AsyncRecommender.close_client()
+
+            with self.assertRaises(Exception):
+                asyncio.run(run())
+
+    def test_client_and_catalog_lock_work_across_event_loops(self):
+        routes = {'/api/userprofiles/1/': slow(PROFILE), '/api/products/': slow(PRODUCTS)}
+        with StubBackend(routes) as backend:
+            get_catalog_cache(backend.base_url).ttl = 0
+
+            async def run(close):
+                # Dos solicitudes simultáneas compiten por el candado de revalidación del catálogo
+                try:
+                    recommender = AsyncRecommender(backend.base_url)
+                    return await asyncio.gather(recommender.arecommend(1, top_n=2), recommender.arecommend(1, top_n=2))
+                finally:
+                    if close:
+                        await AsyncRecommender.close_client()
+
+            # Cada asyncio.run crea un bucle nuevo, como ocurre entre pruebas o al recargar la aplicación
+            first = asyncio.run(run(close=False))
+            second = asyncio.run(run(close=True))
+        for recommendations in first + second:
+            self.assertEqual(recommendations['id'].tolist(), [1, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from models.catalog import CatalogCache
+from stub_backend import StubBackend
+
+
+class TestCatalogCache(unittest.TestCase):
+    def setUp(self):
+        self.products = [
+            {'id': 1, 'description': 'Hamaca tejida', 'latitude': 12.1, 'longitude': -86.2, 'price': 900.0,
+             'updated_at': '2024-07-01T10:00:00Z'},
+            {'id': 2, 'description': 'Café de Jinotega', 'latitude': 13.0, 'longitude': -85.9, 'price': 150.0,
+             'updated_at': '2024-07-01T11:00:00Z'},
+        ]
+        self.etag = '"v1"'
+        self.delta = []
+
+    def products_route(self, query, headers):
+        if 'updated_since' in query:
+            return 200, {}, [p for p in self.delta if p['updated_at'] > query['updated_since']]
+        if headers.get('If-None-Match') == self.etag:
+            return 304, {'ETag': self.etag}, None
+        return 200, {'ETag': self.etag, 'Last-Modified': 'Mon, 01 Jul 2024 11:00:00 GMT'}, self.products
+
+    def test_ttl_hit_does_not_contact_backend(self):
+        with StubBackend({'/api/products/': self.products_route}) as backend:
+            cache = CatalogCache(backend.base_url, ttl=60)
+            first = cache.get()
+            second = cache.get()
+            self.assertIs(first, second)
+            self.assertEqual(backend.count('/api/products/'), 1)
+            self.assertEqual(first.frame['id'].tolist(), [1, 2])
+
+    def test_revalidation_with_etag(self):
+        with StubBackend({'/api/products/': self.products_route}) as backend:
+            cache = CatalogCache(backend.base_url, ttl=0)
+            first = cache.get()
+            second = cache.get()
+            self.assertIs(first, second)
+            self.assertEqual(cache.stats['revalidated'], 1)
+            _, _, headers = backend.requests[-1]
+            self.assertEqual(headers.get('If-None-Match'), self.etag)
+            self.assertEqual(headers.get('If-Modified-Since'), 'Mon, 01 Jul 2024 11:00:00 GMT')
+
+            self.etag = '"v2"'
+            self.products = self.products[:1]
+            third = cache.get()
+            self.assertEqual(third.version, first.version + 1)
+            self.assertEqual(third.frame['id'].tolist(), [1])
+
+    def test_delta_fetch_merges_changes(self):
+        with StubBackend({'/api/products/': self.products_route}) as backend:
+            cache = CatalogCache(backend.base_url, ttl=0, delta=True)
+            first = cache.get()
+            self.assertEqual(first.cursor, '2024-07-01T11:00:00Z')
+
+            self.delta = [
+                {'id': 2, 'description': 'Café de Matagalpa', 'latitude': 12.9, 'longitude': -85.9, 'price': 160.0,
+                 'updated_at': '2024-07-02T09:00:00Z'},
+                {'id': 1, 'deleted': True, 'updated_at': '2024-07-02T09:30:00Z'},
+                {'id': 3, 'description': 'Sombrero de palma', 'latitude': 11.9, 'longitude': -86.1, 'price': 300.0,
+                 'updated_at': '2024-07-02T10:00:00Z'},
+            ]
+            second = cache.get()
+            self.assertEqual(second.version, first.version + 1)
+            self.assertEqual(sorted(second.frame['id'].tolist()), [2, 3])
+            self.assertEqual(second.frame.set_index('id').loc[2, 'description'], 'Café de Matagalpa')
+            self.assertEqual(second.cursor, '2024-07-02T10:00:00Z')
+            self.assertEqual(backend.requests[-1][1], {'updated_since': '2024-07-01T11:00:00Z'})
+
+            # Sin cambios nuevos se conserva la misma instantánea
+            self.assertIs(cache.get(), second)
+            self.assertEqual(cache.stats['delta_fetches'], 2)
+
+    def test_backend_error(self):
+        with StubBackend({}) as backend:
+            cache = CatalogCache(backend.base_url)
+            with self.assertRaises(Exception):
+                cache.get()
+
+
+if __name__ == '__main__':
+    unittest.main()
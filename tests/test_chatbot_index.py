@@ -0,0 +1,99 @@
+import os
+import tempfile
+import time
+import unittest
+from models.chatbot_index import ChatbotIndex, ChatbotIndexLoader, load_questions
+
+CSV = '''question,answer
+"Que es MercaditoNica?", "MercaditoNica es una plataforma que conecta a compradores con vendedores locales, sin intermediarios."
+"Hacen envios?", "Los envios aun no estan disponibles"
+"Como utilizan mis datos?", "Tus datos son usados unicamente por la plataforma."
+"Como publico un producto?", "Desde su perfil de vendedor, en la opcion Publicar."
+'''
+
+
+class TestChatbotIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'asistente.csv')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(CSV)
+        self.index = ChatbotIndex.from_csv(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_quoted_answers_keep_commas(self):
+        dataset = load_questions(self.path)
+        self.assertEqual(dataset['Que es MercaditoNica?'],
+                         'MercaditoNica es una plataforma que conecta a compradores con vendedores locales, '
+                         'sin intermediarios.')
+        self.assertEqual(len(dataset), 4)
+
+    def test_exact_match_ignores_case_accents_and_punctuation(self):
+        answer, score = self.index.answer('¿HACEN ENVÍOS')
+        self.assertEqual(answer, 'Los envios aun no estan disponibles')
+        self.assertEqual(score, 1.0)
+
+    def test_typos_still_match(self):
+        self.assertEqual(self.index.answer('como pubilco un prodcto')[0],
+                         'Desde su perfil de vendedor, en la opcion Publicar.')
+        self.assertEqual(self.index.answer('que es mercadito nica')[0][:13], 'MercaditoNica')
+
+    def test_unrelated_question_is_below_threshold(self):
+        self.assertIsNone(self.index.answer('cuanto cuesta una hamaca'))
+        self.assertIsNone(self.index.answer('???'))
+
+    def test_candidate_pruning_matches_full_scan(self):
+        questions = [f'como compro {word} en {city}' for word in ('cafe', 'queso', 'miel', 'cacao')
+                     for city in ('managua', 'leon', 'granada', 'masaya')]
+        pruned = ChatbotIndex(questions, questions, max_postings=8, candidates=4)
+        full = ChatbotIndex(questions, questions, max_postings=10 ** 9)
+        for query in ('como compro kafe en leon', 'miel granda', 'cacao en masaya'):
+            self.assertEqual(pruned.search(query)[0], full.search(query)[0])
+            self.assertAlmostEqual(pruned.search(query)[1], full.search(query)[1], places=5)
+
+    def test_empty_index(self):
+        self.assertIsNone(ChatbotIndex([], []).answer('hola'))
+
+
+class TestChatbotIndexLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'asistente.csv')
+        self.write(CSV)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        # Fuerza un cambio de mtime aunque la escritura ocurra en el mismo instante
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_watcher_swaps_index_after_edit(self):
+        loader = ChatbotIndexLoader(self.path, check_interval=0)
+        first = loader.current()
+        self.assertIsNone(first.answer('Aceptan tarjeta?'))
+
+        self.write(CSV + '"Aceptan tarjeta?", "Por ahora solo efectivo"\n')
+        deadline = time.monotonic() + 5
+        while loader.current() is first and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(loader.current().answer('aceptan tarjeta')[0], 'Por ahora solo efectivo')
+        self.assertEqual(loader.last_reload['questions'], 5)
+
+    def test_failed_reload_keeps_previous_index(self):
+        loader = ChatbotIndexLoader(self.path, check_interval=3600)
+        first = loader.current()
+        self.write('question,answer\n')
+        with self.assertLogs('models.chatbot_index', level='ERROR'), self.assertRaises(ValueError):
+            loader.reload()
+        self.assertIs(loader.current(), first)
+        self.assertEqual(loader.current().answer('hacen envios')[0], 'Los envios aun no estan disponibles')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from models.chatbot_index import ChatbotIndex, ChatbotIndexLoader
+from models.chatbot_store import ChatbotStore, build_chatbot_store, open_chatbot_index, write_chatbot_store
+
+DATASET = {
+    'Que es MercaditoNica?': 'Una plataforma que conecta a compradores con vendedores locales.',
+    'Hacen envios?': 'Los envios aun no estan disponibles',
+    '¿Cómo publico un producto?': 'Desde su perfil de vendedor, en la opción Publicar.',
+    'Aceptan tarjeta?': 'Por ahora solo efectivo',
+    'Como cambio mi contraseña?': 'En Ajustes, Seguridad.',
+}
+
+
+class TestChatbotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'chatbot.bin')
+        write_chatbot_store(self.path, DATASET)
+        self.store = ChatbotStore(self.path)
+        self.index = ChatbotIndex(DATASET.keys(), DATASET.values())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_keys_are_sorted_and_exact_lookup_uses_them(self):
+        keys = [self.store.key_at(i) for i in range(len(self.store))]
+        self.assertEqual(keys, sorted(keys))
+        self.assertIn('como cambio mi contraseña', keys)
+        self.assertEqual(self.store.answer('COMO CAMBIO MI CONTRASEÑA'), ('En Ajustes, Seguridad.', 1.0))
+        self.assertIsNone(self.store._exact_position('zzz'))
+
+    def test_matches_in_memory_index(self):
+        for query in ('hacen envio', 'como publico producto', 'que es mercadito nica', 'aceptan tarjetas',
+                      'cuanto cuesta una hamaca', '???'):
+            expected = self.index.answer(query)
+            actual = self.store.answer(query)
+            if expected is None:
+                self.assertIsNone(actual)
+            else:
+                self.assertEqual(actual[0], expected[0])
+                self.assertAlmostEqual(actual[1], expected[1], places=5)
+
+    def test_build_from_csv(self):
+        csv_path = os.path.join(self.directory.name, 'asistente.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('question,answer\n"Hacen envios?", "No, por ahora"\n')
+        self.assertEqual(build_chatbot_store(csv_path, self.path), 1)
+        self.assertEqual(ChatbotStore(self.path).answer('hacen envíos')[0], 'No, por ahora')
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            ChatbotStore(self.path)
+
+    def test_loader_swaps_store_after_rebuild(self):
+        loader = ChatbotIndexLoader(self.path, builder=ChatbotStore, check_interval=3600)
+        first = loader.current()
+        write_chatbot_store(self.path, dict(DATASET, **{'Hacen envios?': 'Ya hacemos envios'}))
+        loader.reload()
+        self.assertEqual(loader.current().answer('hacen envios')[0], 'Ya hacemos envios')
+        # Las consultas en curso siguen leyendo el archivo anterior mapeado en memoria
+        self.assertEqual(first.answer('hacen envios')[0], 'Los envios aun no estan disponibles')
+
+    def test_loader_falls_back_to_newer_csv(self):
+        csv_path = os.path.join(self.directory.name, 'asistente.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('question,answer\n"Hacen envios?", "Los envios aun no estan disponibles"\n')
+        build_chatbot_store(csv_path, self.path)
+        loader = ChatbotIndexLoader(self.path, watch=[csv_path], check_interval=3600,
+                                    builder=lambda path, threshold: open_chatbot_index(path, csv_path, threshold))
+        self.assertIsInstance(loader.current(), ChatbotStore)
+
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('question,answer\n"Hacen envios?", "Ya hacemos envios"\n')
+        # Fuerza un mtime posterior al del almacén aunque la escritura ocurra en el mismo instante
+        stat = os.stat(self.path)
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertTrue(loader._watcher.changed())
+        with self.assertLogs('models.chatbot_store', level='WARNING'):
+            loader.reload()
+        self.assertIsInstance(loader.current(), ChatbotIndex)
+        self.assertEqual(loader.current().answer('hacen envios')[0], 'Ya hacemos envios')
+
+        # Al recompilar el almacén se vuelve a usar
+        build_chatbot_store(csv_path, self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+        loader.reload()
+        self.assertIsInstance(loader.current(), ChatbotStore)
+        self.assertEqual(loader.current().answer('hacen envios')[0], 'Ya hacemos envios')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from models.cost_cache import ProductCostCache
+from models.pricing import PricingCalculator
+from stub_backend import StubBackend
+
+
+class TestProductCostCache(unittest.TestCase):
+    def setUp(self):
+        self.record = {
+            'material_cost_per_unit': 5.0,
+            'quantity_per_unit': 100,
+            'price_per_unit': 10.0,
+            'transport_cost': 50.0,
+            'labor_cost': 100.0,
+            'material_costs': 200.0,
+            'other_expenses': 150.0,
+            'earnings_percentage': None
+        }
+        self.delay = 0.0
+
+    def product_route(self, query, headers):
+        time.sleep(self.delay)
+        return 200, {}, dict(self.record)
+
+    def wait_for(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_calculator_reads_through_cache(self):
+        cache = ProductCostCache(ttl=60)
+        with StubBackend({'/api/products/1/': self.product_route}) as backend, \
+                patch('models.pricing.DJANGO_API_BASE_URL', backend.base_url), \
+                patch('models.pricing.product_cost_cache', cache):
+            first = PricingCalculator(product_id=1)
+            second = PricingCalculator(product_id=1)
+            self.assertEqual(first.suggest_price(), second.suggest_price())
+            self.assertEqual(backend.count('/api/products/1/'), 1)
+            self.assertEqual(cache.stats()['hit_ratio'], 0.5)
+
+    def test_stale_entry_served_while_refreshing(self):
+        cache = ProductCostCache(ttl=0, stale_ttl=60)
+        with StubBackend({'/api/products/1/': self.product_route}) as backend, \
+                patch('models.pricing.DJANGO_API_BASE_URL', backend.base_url), \
+                patch('models.pricing.product_cost_cache', cache):
+            self.assertEqual(PricingCalculator(product_id=1).labor_cost, 100.0)
+            self.record['labor_cost'] = 300.0
+            self.delay = 0.2
+            started = time.monotonic()
+            stale = PricingCalculator(product_id=1)
+            self.assertLess(time.monotonic() - started, 0.15)
+            self.assertEqual(stale.labor_cost, 100.0)
+            self.wait_for(lambda: cache.stats()['refreshes'] == 1)
+            self.assertEqual(PricingCalculator(product_id=1).product_data['labor_cost'], 300.0)
+            stats = cache.stats()
+            self.assertEqual(stats['misses'], 1)
+            self.assertEqual(stats['stale_hits'], 2)
+
+    def test_concurrent_misses_are_coalesced(self):
+        cache = ProductCostCache(ttl=60)
+        self.delay = 0.2
+        with StubBackend({'/api/products/7/': self.product_route}) as backend, \
+                patch('models.pricing.DJANGO_API_BASE_URL', backend.base_url), \
+                patch('models.pricing.product_cost_cache', cache):
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(PricingCalculator(product_id=7).suggest_price()))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(results), 8)
+            self.assertEqual(len(set(results)), 1)
+            self.assertEqual(backend.count('/api/products/7/'), 1)
+            stats = cache.stats()
+            self.assertEqual(stats['misses'], 1)
+            self.assertEqual(stats['coalesced'], 7)
+
+    def test_failed_refresh_keeps_stale_entry(self):
+        cache = ProductCostCache(ttl=0, stale_ttl=60)
+        cache.put('key', self.record)
+
+        def failing_loader():
+            raise Exception("Error al obtener los datos del producto")
+
+        self.assertEqual(cache.get('key', failing_loader), self.record)
+        self.wait_for(lambda: cache.stats()['refresh_errors'] == 1)
+        self.assertEqual(cache.get('key', failing_loader), self.record)
+
+    def test_miss_propagates_backend_error(self):
+        cache = ProductCostCache()
+        with StubBackend({}) as backend, \
+                patch('models.pricing.DJANGO_API_BASE_URL', backend.base_url), \
+                patch('models.pricing.product_cost_cache', cache):
+            with self.assertRaises(Exception):
+                PricingCalculator(product_id=1)
+            self.assertEqual(cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        cache = ProductCostCache(maxsize=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, self.record)
+        self.assertFalse(cache.invalidate('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from models.file_utils import FileWatcher, atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'data.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replaces_file(self):
+        with atomic_write(self.path) as file:
+            file.write(b'first')
+        with atomic_write(self.path) as file:
+            file.write(b'second')
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), b'second')
+        self.assertEqual(os.listdir(self.directory.name), ['data.bin'])
+
+    def test_error_keeps_previous_file(self):
+        with atomic_write(self.path) as file:
+            file.write(b'first')
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as file:
+                file.write(b'partial')
+                raise RuntimeError('interrupted')
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), b'first')
+        self.assertEqual(os.listdir(self.directory.name), ['data.bin'])
+
+
+class TestFileWatcher(unittest.TestCase):
+    def test_poll_respects_interval_and_tracks_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rules.yaml')
+            watcher = FileWatcher([path], check_interval=3600)
+            calls = []
+            watcher.poll(lambda: calls.append(1))
+            watcher.poll(lambda: calls.append(1))
+            self.assertEqual(len(calls), 1)
+            watcher.poll(lambda: calls.append(1), force=True)
+            self.assertEqual(len(calls), 2)
+
+            self.assertEqual(watcher.identity(), (None,))
+            watcher.loaded = watcher.identity()
+            self.assertFalse(watcher.changed())
+            with open(path, 'w') as file:
+                file.write('pricing: {}\n')
+            self.assertTrue(watcher.changed())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import numpy as np
+from geopy.distance import geodesic
+from models.geo import (GRID_RESOLUTIONS, bin_locations, cell_centers, coarsen_cells, distances_km, grid_cell_ids,
+                        haversine_km, SpatialIndex)
+
+
+class TestGeo(unittest.TestCase):
+    def setUp(self):
+        self.origin = (12.1364, -86.2514)  # Managua
+        self.latitudes = np.array([12.1364, 11.9344, 12.9256, 13.0833])
+        self.longitudes = np.array([-86.2514, -85.9560, -86.4128, -86.3500])
+
+    def test_haversine_close_to_geodesic(self):
+        distances = haversine_km(self.origin, self.latitudes, self.longitudes)
+        self.assertEqual(distances[0], 0.0)
+        for distance, lat, lon in zip(distances, self.latitudes, self.longitudes):
+            exact = geodesic(self.origin, (lat, lon)).kilometers
+            self.assertAlmostEqual(distance, exact, delta=max(exact * 0.01, 1e-6))
+
+    def test_geodesic_mode_is_exact(self):
+        distances = distances_km(self.origin, self.latitudes[1:2], self.longitudes[1:2], mode='geodesic')
+        expected = geodesic(self.origin, (self.latitudes[1], self.longitudes[1])).kilometers
+        self.assertAlmostEqual(distances[0], expected)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            distances_km(self.origin, self.latitudes, self.longitudes, mode='manhattan')
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.origin = (12.1364, -86.2514)  # Managua
+        # Managua, Masaya, Estelí, Bluefields y un producto sin coordenadas
+        self.latitudes = np.array([12.1364, 11.9744, 13.0919, 12.0137, np.nan])
+        self.longitudes = np.array([-86.2514, -86.0942, -86.3538, -83.7635, np.nan])
+        self.index = SpatialIndex(self.latitudes, self.longitudes)
+
+    def test_query_radius_returns_positions_within_radius(self):
+        self.assertEqual(self.index.query_radius(self.origin, 30).tolist(), [0, 1])
+        self.assertEqual(self.index.query_radius(self.origin, 150).tolist(), [0, 1, 2])
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        latitudes = rng.uniform(10.7, 15.0, 2000)
+        longitudes = rng.uniform(-87.7, -83.1, 2000)
+        index = SpatialIndex(latitudes, longitudes)
+        expected = np.flatnonzero(haversine_km(self.origin, latitudes, longitudes) <= 75)
+        np.testing.assert_array_equal(index.query_radius(self.origin, 75), expected)
+
+    def test_missing_coordinates_are_skipped(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(len(SpatialIndex([np.nan], [np.nan]).query_radius(self.origin, 1000)), 0)
+
+
+class TestGeoGrid(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.latitudes = rng.uniform(10.7, 15.0, 20000)
+        self.longitudes = rng.uniform(-87.7, -83.1, 20000)
+        self.weights = rng.uniform(1, 100, 20000)
+
+    def test_cells_are_hierarchical(self):
+        fine = grid_cell_ids(self.latitudes, self.longitudes, 0.001)
+        for resolution in GRID_RESOLUTIONS:
+            np.testing.assert_array_equal(coarsen_cells(fine, 0.001, resolution),
+                                          grid_cell_ids(self.latitudes, self.longitudes, resolution))
+        with self.assertRaises(ValueError):
+            coarsen_cells(fine, 0.001, 0.0001)
+
+    def test_centers_contain_points(self):
+        cells = grid_cell_ids(np.array([12.34, -0.0005], dtype=np.float32), [-86.2, 179.9999], 0.01)
+        latitudes, longitudes = cell_centers(cells, 0.01)
+        np.testing.assert_allclose(latitudes, [12.345, -0.005])
+        np.testing.assert_allclose(longitudes, [-86.195, 179.995])
+
+    def test_bin_locations_sums_and_bounds_cells(self):
+        cells, totals, resolution = bin_locations(self.latitudes, self.longitudes, self.weights, 0.1)
+        self.assertEqual(resolution, 0.1)
+        self.assertTrue(np.all(np.diff(cells) > 0))
+        self.assertLessEqual(len(cells), 44 * 47)
+        self.assertAlmostEqual(totals.sum(), self.weights.sum(), places=6)
+
+        cells, totals, resolution = bin_locations(self.latitudes, self.longitudes, self.weights, 0.001,
+                                                  max_cells=100)
+        self.assertEqual(resolution, 1.0)
+        self.assertLessEqual(len(cells), 100)
+        self.assertAlmostEqual(totals.sum(), self.weights.sum(), places=6)
+
+        cells, totals, _ = bin_locations([12.1, np.nan], [-86.2, -86.2], [5.0, 7.0], 1.0)
+        self.assertEqual(totals.tolist(), [5.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
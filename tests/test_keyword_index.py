@@ -0,0 +1,44 @@
+import unittest
+from models.keyword_index import KeywordIndex, normalize_text, tokenize_interests
+
+
+class TestKeywordIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KeywordIndex([
+            'Café ORGÁNICO de Jinotega',
+            'Hamaca tejida a mano',
+            'Piñata artesanal para cumpleaños',
+            'Botella eco-friendly reutilizable',
+            None,
+            'Tejida de palma: hamaca pequeña',
+        ])
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text('¡Café ORGÁNICO, año 2024!'), 'cafe organico año 2024')
+
+    def test_accent_and_case_insensitive(self):
+        self.assertEqual(self.index.match(['cafe']).tolist(), [0])
+        self.assertEqual(self.index.match(['Orgánico']).tolist(), [0])
+        self.assertEqual(self.index.match(['PIÑATA']).tolist(), [2])
+
+    def test_union_of_interests(self):
+        self.assertEqual(self.index.match(['hamaca', 'café']).tolist(), [0, 1, 5])
+
+    def test_multi_word_interests_match_phrases(self):
+        self.assertEqual(self.index.match(['hamaca tejida']).tolist(), [1])
+        self.assertEqual(self.index.match(['eco-friendly']).tolist(), [3])
+        self.assertEqual(self.index.match(['tejida hamaca']).tolist(), [])
+
+    def test_whole_tokens_only(self):
+        self.assertEqual(self.index.match(['ham']).tolist(), [])
+        self.assertEqual(self.index.match([]).tolist(), [])
+        self.assertEqual(self.index.match(['', '!!']).tolist(), [])
+
+    def test_pretokenized_interests(self):
+        tokens = tokenize_interests(['Hamaca', 'hamaca', 'Café'])
+        self.assertEqual(tokens, (('hamaca',), ('cafe',)))
+        self.assertEqual(self.index.match(tokens).tolist(), [0, 1, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from fastapi.testclient import TestClient
+from main import app
+from api.endpoints.market_analysis import get_sales_aggregates
+from models.market_analysis import MarketAnalysis
+from models.market_charts import ChartRenderer, render_charts
+from models.sales_aggregates import SalesAggregateStore
+from stub_backend import StubBackend
+
+SALES = [
+    {'date': '2024-01-01', 'hour': '09:15:00', 'amount': '150.0', 'buyer_location': {'latitude': 12.13, 'longitude': -86.25}},
+    {'date': '2024-01-01', 'hour': '14:00:00', 'amount': '80.5', 'buyer_location': {'latitude': 12.13, 'longitude': -86.25}},
+    {'date': '2024-01-02', 'hour': '14:30:00', 'amount': '20.0', 'buyer_location': {'latitude': 13.09, 'longitude': -85.99}},
+]
+
+
+class TestRunAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.analysis = MarketAnalysis(api_url='http://dummy-api-url')
+
+    def run_with_sales(self, sales):
+        with patch.object(MarketAnalysis, 'fetch_pages', return_value=[pd.DataFrame(sales)]):
+            return self.analysis.run_analysis(1)
+
+    def test_returns_json_statistics(self):
+        result = self.run_with_sales(SALES)
+        json.dumps(result)
+        self.assertEqual(result['daily_sales'], [{'date': '2024-01-01', 'sales_amount': 230.5},
+                                                 {'date': '2024-01-02', 'sales_amount': 20.0}])
+        self.assertEqual(result['hourly_sales'], [{'hour': 9, 'sales_amount': 150.0},
+                                                  {'hour': 14, 'sales_amount': 100.5}])
+        self.assertEqual(len(result['location_sales']), 2)
+
+    def test_data_version_follows_content(self):
+        first = self.run_with_sales(SALES)
+        self.assertEqual(self.run_with_sales(SALES)['data_version'], first['data_version'])
+        changed = [dict(sale) for sale in SALES]
+        changed[0]['amount'] = '151.0'
+        self.assertNotEqual(self.run_with_sales(changed)['data_version'], first['data_version'])
+
+    def test_location_sales_use_grid_cells(self):
+        nearby = [dict(SALES[0], buyer_location={'latitude': 12.1312, 'longitude': -86.2453})] + SALES
+        result = self.run_with_sales(nearby)
+        self.assertEqual(result['location_resolution'], 0.01)
+        self.assertEqual(result['location_sales'][0], {'buyer_latitude': 12.135, 'buyer_longitude': -86.245,
+                                                       'sales_amount': 380.5})
+        self.analysis = MarketAnalysis('http://dummy-api-url', location_resolution=None)
+        self.assertEqual(len(self.run_with_sales(nearby)['location_sales']), 3)
+        self.analysis = MarketAnalysis('http://dummy-api-url', location_resolution=0.001, max_location_cells=2)
+        result = self.run_with_sales(nearby)
+        self.assertEqual(result['location_resolution'], 0.01)
+        self.assertEqual(len(result['location_sales']), 2)
+
+
+class TestCharts(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with patch.object(MarketAnalysis, 'fetch_pages', return_value=[pd.DataFrame(SALES)]):
+            cls.result = MarketAnalysis('http://dummy-api-url').run_analysis(1)
+        cls.statistics = {key: cls.result[key] for key in ('daily_sales', 'hourly_sales', 'location_sales')}
+
+    def test_render_png_and_svg(self):
+        self.assertTrue(render_charts(self.statistics, 'png').startswith(b'\x89PNG'))
+        self.assertIn(b'<svg', render_charts(self.statistics, 'svg')[:500])
+        with self.assertRaises(ValueError):
+            render_charts(self.statistics, 'gif')
+
+    def test_render_without_sales(self):
+        empty = {'daily_sales': [], 'hourly_sales': [], 'location_sales': []}
+        self.assertTrue(render_charts(empty).startswith(b'\x89PNG'))
+
+    def test_renderer_caches_by_user_and_version(self):
+        renderer = ChartRenderer(max_workers=1)
+        try:
+            version = self.result['data_version']
+            first = renderer.render(1, version, self.statistics).result(timeout=60)
+            second = renderer.render(1, version, self.statistics).result(timeout=60)
+            self.assertEqual(first, second)
+            self.assertEqual((renderer.renders, renderer.hits), (1, 1))
+            renderer.render(1, 'otra-version', self.statistics).result(timeout=60)
+            self.assertEqual(renderer.renders, 2)
+        finally:
+            renderer.shutdown()
+
+
+class TestChartEndpoint(unittest.TestCase):
+    def test_cached_chart_skips_analysis(self):
+        sales = [dict(sale, id=i + 1) for i, sale in enumerate(SALES)]
+        renderer = ChartRenderer(max_workers=1)
+        with StubBackend({'/sales/': lambda query, headers: (200, {}, sales)}) as backend, \
+                tempfile.TemporaryDirectory() as directory, \
+                patch('api.endpoints.market_analysis.API_URL', backend.base_url), \
+                patch('api.endpoints.market_analysis.sales_aggregates',
+                      SalesAggregateStore(os.path.join(directory, 'aggregates.sqlite3'))), \
+                patch('api.endpoints.market_analysis.chart_renderer', renderer):
+            try:
+                client = TestClient(app)
+                # The first chart runs the analysis; later ones only read the store cursor
+                first = client.get('/market_analysis/charts/1')
+                self.assertEqual(first.status_code, 200)
+                self.assertTrue(first.content.startswith(b'\x89PNG'))
+                second = client.get('/market_analysis/charts/1')
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second.headers['etag'], first.headers['etag'])
+                self.assertEqual(backend.count('/sales/'), 1)
+                self.assertEqual((renderer.renders, renderer.hits), (1, 1))
+
+                sales.append(dict(SALES[0], id=4, amount='99.0'))
+                client.post('/market_analysis/run_analysis', json={'user_id': 1})
+                third = client.get('/market_analysis/charts/1')
+                self.assertNotEqual(third.headers['etag'], first.headers['etag'])
+                self.assertEqual(backend.count('/sales/'), 2)
+                self.assertEqual(renderer.renders, 2)
+            finally:
+                renderer.shutdown()
+
+    def test_sales_without_ids_fall_back_to_full_analysis(self):
+        renderer = ChartRenderer(max_workers=1)
+        with StubBackend({'/sales/': lambda query, headers: (200, {}, SALES)}) as backend, \
+                tempfile.TemporaryDirectory() as directory, \
+                patch('api.endpoints.market_analysis.API_URL', backend.base_url), \
+                patch('api.endpoints.market_analysis.sales_aggregates',
+                      SalesAggregateStore(os.path.join(directory, 'aggregates.sqlite3'))), \
+                patch('api.endpoints.market_analysis.chart_renderer', renderer):
+            try:
+                client = TestClient(app)
+                with self.assertLogs('models.market_analysis', level='WARNING'):
+                    response = client.post('/market_analysis/run_analysis', json={'user_id': 1})
+                self.assertEqual(response.status_code, 200)
+                expected = MarketAnalysis(backend.base_url).run_analysis(1)
+                self.assertEqual(response.json()['daily_sales'], expected['daily_sales'])
+                self.assertEqual(response.json()['data_version'], expected['data_version'])
+
+                chart = client.get('/market_analysis/charts/1')
+                self.assertEqual(chart.status_code, 200)
+                self.assertEqual(chart.headers['etag'], f'"{expected["data_version"]}"')
+            finally:
+                renderer.shutdown()
+
+    def test_store_is_created_on_first_use(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'aggregates.sqlite3')
+            with patch('api.endpoints.market_analysis.SALES_AGGREGATES_PATH', path), \
+                    patch('api.endpoints.market_analysis.sales_aggregates', None):
+                self.assertFalse(os.path.exists(path))
+                store = get_sales_aggregates()
+                self.assertIs(get_sales_aggregates(), store)
+                store.version(1)
+                self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from models.market_jobs import AnalysisJobs, analysis_jobs
+from stub_backend import StubBackend
+
+SALES = [
+    {'id': 1, 'date': '2024-01-01', 'hour': '09:15:00', 'amount': '150.0',
+     'buyer_location': {'latitude': 12.13, 'longitude': -86.25}},
+    {'id': 2, 'date': '2024-01-02', 'hour': '14:30:00', 'amount': '20.0',
+     'buyer_location': {'latitude': 13.09, 'longitude': -85.99}},
+]
+
+
+def wait_for(jobs, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Job {job_id} did not finish')
+
+
+class TestAnalysisJobs(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+        def sales_route(query, headers):
+            self.release.wait(30)
+            if query['user_id'] == '13':
+                return 500, {}, {'detail': 'boom'}
+            return 200, {}, SALES
+
+        self.backend = StubBackend({'/sales/': sales_route}).__enter__()
+        self.jobs = AnalysisJobs(max_workers=1, max_pending=2, ttl=0.5)
+
+    def tearDown(self):
+        self.release.set()
+        self.jobs.shutdown()
+        self.backend.__exit__(None, None, None)
+
+    def test_deduplicates_in_flight_jobs_and_expires_results(self):
+        first = self.jobs.submit(self.backend.base_url, 5)
+        self.assertIn(first['status'], ('pending', 'running'))
+        self.assertEqual(self.jobs.submit(self.backend.base_url, 5)['job_id'], first['job_id'])
+        self.release.set()
+        job = wait_for(self.jobs, first['job_id'])
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['result']['daily_sales'][0], {'date': '2024-01-01', 'sales_amount': 150.0})
+        self.assertEqual(self.jobs.stats()['deduplicated'], 1)
+
+        # Once finished, a new submission starts a new job
+        self.assertNotEqual(self.jobs.submit(self.backend.base_url, 5)['job_id'], first['job_id'])
+        time.sleep(0.6)
+        self.assertIsNone(self.jobs.get(first['job_id']))
+
+    def test_failed_job_and_queue_bound(self):
+        failing = self.jobs.submit(self.backend.base_url, 13)
+        self.jobs.submit(self.backend.base_url, 14)
+        with self.assertRaises(RuntimeError):
+            self.jobs.submit(self.backend.base_url, 15)
+        self.release.set()
+        job = wait_for(self.jobs, failing['job_id'])
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('500', job['error'])
+
+
+class TestJobEndpoints(unittest.TestCase):
+    def test_submit_and_poll(self):
+        with StubBackend({'/sales/': lambda query, headers: (200, {}, SALES)}) as backend, \
+                tempfile.TemporaryDirectory() as directory, \
+                patch('api.endpoints.market_analysis.API_URL', backend.base_url), \
+                patch('api.endpoints.market_analysis.SALES_AGGREGATES_PATH',
+                      os.path.join(directory, 'aggregates.sqlite3')):
+            client = TestClient(app)
+            response = client.post('/market_analysis/jobs', json={'user_id': 21})
+            self.assertEqual(response.status_code, 202)
+            job = wait_for(analysis_jobs, response.json()['job_id'])
+            self.assertEqual(job['status'], 'done')
+            polled = client.get(f"/market_analysis/jobs/{job['job_id']}").json()
+            self.assertEqual(polled['result']['hourly_sales'], [{'hour': 9, 'sales_amount': 150.0},
+                                                                {'hour': 14, 'sales_amount': 20.0}])
+            analysis_jobs.shutdown()
+        self.assertEqual(client.get('/market_analysis/jobs/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
+import numpy as np
 import pandas as pd
-from models.market_analysis import MarketAnalysis
+from models.market_analysis import MarketAnalysis, parse_hours
 
 class TestMarketAnalysis(unittest.TestCase):
 
@@ -32,10 +33,13 @@ class TestMarketAnalysis(unittest.TestCase):
             'amount': [150.0],
             'buyer_location': [{'latitude': 12.34, 'longitude': 56.78}],
             'sales_amount': [150.0],  # Ensure sales_amount is float
-            'buyer_latitude': [12.34],
-            'buyer_longitude': [56.78]
+            'buyer_latitude': np.array([12.34], dtype=np.float32),
+            'buyer_longitude': np.array([56.78], dtype=np.float32)
         })
 
+        # Hour is parsed as int8
+        self.assertEqual(processed_df['hour'].dtype, np.int8)
+
         # Convert column data types to match
         processed_df['hour'] = processed_df['hour'].astype('int64')
         processed_df['sales_amount'] = processed_df['sales_amount'].astype('float64')
@@ -45,5 +49,52 @@ class TestMarketAnalysis(unittest.TestCase):
         # Assert DataFrames are equal considering column order
         pd.testing.assert_frame_equal(processed_df.sort_index(axis=1), expected_df.sort_index(axis=1))
 
+    def test_process_data_hours_outside_fixed_width(self):
+        input_df = pd.DataFrame({
+            'date': ['2024-01-01', '2024-01-02'],
+            'hour': ['9:05:00', '23:59:59'],
+            'amount': ['10.5', '3'],
+            'buyer_location': [{'latitude': 12.1, 'longitude': -86.2}, {'latitude': 13.0, 'longitude': -85.9}],
+        })
+        processed_df = self.analysis.process_data(input_df)
+        self.assertEqual(processed_df['hour'].tolist(), [9, 23])
+        self.assertEqual(processed_df['sales_amount'].tolist(), [10.5, 3.0])
+        self.assertEqual(processed_df['buyer_longitude'].dtype, np.float32)
+
+    def test_process_data_missing_locations(self):
+        locations = [{'latitude': 12.1, 'longitude': -86.2}, None, {}, 'sin ubicación', {'latitude': 13.0}]
+        input_df = pd.DataFrame({
+            'date': ['2024-01-01'] * len(locations),
+            'hour': ['09:00:00'] * len(locations),
+            'amount': ['1'] * len(locations),
+            'buyer_location': locations,
+        })
+        processed_df = self.analysis.process_data(input_df)
+        latitudes, longitudes = processed_df['buyer_latitude'], processed_df['buyer_longitude']
+        self.assertAlmostEqual(float(latitudes[0]), 12.1, places=5)
+        self.assertAlmostEqual(float(longitudes[0]), -86.2, places=5)
+        # None, diccionario vacío y valores que no son diccionarios quedan sin coordenadas
+        self.assertTrue(latitudes[1:4].isna().all())
+        self.assertTrue(longitudes[1:4].isna().all())
+        self.assertAlmostEqual(float(latitudes[4]), 13.0, places=5)
+        self.assertTrue(np.isnan(longitudes[4]))
+
+    def test_process_data_all_locations_missing(self):
+        input_df = pd.DataFrame({
+            'date': ['2024-01-01', '2024-01-02'],
+            'hour': ['09:00:00', '10:00:00'],
+            'amount': ['1', '2'],
+            'buyer_location': [None, None],
+        })
+        processed_df = self.analysis.process_data(input_df)
+        self.assertTrue(processed_df['buyer_latitude'].isna().all())
+        self.assertEqual(processed_df['buyer_latitude'].dtype, np.float32)
+
+    def test_parse_hours_rejects_longer_text(self):
+        self.assertEqual(parse_hours(pd.Series(['09:15:00', '23:00:00'])).tolist(), [9, 23])
+        # The first 8 characters are a valid time; the rest must not be silently dropped
+        with self.assertRaises(ValueError):
+            parse_hours(pd.Series(['14:00:00.123', '09:15:00']))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,148 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from models.market_analysis import MarketAnalysis, statistics_to_dict
+from models.platform_analytics import (PlatformStatistics, iter_api_sales, load_platform_statistics,
+                                       platform_statistics, process_sales_rows, read_sales_chunks, seller_statistics,
+                                       write_platform_statistics)
+from stub_backend import StubBackend
+
+
+def make_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(int(rng.integers(1, 40)), f'2024-03-{rng.integers(1, 29):02d}',
+             f'{rng.integers(0, 24):02d}:{rng.integers(0, 60):02d}:00', round(float(rng.uniform(1, 500)), 2),
+             round(float(rng.uniform(11, 14)), 3), round(float(rng.uniform(-87, -84)), 3))
+            for _ in range(count)]
+
+
+def expected_statistics(rows, user_id):
+    sales = [{'date': date, 'hour': hour, 'amount': amount, 'buyer_location': {'latitude': lat, 'longitude': lon}}
+             for seller, date, hour, amount, lat, lon in rows if seller == user_id]
+    analysis = MarketAnalysis('http://dummy-api-url', max_location_cells=None)
+    return statistics_to_dict(*analysis.generate_statistics(analysis.process_data(pd.DataFrame(sales))))
+
+
+class TestPlatformAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.rows = make_rows(5000)
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.execute('CREATE TABLE sales (user_id INTEGER, date TEXT, hour TEXT, amount REAL, '
+                                'buyer_latitude REAL, buyer_longitude REAL)')
+        self.connection.executemany('INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?)', self.rows)
+
+    def tearDown(self):
+        self.connection.close()
+
+    def assert_matches_per_seller(self, statistics, user_ids):
+        for user_id in user_ids:
+            expected = expected_statistics(self.rows, user_id)
+            actual = seller_statistics(statistics, user_id)
+            for key in ('daily_sales', 'hourly_sales', 'location_sales'):
+                self.assertEqual(len(actual[key]), len(expected[key]))
+                for row, expected_row in zip(actual[key], expected[key]):
+                    self.assertEqual(row.keys(), expected_row.keys())
+                    for name, value in row.items():
+                        if isinstance(value, float):
+                            self.assertAlmostEqual(value, expected_row[name], places=6)
+                        else:
+                            self.assertEqual(value, expected_row[name])
+
+    def test_database_chunks_match_per_seller_analysis(self):
+        chunks = (process_sales_rows(chunk) for chunk in read_sales_chunks(self.connection, chunksize=700))
+        statistics = PlatformStatistics(compact_rows=1000)
+        for chunk in chunks:
+            statistics.add(chunk)
+        result = statistics.result()
+        self.assertEqual(statistics.sales, len(self.rows))
+        self.assertTrue(np.all(np.diff(result['daily_user_id']) >= 0))
+        self.assert_matches_per_seller(result, (1, 7, 39))
+        self.assertEqual(seller_statistics(result, 1000)['daily_sales'], [])
+
+    def test_written_file_round_trips(self):
+        statistics = platform_statistics(process_sales_rows(chunk)
+                                         for chunk in read_sales_chunks(self.connection, chunksize=2000))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'platform.npz')
+            write_platform_statistics(path, statistics)
+            loaded = load_platform_statistics(path)
+        self.assertEqual(set(loaded), set(statistics))
+        self.assertEqual(seller_statistics(loaded, 7), seller_statistics(statistics, 7))
+        self.assertEqual(platform_statistics([])['daily_user_id'].size, 0)
+
+    def test_time_and_date_objects(self):
+        chunk = pd.DataFrame.from_records(
+            [(3, datetime.date(2024, 3, 1), datetime.timedelta(hours=14, minutes=5), '10.5', 12.1, -86.2),
+             (3, datetime.date(2024, 3, 2), datetime.timedelta(hours=9), '4', 12.1, -86.2)],
+            columns=['user_id', 'date', 'hour', 'amount', 'buyer_latitude', 'buyer_longitude'])
+        processed = process_sales_rows(chunk)
+        self.assertEqual(processed['hour'].tolist(), [14, 9])
+        self.assertEqual(processed['sales_amount'].tolist(), [10.5, 4.0])
+        with self.assertRaises(ValueError):
+            PlatformStatistics().add(processed.assign(user_id=-1))
+
+    def test_rows_without_seller_or_location(self):
+        self.connection.executemany('INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?)',
+                                    [(None, '2024-03-01', '10:00:00', 99.0, 12.1, -86.2),
+                                     (7, '2024-03-01', '10:00:00', 5.0, None, None)])
+        with self.assertLogs('models.platform_analytics', level='WARNING'):
+            statistics = PlatformStatistics()
+            for chunk in read_sales_chunks(self.connection, chunksize=2000):
+                statistics.add(process_sales_rows(chunk))
+        result = statistics.result()
+        self.assertEqual(statistics.sales, len(self.rows) + 1)
+        seller = seller_statistics(result, 7)
+        expected = expected_statistics(self.rows, 7)
+        self.assertAlmostEqual(sum(row['sales_amount'] for row in seller['daily_sales']),
+                               sum(row['sales_amount'] for row in expected['daily_sales']) + 5.0, places=6)
+        # The sale without coordinates has no cell (no phantom cell near the south pole)
+        self.assertEqual(len(seller['location_sales']), len(expected['location_sales']))
+        self.assertTrue(all(row['buyer_latitude'] > 0 for row in seller['location_sales']))
+
+    def test_api_source_reads_all_sellers(self):
+        sales = [{'user_id': seller, 'date': date, 'hour': hour, 'amount': str(amount),
+                  'buyer_location': {'latitude': lat, 'longitude': lon}}
+                 for seller, date, hour, amount, lat, lon in self.rows]
+
+        def sales_route(query, headers):
+            self.assertNotIn('user_id', query)
+            page, page_size = int(query.get('page', 1)), int(query['page_size'])
+            next_url = None
+            if page * page_size < len(sales):
+                next_url = f'{backend.base_url}/sales/?page_size={page_size}&page={page + 1}'
+            return 200, {}, {'next': next_url, 'results': sales[(page - 1) * page_size:page * page_size]}
+
+        with StubBackend({'/sales/': sales_route}) as backend:
+            statistics = platform_statistics(iter_api_sales(backend.base_url, page_size=1500))
+            self.assertEqual(backend.count('/sales/'), 4)
+        self.assert_matches_per_seller(statistics, (2, 11))
+
+    def test_api_source_skips_sales_without_seller(self):
+        sales = [{'user_id': seller, 'date': date, 'hour': hour, 'amount': str(amount),
+                  'buyer_location': {'latitude': lat, 'longitude': lon}}
+                 for seller, date, hour, amount, lat, lon in self.rows[:100]]
+        orphan = {'date': '2024-03-01', 'hour': '10:00:00', 'amount': '99.0',
+                  'buyer_location': {'latitude': 12.1, 'longitude': -86.2}}
+        # Una página con user_id nulo y ausente, y otra solo con ventas sin vendedor
+        pages = [sales[:50] + [dict(orphan, user_id=None), orphan], sales[50:], [orphan]]
+
+        def sales_route(query, headers):
+            page = int(query.get('page', 1))
+            next_url = f'{backend.base_url}/sales/?page={page + 1}' if page < len(pages) else None
+            return 200, {}, {'next': next_url, 'results': pages[page - 1]}
+
+        with StubBackend({'/sales/': sales_route}) as backend, \
+                self.assertLogs('models.platform_analytics', level='WARNING') as logs:
+            statistics = PlatformStatistics()
+            for chunk in iter_api_sales(backend.base_url):
+                statistics.add(chunk)
+        self.assertEqual(statistics.sales, 100)
+        self.assertEqual(len(logs.records), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
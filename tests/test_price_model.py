@@ -0,0 +1,172 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from main import app
+from api.endpoints.pricing import build_pricing_response
+from models.model_utils import build_regression_pipeline
+from models.price_model import MicroBatcher, PriceModel, get_price_batcher, predict_price
+from models.pricing import COST_FIELDS, PricingCalculator
+from models.pricing_rules import PricingRulesLoader
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def predict(self, rows):
+        self.calls.append(len(rows))
+        return rows.sum(axis=1)
+
+    def test_concurrent_requests_share_batches(self):
+        batcher = MicroBatcher(self.predict, max_batch_size=32, max_wait=0.05)
+
+        async def run():
+            rows = [np.array([i, 1.0]) for i in range(100)]
+            try:
+                return await asyncio.gather(*(batcher.submit(row) for row in rows))
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [i + 1.0 for i in range(100)])
+        self.assertEqual(self.calls, [32, 32, 32, 4])
+        self.assertEqual((batcher.batches, batcher.rows), (4, 100))
+
+    def test_single_request_waits_at_most_max_wait(self):
+        batcher = MicroBatcher(self.predict, max_batch_size=32, max_wait=0.01)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            try:
+                value = await batcher.submit(np.array([2.0, 3.0]))
+            finally:
+                await batcher.close()
+            return value, loop.time() - start
+
+        value, elapsed = asyncio.run(run())
+        self.assertEqual(value, 5.0)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(self.calls, [1])
+
+    def test_errors_reach_every_request_in_the_batch(self):
+        def failing(rows):
+            raise ValueError("modelo no disponible")
+
+        batcher = MicroBatcher(failing, max_wait=0.01)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(batcher.submit(np.zeros(2)) for _ in range(3)), return_exceptions=True)
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_short_prediction_fails_every_request(self):
+        batcher = MicroBatcher(lambda rows: rows[:1, 0], max_wait=0.05)
+
+        async def run():
+            try:
+                requests = (batcher.submit(np.zeros(2)) for _ in range(3))
+                return await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 2)
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+
+class TestPriceModel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = pd.DataFrame(rng.uniform(1, 100, (200, len(COST_FIELDS))), columns=COST_FIELDS)
+        self.target = self.frame.sum(axis=1) * 1.2
+        self.model = RandomForestRegressor(n_estimators=10, random_state=0).fit(self.frame, self.target)
+
+    def test_batched_predictions_match_row_by_row(self):
+        price_model = PriceModel(self.model)
+        products = self.frame.iloc[:10].to_dict(orient='records')
+        batcher = MicroBatcher(price_model.predict, max_wait=0.01)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(batcher.submit(price_model.features(p)) for p in products))
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(run())
+        expected = self.model.predict(self.frame.iloc[:10])
+        np.testing.assert_allclose(results, expected)
+        self.assertEqual(batcher.batches, 1)
+
+    def test_missing_model_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'RandomForestRegressor.pkl')
+            self.assertIsNone(PriceModel.load(path))
+            self.assertIsNone(asyncio.run(predict_price({'labor_cost': 1.0}, path=path)))
+            # Un regresor suelto (versiones anteriores de train_models) predice en la escala [0, 1]
+            joblib.dump(self.model, path)
+            with self.assertRaises(ValueError):
+                PriceModel.load(path)
+
+    def test_trained_pipeline_predicts_in_original_scale(self):
+        frame = self.frame.assign(category=np.where(self.frame['labor_cost'] > 50, 'artesanias', 'alimentos'))
+        model = build_regression_pipeline(RandomForestRegressor(n_estimators=10, random_state=0), frame)
+        model.fit(frame, self.target)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'RandomForestRegressor.pkl')
+            joblib.dump(model, path)
+            price_model = PriceModel.load(path)
+        product = frame.iloc[0].to_dict()
+        price = price_model.predict(np.vstack([price_model.features(product)]))[0]
+        self.assertAlmostEqual(price, self.target.iloc[0], delta=0.2 * self.target.iloc[0])
+        self.assertGreater(price, 10)
+        with self.assertRaises(ValueError):
+            price_model.features(dict(product, category=None))
+
+    def test_pricing_response_survives_model_errors(self):
+        calculator = PricingCalculator.from_cost_data(dict(self.frame.iloc[0].to_dict(), earnings_percentage=None))
+        with patch('api.endpoints.pricing.predict_price', side_effect=ValueError("Faltan características")), \
+                self.assertLogs('api.endpoints.pricing', level='WARNING') as logs:
+            response = asyncio.run(build_pricing_response(calculator))
+        self.assertIsNone(response.model_price)
+        self.assertGreater(response.suggested_price, 0)
+        # Un error de características se registra en una línea, sin traza
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsNone(logs.records[0].exc_info)
+
+    def test_missing_model_is_not_looked_up_on_every_request(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'RandomForestRegressor.pkl')
+            with patch.object(PriceModel, 'load', wraps=PriceModel.load) as load:
+                self.assertEqual(get_price_batcher(path), (None, None))
+                self.assertEqual(get_price_batcher(path), (None, None))
+            self.assertEqual(load.call_count, 1)
+
+    def test_offline_pricing_skips_model_and_uses_category(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yaml')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('pricing:\n  categories:\n    artesanias:\n      tiers:\n        - {percentage: 30}\n')
+            cost_data = dict(self.frame.iloc[0].to_dict(), category='artesanias')
+            with patch('models.pricing.pricing_rules', PricingRulesLoader(path)), \
+                    patch('api.endpoints.pricing.predict_price', side_effect=AssertionError('sin modelo')):
+                response = TestClient(app).post('/pricing/offline', json=cost_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['earnings_percentage'], 30)
+        self.assertIsNone(response.json()['model_price'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,17 @@
 import unittest
 from unittest.mock import patch
-from models.pricing import PricingCalculator
+import numpy as np
+from fastapi.testclient import TestClient
+from main import app
+from models.cost_cache import product_cost_cache
+from models.pricing import PricingCalculator, estimate_earnings_percentages, suggest_prices
+from stub_backend import StubBackend
 
 class TestPricingCalculator(unittest.TestCase):
 
+    def setUp(self):
+        product_cost_cache.clear()
+
     @patch('requests.get')
     def test_fetch_product_data(self, mock_get):
         mock_response = {
@@ -51,5 +59,89 @@ class TestPricingCalculator(unittest.TestCase):
         self.assertEqual(suggested_price, expected_suggested_price)
         self.assertEqual(earnings_percentage, expected_earnings_percentage)
 
+class TestOfflinePricing(unittest.TestCase):
+
+    def setUp(self):
+        self.cost_data = {
+            'material_cost_per_unit': 5.0,
+            'quantity_per_unit': 100,
+            'transport_cost': 50.0,
+            'labor_cost': 100.0,
+            'material_costs': 200.0,
+            'other_expenses': 150.0
+        }
+
+    @patch('requests.get')
+    def test_from_cost_data_does_not_fetch(self, mock_get):
+        calculator = PricingCalculator.from_cost_data(self.cost_data)
+        suggested_price, earnings_percentage = calculator.suggest_price()
+        mock_get.assert_not_called()
+        self.assertEqual(earnings_percentage, 20)
+        self.assertAlmostEqual(suggested_price, 1000.0 * 1.20)
+
+    def test_message_reuses_computed_price(self):
+        calculator = PricingCalculator.from_cost_data(self.cost_data)
+        suggested_price, earnings_percentage = calculator.suggest_price()
+        with patch.object(PricingCalculator, 'suggest_price') as mock_suggest:
+            message = calculator.generate_price_suggestion_message(suggested_price, earnings_percentage)
+        mock_suggest.assert_not_called()
+        self.assertIn('$1200.00', message)
+        self.assertIn('20%', message)
+
+class TestBulkPricing(unittest.TestCase):
+
+    def setUp(self):
+        product_cost_cache.clear()
+
+    def make_product(self, product_id, material_cost_per_unit, earnings_percentage=None):
+        return {
+            'id': product_id,
+            'material_cost_per_unit': material_cost_per_unit,
+            'quantity_per_unit': 10,
+            'price_per_unit': 1.0,
+            'transport_cost': 20.0,
+            'labor_cost': 30.0,
+            'material_costs': 25.0,
+            'other_expenses': 10.0,
+            'earnings_percentage': earnings_percentage
+        }
+
+    def test_tiers_match_boundaries(self):
+        percentages = estimate_earnings_percentages(np.array([0, 200, 200.5, 800, 1500, 1500.5]))
+        self.assertEqual(percentages.tolist(), [10, 10, 15, 15, 20, 25])
+
+    @patch('requests.get')
+    def test_bulk_matches_single_product_pricing(self, mock_get):
+        products = [self.make_product(1, 5.0), self.make_product(2, 60.0), self.make_product(3, 200.0, 12)]
+        prices = suggest_prices(products)
+        mock_get.return_value.status_code = 200
+        for product, row in zip(products, prices.itertuples()):
+            mock_get.return_value.json.return_value = product
+            calculator = PricingCalculator(product_id=product['id'])
+            suggested_price, earnings_percentage = calculator.suggest_price()
+            self.assertEqual(row.product_id, product['id'])
+            self.assertAlmostEqual(row.suggested_price, suggested_price)
+            self.assertEqual(row.earnings_percentage, earnings_percentage)
+        self.assertEqual(prices['earnings_percentage'].tolist(), [10.0, 15.0, 12.0])
+
+    def test_bulk_endpoint_filters_ids_and_reports_incomplete_costs(self):
+        incomplete = dict(self.make_product(3, 5.0), labor_cost=None)
+        catalog = [self.make_product(1, 5.0), self.make_product(2, 60.0), incomplete, self.make_product(4, 1.0)]
+        # El backend ignora ?ids= y devuelve todo el catálogo
+        with StubBackend({'/api/products/': lambda query, headers: (200, {}, catalog)}) as backend, \
+                patch('api.endpoints.pricing.DJANGO_API_BASE_URL', backend.base_url):
+            response = TestClient(app).post('/pricing/bulk', json={'product_ids': [2, 3, 9]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item['product_id'] for item in body['results']], [2])
+        self.assertEqual(body['missing'], [3, 9])
+
+    def test_bulk_missing_cost_field_only_affects_its_products(self):
+        products = [{key: value for key, value in self.make_product(pid, 5.0).items() if key != 'other_expenses'}
+                    for pid in (1, 2)]
+        prices = suggest_prices(products)
+        self.assertEqual(prices['product_id'].tolist(), [1, 2])
+        self.assertTrue(prices['suggested_price'].isna().all())
+
 if __name__ == '__main__':
     unittest.main()
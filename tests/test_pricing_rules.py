@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from models.pricing_rules import PricingRules, PricingRulesLoader, DEFAULT_RULES
+
+CONFIG = """
+pricing:
+  default:
+    tiers:
+      - {max_cost: 200, percentage: 10}
+      - {max_cost: 800, percentage: 15}
+      - {percentage: 25}
+  categories:
+    artesanias:
+      tiers:
+        - {max_cost: 500, percentage: 20}
+        - {percentage: 30}
+      max_markup: 100
+      rounding: {mode: up, step: 5}
+    alimentos:
+      max_percentage: 12
+"""
+
+
+class TestPricingRules(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'config.yaml')
+        self.write(CONFIG)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        # Fuerza un cambio de mtime aunque la escritura ocurra en el mismo instante
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_default_rules_match_original_tiers(self):
+        rules = PricingRules(DEFAULT_RULES)
+        percentages, prices = rules.evaluate(np.array([0, 200, 200.5, 800, 1500, 1500.5]))
+        self.assertEqual(percentages.tolist(), [10, 10, 15, 15, 20, 25])
+        self.assertAlmostEqual(prices[3], 800 * 1.15)
+
+    def test_category_tiers_caps_and_rounding(self):
+        rules = PricingRulesLoader(self.path).current()
+        costs = np.array([100.0, 100.0, 600.0, 600.0, 600.0])
+        categories = ['otros', 'artesanias', 'artesanias', 'alimentos', None]
+        percentages, prices = rules.evaluate(costs, categories)
+        self.assertEqual(percentages.tolist(), [10, 20, 30, 12, 15])
+        # 100 * 1.2 = 120 ya es múltiplo de 5; 600 * 1.3 = 780 se topa en 600 + 100
+        np.testing.assert_allclose(prices, [110.0, 120.0, 700.0, 672.0, 690.0])
+
+    def test_rounding_up_to_step(self):
+        rules = PricingRulesLoader(self.path).current()
+        _, prices = rules.evaluate(np.array([101.0]), 'artesanias')
+        self.assertEqual(prices.tolist(), [125.0])
+
+    def test_override_skips_percentage_caps_only(self):
+        rules = PricingRulesLoader(self.path).current()
+        percentages, _ = rules.evaluate(np.array([600.0, 600.0]), 'alimentos', np.array([40.0, np.nan]))
+        self.assertEqual(percentages.tolist(), [40, 12])
+        # max_markup y el redondeo de la categoría siguen aplicándose al precio
+        _, prices = rules.evaluate(np.array([600.0]), 'artesanias', np.array([50.0]))
+        self.assertEqual(prices.tolist(), [700.0])
+
+    def test_default_rule_inherits_default_tiers(self):
+        self.write("pricing:\n  default:\n    max_markup: 50\n")
+        _, prices = PricingRulesLoader(self.path).current().evaluate(np.array([100.0, 1000.0]))
+        np.testing.assert_allclose(prices, [110.0, 1050.0])
+        shipped = PricingRulesLoader(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                  'configs', 'config.yaml')).current()
+        np.testing.assert_array_equal(shipped.percentages, PricingRules(DEFAULT_RULES).percentages)
+
+    def test_hot_reload_and_invalid_config(self):
+        loader = PricingRulesLoader(self.path, check_interval=0)
+        self.assertEqual(loader.current().categories, ['artesanias', 'alimentos'])
+
+        self.write(CONFIG.replace('percentage: 25', 'percentage: 40'))
+        self.assertEqual(loader.current().evaluate(np.array([5000.0]))[0].tolist(), [40])
+
+        # Una configuración inválida no reemplaza las reglas vigentes
+        self.write("pricing:\n  default:\n    tiers: []\n")
+        self.assertEqual(loader.current().evaluate(np.array([5000.0]))[0].tolist(), [40])
+
+    def test_missing_file_uses_default_rules(self):
+        loader = PricingRulesLoader(os.path.join(self.directory.name, 'missing.yaml'))
+        self.assertEqual(loader.current().evaluate(np.array([5000.0]))[0].tolist(), [25])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from models.product_index import ProductIndex
+
+
+class TestProductIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ProductIndex(rebuild_ratio=10)
+        self.index.build([1, 2, 3], [
+            'Botella de agua ecológica reutilizable',
+            'Cuaderno de papel reciclado',
+            'Hamaca tejida a mano en Masaya'
+        ])
+
+    def test_similarity_ranks_matching_product_first(self):
+        scores = self.index.similarity('botella agua', [1, 2, 3])
+        self.assertEqual(len(scores), 3)
+        self.assertGreater(scores[0], scores[1])
+        self.assertGreater(scores[0], scores[2])
+
+    def test_upsert_does_not_refit_vectorizer(self):
+        vectorizer = self.index.vectorizer
+        self.index.upsert([(4, 'Botella de vidrio'), (2, 'Hamaca de colores')])
+        self.assertIs(self.index.vectorizer, vectorizer)
+        self.assertEqual(len(self.index), 4)
+        scores = self.index.similarity('hamaca', [2, 3, 4])
+        self.assertGreater(scores[0], 0)
+        self.assertEqual(scores[2], 0)
+
+    def test_remove_and_unknown_ids_score_zero(self):
+        self.index.remove([1])
+        scores = self.index.similarity('botella agua', [1, 99])
+        self.assertEqual(scores.tolist(), [0.0, 0.0])
+
+    def test_similarity_many_is_sparse_and_matches_single_queries(self):
+        product_ids = [3, 99, 1, 2]
+        scores = self.index.similarity_many(['botella agua', 'hamaca'], product_ids)
+        self.assertTrue(sp.issparse(scores))
+        self.assertEqual(scores.shape, (2, 4))
+        for row, query in enumerate(['botella agua', 'hamaca']):
+            np.testing.assert_allclose(scores[row].toarray().ravel(), self.index.similarity(query, product_ids))
+
+    def test_sync_applies_only_differences(self):
+        products_df = pd.DataFrame([
+            {'id': 2, 'description': 'Cuaderno de papel reciclado'},
+            {'id': 3, 'description': 'Hamaca de algodón'},
+            {'id': 5, 'description': 'Café orgánico de Matagalpa'}
+        ])
+        self.index.sync(products_df)
+        self.assertEqual(set(self.index.descriptions), {2, 3, 5})
+        self.assertEqual(self.index.descriptions[3], 'Hamaca de algodón')
+        self.assertEqual(self.index.rows_for([1]).tolist(), [-1])
+
+    def test_rebuild_after_many_changes(self):
+        index = ProductIndex(rebuild_ratio=0.4)
+        index.build([1, 2], ['mesa de madera', 'silla de madera'])
+        vectorizer = index.vectorizer
+        index.upsert([(3, 'sombrero de palma'), (4, 'sombrero de paja')])
+        self.assertIsNot(index.vectorizer, vectorizer)
+        self.assertGreater(index.similarity('sombrero', [3])[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import time
+import unittest
+from unittest.mock import patch, Mock
+from fastapi.testclient import TestClient
+from api.endpoints.recommender import DJANGO_API_BASE_URL
+from main import app
+from models.profile_cache import ProfileCache, UserProfile, profile_cache
+from models.recommender import Recommender
+
+
+class TestProfileCache(unittest.TestCase):
+    def test_lru_eviction_and_stats(self):
+        cache = ProfileCache(maxsize=2, ttl=60)
+        for uid in (1, 2):
+            cache.put(uid, UserProfile(uid, ['café'], (12.1, -86.2)))
+        self.assertIsNotNone(cache.get(1))
+        cache.put(3, UserProfile(3, ['hamaca'], (12.1, -86.2)))
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(3))
+        stats = cache.stats()
+        self.assertEqual((stats['size'], stats['hits'], stats['misses'], stats['evictions']), (2, 2, 1, 1))
+        self.assertAlmostEqual(stats['hit_ratio'], 2 / 3)
+
+    def test_ttl_and_invalidate(self):
+        cache = ProfileCache(ttl=0.05)
+        cache.put(1, UserProfile(1, ['café'], (12.1, -86.2)))
+        self.assertTrue(cache.invalidate(1))
+        self.assertFalse(cache.invalidate(1))
+        cache.put(1, UserProfile(1, ['café'], (12.1, -86.2)))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get(1))
+
+    def test_fetch_started_before_invalidation_is_discarded(self):
+        cache = ProfileCache(maxsize=2)
+        stale = UserProfile(1, ['café'], (12.1, -86.2))
+        generation = cache.generation()
+        cache.invalidate(1)
+        self.assertFalse(cache.put(1, stale, generation=generation))
+        self.assertIsNone(cache.get(1))
+        generation = cache.generation()
+        cache.put(1, UserProfile(1, ['hamaca'], (12.1, -86.2)))
+        self.assertFalse(cache.put(1, stale, generation=generation))
+        self.assertEqual(cache.get(1).interests, ['hamaca'])
+        self.assertTrue(cache.put(2, stale, generation=generation))
+        # Una generación ya descartada por tamaño rechaza descargas anteriores a ella
+        for uid in (3, 4):
+            cache.invalidate(uid)
+        self.assertFalse(cache.put(1, stale, generation=generation))
+        self.assertTrue(cache.put(1, stale, generation=cache.generation()))
+
+    def test_profile_tokens_are_precomputed(self):
+        profile = UserProfile(1, ['Café Orgánico', 'hamaca'], (12.1, -86.2))
+        self.assertEqual(profile.interest_tokens, (('cafe', 'organico'), ('hamaca',)))
+
+
+class TestRecommenderProfileCache(unittest.TestCase):
+    def setUp(self):
+        profile_cache.clear()
+        self.recommender = Recommender('http://profile-cache-test')
+
+    @patch('requests.get')
+    def test_get_user_data_uses_cache(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={
+            'interests': ['café'], 'location': {'latitude': 12.1, 'longitude': -86.2}
+        }))
+        self.assertEqual(self.recommender.get_user_data(5), (['café'], (12.1, -86.2)))
+        self.assertEqual(self.recommender.get_user_data(5), (['café'], (12.1, -86.2)))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.get')
+    def test_invalidation_during_fetch_is_not_overwritten(self, mock_get):
+        key = ('http://profile-cache-test', 5)
+
+        def invalidate_while_fetching(url):
+            profile_cache.invalidate(key)
+            return Mock(status_code=200, json=Mock(return_value={
+                'interests': ['café'], 'location': {'latitude': 12.1, 'longitude': -86.2}
+            }))
+
+        mock_get.side_effect = invalidate_while_fetching
+        self.assertEqual(self.recommender.get_user_data(5), (['café'], (12.1, -86.2)))
+        self.assertIsNone(profile_cache.get(key))
+
+    def test_invalidation_endpoints(self):
+        client = TestClient(app)
+        response = client.put('/recommender/profiles/9', json={
+            'interests': ['hamaca'], 'location': {'latitude': 12.0, 'longitude': -86.0}
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profile_cache.get((DJANGO_API_BASE_URL, 9)).interests, ['hamaca'])
+        self.assertEqual(client.delete('/recommender/profiles/9').json(), {'user_id': 9, 'invalidated': True})
+        self.assertIsNone(profile_cache.get((DJANGO_API_BASE_URL, 9)))
+        self.assertIn('hit_ratio', client.get('/recommender/profiles/cache').json())
+
+
+if __name__ == '__main__':
+    unittest.main()
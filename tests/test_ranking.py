@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from models.ranking import RankingWeights, composite_score, top_k
+
+
+class TestRanking(unittest.TestCase):
+    def test_top_k_matches_full_sort(self):
+        rng = np.random.default_rng(0)
+        scores = rng.random(10_000)
+        expected = np.argsort(-scores, kind='stable')[:25]
+        np.testing.assert_array_equal(top_k(scores, 25), expected)
+
+    def test_top_k_ties_are_deterministic(self):
+        scores = np.array([0.5, 0.9, 0.5, 0.5, 0.1])
+        ids = np.array([40, 10, 30, 20, 50])
+        # Entre los empates con 0.5 ganan los IDs menores (20 y 30)
+        self.assertEqual(top_k(scores, 3, ids).tolist(), [1, 3, 2])
+
+    def test_top_k_handles_small_inputs_and_nan(self):
+        self.assertEqual(top_k(np.array([]), 5).tolist(), [])
+        self.assertEqual(top_k(np.array([0.2, np.nan, 0.7]), 5).tolist(), [2, 0, 1])
+
+    def test_composite_score_prefers_similar_close_cheap_and_rated(self):
+        scores = composite_score(
+            similarity=[0.9, 0.9, 0.9, 0.1],
+            distance=[1.0, 50.0, 1.0, 1.0],
+            price=[10.0, 10.0, 10.0, 10.0],
+            rating=[4.0, 4.0, np.nan, 4.0],
+        )
+        self.assertEqual(np.argmax(scores), 0)
+        self.assertGreater(scores[0], scores[1])
+        self.assertGreater(scores[0], scores[2])
+        self.assertGreater(scores[0], scores[3])
+
+    def test_weights_change_ranking(self):
+        similarity, distance, price, rating = [0.9, 0.2], [80.0, 1.0], [10.0, 10.0], [0, 0]
+        default = composite_score(similarity, distance, price, rating)
+        near_first = composite_score(similarity, distance, price, rating, RankingWeights(similarity=0.1, distance=2))
+        self.assertEqual(np.argmax(default), 0)
+        self.assertEqual(np.argmax(near_first), 1)
+
+    def test_invalid_distance_scale(self):
+        with self.assertRaises(ValueError):
+            RankingWeights(distance_scale_km=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from models.recommendation_store import RecommendationStore, write_store
+
+
+class TestRecommendationStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'recommendations.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup_by_user_id(self):
+        written = write_store(self.path, [(7, [3, 1], [0.9, 0.5]), (2, [4, 5, 6, 8], [1.0, 0.8, 0.7, 0.1])], top_n=3)
+        self.assertEqual(written, 2)
+        store = RecommendationStore(self.path)
+        product_ids, scores, computed_at = store.get(2)
+        self.assertEqual(product_ids.tolist(), [4, 5, 6])
+        self.assertAlmostEqual(float(scores[1]), 0.8, places=6)
+        self.assertEqual(store.get(7)[0].tolist(), [3, 1])
+        self.assertIsNone(store.get(5))
+        self.assertEqual(store.top_n, 3)
+        self.assertLessEqual(computed_at, time.time())
+
+    def test_missing_file_and_stale_entries(self):
+        store = RecommendationStore(self.path, max_age=0, check_interval=0)
+        self.assertIsNone(store.get(1))
+        write_store(self.path, [(1, [10], [0.5])], top_n=5)
+        time.sleep(0.01)
+        self.assertIsNone(store.get(1))
+        self.assertEqual(store.get(1, allow_stale=True)[0].tolist(), [10])
+
+    def test_atomic_swap_is_picked_up(self):
+        write_store(self.path, [(1, [10], [0.5])], top_n=2)
+        store = RecommendationStore(self.path, check_interval=0)
+        self.assertEqual(store.get(1)[0].tolist(), [10])
+        write_store(self.path, [(1, [20, 30], [0.9, 0.8]), (2, [40], [0.1])], top_n=2)
+        self.assertEqual(store.get(1)[0].tolist(), [20, 30])
+        self.assertEqual(store.get(2)[0].tolist(), [40])
+        self.assertEqual(os.listdir(self.directory.name), ['recommendations.bin'])
+
+    def test_metrics_and_older_format_versions(self):
+        write_store(self.path, [(1, [10, 20], [0.9, 0.8], [0.5, 0.4], [3.0, 12.5])], top_n=2)
+        store = RecommendationStore(self.path, check_interval=0)
+        _, _, similarities, distances, _ = store.get(1, with_metrics=True)
+        self.assertEqual(distances.tolist(), [3.0, 12.5])
+        self.assertAlmostEqual(float(similarities[0]), 0.5, places=6)
+        with open(self.path, 'r+b') as file:
+            file.seek(4)
+            file.write(np.uint32(1).tobytes())
+        self.assertIsNone(RecommendationStore(self.path).get(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
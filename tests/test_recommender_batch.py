@@ -0,0 +1,125 @@
+import os
+import tempfile
+import json
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from fastapi.testclient import TestClient
+from main import app
+from models.recommendation_store import RecommendationStore, write_store
+from models.recommender import Recommender
+from stub_backend import StubBackend
+
+
+PRODUCTS = [
+    {'id': 1, 'description': 'Hamaca tejida de algodón', 'latitude': 12.13, 'longitude': -86.25, 'price': 900.0,
+     'rating': 4.5},
+    {'id': 2, 'description': 'Café orgánico de Jinotega', 'latitude': 13.09, 'longitude': -85.99, 'price': 150.0,
+     'rating': 4.0},
+    {'id': 3, 'description': 'Hamaca de colores y café tostado', 'latitude': 11.97, 'longitude': -86.09,
+     'price': 1200.0, 'rating': 3.5},
+    {'id': 4, 'description': 'Sombrero de palma', 'latitude': 12.93, 'longitude': -86.41, 'price': 300.0},
+]
+
+PROFILES = {
+    1: {'id': 1, 'interests': ['Hamaca'], 'location': {'latitude': 12.13, 'longitude': -86.25}},
+    2: {'id': 2, 'interests': ['café', 'Sombrero'], 'location': {'latitude': 13.0, 'longitude': -86.0}},
+}
+
+
+def profiles_route(query, headers):
+    ids = [int(uid) for uid in query.get('ids', '').split(',') if uid]
+    return 200, {}, [PROFILES[uid] for uid in ids if uid in PROFILES]
+
+
+def products_route(query, headers):
+    return 200, {'ETag': '"v1"'}, PRODUCTS
+
+
+class TestRecommendMany(unittest.TestCase):
+    def setUp(self):
+        routes = {'/api/userprofiles/': profiles_route, '/api/products/': products_route}
+        for uid, profile in PROFILES.items():
+            routes[f'/api/userprofiles/{uid}/'] = lambda query, headers, profile=profile: (200, {}, profile)
+        self.backend = StubBackend(routes).__enter__()
+        self.recommender = Recommender(self.backend.base_url)
+
+    def tearDown(self):
+        self.backend.__exit__(None, None, None)
+
+    def test_batch_matches_single_user_recommendations(self):
+        results = dict(self.recommender.recommend_many([1, 2], top_n=3))
+        for uid in (1, 2):
+            expected = self.recommender.recommend(uid, top_n=3)
+            pd.testing.assert_frame_equal(results[uid], expected)
+        self.assertEqual(self.backend.count('/api/userprofiles/'), 1)
+
+    def test_unknown_users_yield_none(self):
+        results = list(self.recommender.recommend_many([99, 1], top_n=2))
+        self.assertEqual(results[0], (99, None))
+        self.assertEqual(results[1][0], 1)
+        self.assertEqual(results[1][1]['id'].tolist(), [1, 3])
+
+    def test_catalogs_from_two_backends_do_not_share_indices(self):
+        # Each catalog cache numbers its versions from 1, so both first catalogs have version 1
+        other_products = [{'id': 10, 'description': 'Mesa de madera', 'latitude': 12.13, 'longitude': -86.25,
+                           'price': 2000.0},
+                          {'id': 11, 'description': 'Silla de madera tallada', 'latitude': 12.2, 'longitude': -86.3,
+                           'price': 800.0}]
+        profile = {'id': 1, 'interests': ['madera'], 'location': {'latitude': 12.13, 'longitude': -86.25}}
+        routes = {'/api/userprofiles/1/': lambda query, headers: (200, {}, profile),
+                  '/api/products/': lambda query, headers: (200, {}, other_products)}
+        self.recommender.recommend(1, top_n=3)
+        with StubBackend(routes) as other:
+            recommendations = Recommender(other.base_url).recommend(1, top_n=2)
+        self.assertEqual(sorted(recommendations['id'].tolist()), [10, 11])
+        self.assertTrue((recommendations['similarity'] > 0).all())
+        # The first backend still gets its own indices back
+        self.assertEqual(self.recommender.recommend(1, top_n=1)['id'].tolist(), [1])
+
+    def test_stream_reports_late_errors_as_a_record(self):
+        def failing_results(user_ids, **kwargs):
+            yield 1, pd.DataFrame([PRODUCTS[0]])
+            raise Exception("Error al obtener los datos de los usuarios")
+
+        with patch('models.recommender.Recommender.recommend_many', side_effect=failing_results):
+            response = TestClient(app).post('/recommender/recommendations/batch', json={'user_ids': [1, 2]})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lines[0]['user_id'], 1)
+        self.assertEqual(lines[1], {'error': "Error al obtener los datos de los usuarios"})
+
+    def write_precomputed(self, path):
+        write_store(path, ((uid, df['id'].to_numpy(), df['score'].to_numpy(), df['similarity'].to_numpy(),
+                            df['distance'].to_numpy())
+                           for uid, df in self.recommender.recommend_many([1, 2], top_n=3)), top_n=3)
+        return RecommendationStore(path)
+
+    def test_precomputed_recommendations_match_live(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = self.write_precomputed(os.path.join(directory, 'recommendations.bin'))
+            for uid in (1, 2):
+                live = self.recommender.recommend(uid, top_n=3)
+                served = self.recommender.recommend_precomputed(uid, store, top_n=3)
+                self.assertEqual(served.columns.tolist(), live.columns.tolist())
+                self.assertEqual(served['id'].tolist(), live['id'].tolist())
+                for column in ('score', 'similarity', 'distance'):
+                    self.assertEqual(served[column].round(3).tolist(), live[column].round(3).tolist())
+            self.assertIsNone(self.recommender.recommend_precomputed(3, store))
+            self.assertIsNone(self.recommender.recommend_precomputed(1, store, top_n=10))
+
+    def test_precomputed_falls_back_when_products_were_deleted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = self.write_precomputed(os.path.join(directory, 'recommendations.bin'))
+            catalog = pd.DataFrame(PRODUCTS)
+            served = self.recommender.recommend_precomputed(1, store, top_n=2, products_df=catalog)
+            self.assertEqual(served['id'].tolist(), [1, 3])
+            without_first = catalog[catalog['id'] != 1].reset_index(drop=True)
+            self.assertIsNone(self.recommender.recommend_precomputed(1, store, top_n=2, products_df=without_first))
+            # Las entradas escritas sin similitudes ni distancias se recalculan en vivo
+            write_store(store.path, [(1, [1, 3], [0.9, 0.5])], top_n=3)
+            self.assertIsNone(self.recommender.recommend_precomputed(1, RecommendationStore(store.path), top_n=2,
+                                                                     products_df=catalog))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import os
+import tempfile
+import threading
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from models.market_analysis import MarketAnalysis
+from models.sales_aggregates import SalesAggregateStore, SalesStatistics, location_cells
+from stub_backend import StubBackend
+
+
+def make_sales(start, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        'id': start + i,
+        'date': f'2024-01-{rng.integers(1, 29):02d}',
+        'hour': f'{rng.integers(0, 24):02d}:{rng.integers(0, 60):02d}:00',
+        'amount': str(round(float(rng.uniform(1, 500)), 2)),
+        'buyer_location': {'latitude': round(float(rng.uniform(11, 14)), 2),
+                           'longitude': round(float(rng.uniform(-87, -84)), 2)},
+    } for i in range(count)]
+
+
+class TestSalesAggregateStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SalesAggregateStore(os.path.join(self.directory.name, 'aggregates.sqlite3'))
+        self.analysis = MarketAnalysis('http://dummy-api-url')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_merge_matches_full_recompute(self):
+        sales = make_sales(1, 500)
+        self.store.merge(7, self.analysis.process_data(pd.DataFrame(sales[:300])))
+        self.store.merge(7, self.analysis.process_data(pd.DataFrame(sales[300:])))
+        daily, hourly, location = self.store.statistics(7)
+        expected_daily, expected_hourly, _ = self.analysis.generate_statistics(
+            self.analysis.process_data(pd.DataFrame(sales)))
+        np.testing.assert_allclose(daily.to_numpy(), expected_daily.to_numpy())
+        self.assertEqual(list(daily.index), [str(date) for date in expected_daily.index])
+        np.testing.assert_allclose(hourly.to_numpy(), expected_hourly.to_numpy())
+        self.assertAlmostEqual(location['sales_amount'].sum(), expected_daily.sum(), places=6)
+        self.assertEqual(self.store.cursor(7), 500)
+
+    def test_repeated_merge_does_not_double_count(self):
+        df = self.analysis.process_data(pd.DataFrame(make_sales(1, 50)))
+        self.assertEqual(self.store.merge(3, df), 50)
+        self.assertEqual(self.store.merge(3, df), 0)
+        daily, _, _ = self.store.statistics(3)
+        self.assertAlmostEqual(daily.sum(), df['sales_amount'].sum(), places=6)
+        self.assertEqual(self.store.statistics(4)[0].size, 0)
+
+    def test_concurrent_merges_count_each_sale_once(self):
+        df = self.analysis.process_data(pd.DataFrame(make_sales(1, 200)))
+        threads = [threading.Thread(target=self.store.merge, args=(5, df)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertAlmostEqual(self.store.statistics(5)[1].sum(), df['sales_amount'].sum(), places=6)
+
+    def test_merge_requires_sale_ids(self):
+        df = self.analysis.process_data(pd.DataFrame(make_sales(1, 5)))
+        with self.assertRaisesRegex(ValueError, "'id'"):
+            self.store.merge(2, df.drop(columns=['id']))
+        df.loc[2, 'id'] = None
+        with self.assertRaisesRegex(ValueError, "'id'"):
+            self.store.merge(2, df)
+        self.assertIsNone(self.store.cursor(2))
+        with self.assertRaises(ValueError):
+            MarketAnalysis('http://dummy-api-url', self.store, location_resolution=None)
+
+    def test_sales_without_location_have_no_cell(self):
+        sales = make_sales(1, 3)
+        sales[1]['buyer_location'] = {'latitude': None, 'longitude': None}
+        df = self.analysis.process_data(pd.DataFrame(sales))
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            self.store.merge(6, df)
+            accumulator = SalesStatistics(location_resolution=0.01)
+            accumulator.add(df)
+            _, _, streamed = accumulator.result()
+        daily, _, location = self.store.statistics(6)
+        self.assertAlmostEqual(daily.sum(), df['sales_amount'].sum(), places=6)
+        for frame in (location, streamed):
+            self.assertEqual(len(frame), 2)
+            self.assertTrue((frame['buyer_latitude'] > 0).all())
+            self.assertAlmostEqual(frame['sales_amount'].sum(), df['sales_amount'].drop(1).sum(), places=6)
+
+    def test_location_cells(self):
+        lat_cells, lon_cells = location_cells(np.array([12.34, -0.0005], dtype=np.float32), [-86.2, 0.0])
+        self.assertEqual(lat_cells.tolist(), [12340, -1])
+        self.assertEqual(lon_cells.tolist(), [-86200, 0])
+
+
+class TestIncrementalAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sales = make_sales(1, 300)
+
+        def sales_route(query, headers):
+            # Paginated like Django REST Framework, ordered by sale id
+            after_id, page = int(query.get('after_id', 0)), int(query.get('page', 1))
+            page_size = int(query['page_size'])
+            rows = [sale for sale in self.sales if sale['id'] > after_id]
+            next_url = None
+            if page * page_size < len(rows):
+                next_url = (f"{self.backend.base_url}/sales/?user_id=9&after_id={after_id}"
+                            f"&page_size={page_size}&page={page + 1}")
+            return 200, {}, {'count': len(rows), 'next': next_url,
+                             'results': rows[(page - 1) * page_size:page * page_size]}
+
+        self.backend = StubBackend({'/sales/': sales_route}).__enter__()
+        self.store = SalesAggregateStore(os.path.join(self.directory.name, 'aggregates.sqlite3'))
+
+    def tearDown(self):
+        self.backend.__exit__(None, None, None)
+        self.directory.cleanup()
+
+    def test_second_run_fetches_only_new_sales(self):
+        analysis = MarketAnalysis(self.backend.base_url, self.store, page_size=64)
+        first = analysis.run_analysis(9)
+        self.assertEqual(self.backend.count('/sales/'), 5)
+        self.assertNotIn('after_id', self.backend.requests[0][1])
+        self.assertEqual(self.backend.requests[0][1]['ordering'], 'id')
+        self.assertEqual(analysis.run_analysis(9)['data_version'], first['data_version'])
+        self.assertEqual(self.backend.requests[-1][1]['after_id'], '300')
+
+        self.sales += make_sales(301, 20, seed=1)
+        second = analysis.run_analysis(9)
+        self.assertNotEqual(second['data_version'], first['data_version'])
+        full = MarketAnalysis(self.backend.base_url).run_analysis(9)
+        self.assertEqual([row['date'] for row in second['daily_sales']], [row['date'] for row in full['daily_sales']])
+        np.testing.assert_allclose([row['sales_amount'] for row in second['daily_sales']],
+                                   [row['sales_amount'] for row in full['daily_sales']])
+        np.testing.assert_allclose([row['sales_amount'] for row in second['hourly_sales']],
+                                   [row['sales_amount'] for row in full['hourly_sales']])
+
+    def test_out_of_order_pages_raise(self):
+        analysis = MarketAnalysis(self.backend.base_url, self.store, page_size=64)
+        self.sales.reverse()
+        with self.assertRaisesRegex(ValueError, 'fuera de orden'):
+            analysis.run_analysis(9)
+        # The first page (ids 300 down to 237) was merged before the second one was rejected
+        self.assertEqual(self.store.cursor(9), 300)
+
+
+class TestPaginatedStatistics(unittest.TestCase):
+    TOTAL = 1_000_000
+    PAGE_SIZE = 50_000
+
+    @staticmethod
+    def sale_columns(ids):
+        # Synthetic sales derived from the id, so pages can be served without keeping them around
+        return {
+            'day': ids % 28 + 1,
+            'hour': ids * 7 % 24,
+            'amount': (ids % 100) * 0.25 + 1,
+            'latitude': 12 + (ids % 37) * 0.01,
+            'longitude': -86 + (ids % 41) * 0.01,
+        }
+
+    def sales_route(self, query, headers):
+        page = int(query.get('page', 1))
+        ids = np.arange((page - 1) * self.PAGE_SIZE, min(page * self.PAGE_SIZE, self.TOTAL))
+        columns = self.sale_columns(ids)
+        rows = [{'id': int(i) + 1, 'date': f'2024-02-{day:02d}', 'hour': f'{hour:02d}:30:00', 'amount': amount,
+                 'buyer_location': {'latitude': round(lat, 2), 'longitude': round(lon, 2)}}
+                for i, day, hour, amount, lat, lon in zip(ids.tolist(), columns['day'].tolist(),
+                                                          columns['hour'].tolist(), columns['amount'].tolist(),
+                                                          columns['latitude'].tolist(), columns['longitude'].tolist())]
+        next_url = None
+        if page * self.PAGE_SIZE < self.TOTAL:
+            next_url = f'{self.backend.base_url}/sales/?user_id=1&page_size={self.PAGE_SIZE}&page={page + 1}'
+        self.largest_page = max(self.largest_page, len(rows))
+        return 200, {}, {'count': self.TOTAL, 'next': next_url, 'results': rows}
+
+    def test_streams_one_million_sales(self):
+        self.largest_page = 0
+        with StubBackend({'/sales/': self.sales_route}) as self.backend:
+            analysis = MarketAnalysis(self.backend.base_url, page_size=self.PAGE_SIZE)
+            daily, hourly, location = analysis.stream_statistics(1)
+            self.assertEqual(self.backend.count('/sales/'), self.TOTAL // self.PAGE_SIZE)
+        self.assertEqual(self.largest_page, self.PAGE_SIZE)
+
+        columns = self.sale_columns(np.arange(self.TOTAL))
+        expected_daily = np.bincount(columns['day'] - 1, weights=columns['amount'])
+        expected_hourly = np.bincount(columns['hour'], weights=columns['amount'])
+        np.testing.assert_allclose(daily.to_numpy(), expected_daily)
+        self.assertEqual(str(daily.index[0]), '2024-02-01')
+        np.testing.assert_allclose(hourly.to_numpy(), expected_hourly)
+        self.assertEqual(len(location), 37 * 41)
+        self.assertAlmostEqual(location['sales_amount'].sum(), columns['amount'].sum(), delta=1e-6 * self.TOTAL)
+
+    def test_accumulator_matches_generate_statistics(self):
+        sales = make_sales(1, 3000)
+        for resolution, max_cells in ((None, None), (0.01, 5000), (0.01, 50)):
+            analysis = MarketAnalysis('http://dummy-api-url', location_resolution=resolution,
+                                      max_location_cells=max_cells)
+            statistics = SalesStatistics(compact_rows=500, location_resolution=resolution,
+                                         max_location_cells=max_cells)
+            for start in range(0, len(sales), 700):
+                statistics.add(analysis.process_data(pd.DataFrame(sales[start:start + 700])))
+            expected = analysis.generate_statistics(analysis.process_data(pd.DataFrame(sales)))
+            daily, hourly, location = statistics.result()
+            pd.testing.assert_series_equal(daily, expected[0])
+            pd.testing.assert_series_equal(hourly, expected[1])
+            pd.testing.assert_frame_equal(location, expected[2], check_exact=False)
+            self.assertEqual(location.attrs['resolution'], expected[2].attrs['resolution'])
+
+
+if __name__ == '__main__':
+    unittest.main()